@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from random import Random
+
+from NuNetLibrary import CompiledNetwork, DesignFile, numpy
+
+# Activation functions used by the hidden neurons of synthetic designs, by default.
+HIDDENACTIVATIONS = ["TANH", "SIGMOID", "LEAKY ReLU", "ReLU", "eLU", "LINEAR"]
+
+
+def generatesource(networkname: str, inputs: int, depth: int, width: int, outputs: int, skipdensity: float = 0.0,
+                   activations: list[str] = HIDDENACTIVATIONS, loss: str = "MSE", learningrate: float = 0.01, seed: int = 0,
+                   weightrange: float = 1.0, columns: bool = False, datafile: str = None) -> str:
+    """generatesource creates the code of a synthetic network in the same form Data.generate emits. Consecutive layers are fully connected,
+    and each pair of non-consecutive layers is connected by a synapse with probability skipdensity. Weights are initialised between
+    -weightrange and weightrange. With columns the synapses are given as a dictionary of columns (see Synapse.fromcolumns) rather than a
+    list of Synapse objects. Given a datafile, the design is written to it and the code is a class that loads it (see DesignFile), as
+    Data.generate's compact mode emits."""
+    random = Random(seed)
+
+    # Setting up the layers of [kind, name, position, activation type, constant] for each neuron, the first holding inputs and the last outputs.
+    layers = [[["Input", "x" + str(across), (0, across), "NONE", None] for across in range(inputs)]]
+    for layer in range(1, depth + 1):
+        layers.append([["Neuron", None, (layer, across), random.choice(activations), 1] for across in range(width)])
+    layers.append([["Output", "y" + str(across), (depth + 1, across), loss, None] for across in range(outputs)])
+
+    # Connecting consecutive layers fully, and other layer pairs by chance.
+    synapses = list()
+    for endlayer in range(1, len(layers)):
+        for startlayer in range(0, endlayer):
+            for _, _, endposition, _, _ in layers[endlayer]:
+                for _, _, startposition, _, _ in layers[startlayer]:
+                    if startlayer == endlayer - 1 or random.random() < skipdensity:
+                        synapses.append((startposition, endposition, random.random() < 0.5))
+
+    if datafile is not None:
+        DesignFile.save(datafile, layers, {"startpositions": [start for start, _, _ in synapses], "endpositions": [end for _, end, _ in synapses],
+                                           "intervals": weightrange / 100, "minimums": -weightrange, "maximums": weightrange,
+                                           "biasenabled": [bias for _, _, bias in synapses]})
+        return ("from NuNetLibrary import *\n\nclass " + networkname + "(Network):\n\tdef __init__(self):\n\t\tNetwork.__init__(self, " +
+                "*DesignFile.load(" + repr(datafile) + ", __file__), " + str(learningrate) + ")")
+
+    # Writing the code of each neuron.
+    neuroncode = ",".join("[" + ", ".join(kind + "(" + ("" if name is None else repr(name) + ", ") + str(position) + ", '" + activation + "'" +
+                                          ("" if constant is None else ", " + str(constant)) + ")"
+                                          for kind, name, position, activation, constant in layer) + "]" for layer in layers)
+
+    if columns:
+        synapsecode = ("{'startpositions' : [" + ",".join(str(start) for start, _, _ in synapses) + "], 'endpositions' : [" +
+                       ",".join(str(end) for _, end, _ in synapses) + "], 'intervals' : " + str(weightrange / 100) + ", 'minimums' : " +
+                       str(-weightrange) + ", 'maximums' : " + str(weightrange) + ", 'biasenabled' : [" +
+                       ",".join(str(bias) for _, _, bias in synapses) + "]}")
+    else:
+        synapsecode = ("[" + ",".join("Synapse(" + str(start) + ", " + str(end) + ", {'interval' : " + str(weightrange / 100) + ", 'min' : " +
+                                      str(-weightrange) + ", 'max' : " + str(weightrange) + "}, " + str(bias) + ")"
+                                      for start, end, bias in synapses) + "]")
+
+    return ("from NuNetLibrary import *\n\nclass " + networkname + "(Network):\n\tdef __init__(self):\n\t\tNetwork.__init__(self, [" + neuroncode + "], " + synapsecode + ", " +
+            str(learningrate) + ")")
+
+
+def loadnetworkclass(source: str, networkname: str) -> type:
+    """loadnetworkclass executes generated network code, returning the network class it defines."""
+    namespace = {"__file__": networkname + ".py"}
+    exec(compile(source, networkname + ".py", "exec"), namespace)
+    return namespace[networkname]
+
+
+def slotattributes(instance) -> dict:
+    """slotattributes returns the attributes an object holds in slots, by their (mangled) names."""
+    attributes = dict()
+    for cls in type(instance).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if name.startswith("__") and not name.endswith("__"):
+                name = "_" + cls.__name__.lstrip("_") + name
+            attributes[name] = getattr(instance, name)
+    return attributes
+
+
+def rebuild(cls: type, attributes: dict) -> object:
+    """rebuild creates an object of the class without calling its __init__, setting the attributes given in order."""
+    instance = cls.__new__(cls)
+    for name, value in attributes.items():
+        setattr(instance, name, value)
+    return instance
+
+
+def benchmarkmemory(inputs: int, depth: int, width: int, outputs: int, skipdensity: float = 0.0) -> dict:
+    """benchmarkmemory measures the memory held by a constructed network (neurons, synapses and wiring), reporting it in total and per
+    synapse. To show the saving of the slotted Synapse and Neuron classes, the neuron and synapse objects are also rebuilt as slotted
+    objects and as objects of equivalent classes without slots (holding their attributes in a __dict__), and the memory of each compared."""
+    networkclass = loadnetworkclass(generatesource("MemoryBenchmark", inputs, depth, width, outputs, skipdensity), "MemoryBenchmark")
+
+    # Measuring only the memory allocated while constructing the network (the generated code is already compiled).
+    tracemalloc.start()
+    network = networkclass()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    synapsecount = len(network._synapses)
+    neuroncount = sum(len(layer) for layer in network._neurons)
+    results = {"neurons": neuroncount, "synapses": synapsecount, "bytes": current, "peakbytes": peak, "bytespersynapse": current / synapsecount}
+
+    # Rebuilding the objects with the same attribute values (shared, so only the objects themselves are measured), once with each class
+    # and once with a class of the same name without slots.
+    objects = network._synapses + [neuronobject for layer in network._neurons for neuronobject in layer]
+    attributes = [(type(instance), slotattributes(instance)) for instance in objects]
+    unslottedclasses = {cls: type(cls.__name__, (), {}) for cls, _ in attributes}
+    for form, classes in (("slotted", dict()), ("unslotted", unslottedclasses)):
+        tracemalloc.start()
+        rebuilt = [rebuild(classes.get(cls, cls), values) for cls, values in attributes]
+        results[form + "bytes"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del rebuilt
+    results["slotsaving"] = results["unslottedbytes"] - results["slottedbytes"]
+    results["slotsavingperobject"] = results["slotsaving"] / len(objects)
+    return results
+
+
+def benchmarkconstruction(inputs: int, depth: int, width: int, outputs: int, skipdensity: float = 0.0, constructions: int = 3) -> dict:
+    """benchmarkconstruction compares the startup time of a generated design with its synapses as Synapse objects, as columns and in a
+    design file: the time to compile the generated code (as on first import), and the time to construct the network (the first
+    construction is included, which reads the design file)."""
+    results = dict()
+    datafile = os.path.join(tempfile.mkdtemp(), "ConstructionBenchmark.json")
+    for form in ("objects", "columns", "datafile"):
+        source = generatesource("ConstructionBenchmark", inputs, depth, width, outputs, skipdensity, columns=form == "columns",
+                                datafile=datafile if form == "datafile" else None)
+        started = time.perf_counter()
+        networkclass = loadnetworkclass(source, "ConstructionBenchmark")
+        compiletime = time.perf_counter() - started
+        construction = summarise(timeeach(lambda _: networkclass(), range(constructions)))
+        results[form] = {"compile": compiletime, "sourcebytes": len(source), "construct": construction["mean"],
+                         "total": compiletime + construction["mean"], "synapses": len(networkclass()._synapses)}
+    results["speedup"] = {form: results["objects"]["total"] / results[form]["total"] for form in ("columns", "datafile")}
+    DesignFile.clearcache()
+    os.remove(datafile)
+    return results
+
+
+def generatedata(inputs: int, outputs: int, samples: int, seed: int = 0) -> (list[dict], list[dict]):
+    """generatedata creates a random dataset of feature and label dictionaries for the inputs and outputs of generatesource's designs."""
+    random = Random(seed)
+    featurelist = [{"x" + str(index): random.uniform(-1, 1) for index in range(inputs)} for _ in range(samples)]
+    labellist = [{"y" + str(index): random.uniform(-1, 1) for index in range(outputs)} for _ in range(samples)]
+    return featurelist, labellist
+
+
+def summarise(latencies: list[float]) -> dict:
+    """summarise reports the mean and percentiles of a list of latencies (in seconds), and the rate they correspond to."""
+    ordered = sorted(latencies)
+    mean = sum(ordered) / len(ordered)
+    percentile = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {"mean": mean, "p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99), "max": ordered[-1],
+            "persecond": 1 / mean if mean else float("inf")}
+
+
+def timeeach(function, arguments: list) -> list[float]:
+    """timeeach calls the function with each of the arguments, returning the time each call took."""
+    latencies = list()
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def benchmarkengine(networkclass: type, engine: str, featurelist: list[dict], labellist: list[dict], constructions: int = 5) -> dict:
+    """benchmarkengine times each stage of a network's use on an engine ("object", or "compiled"): construction, the forward and backward
+    passes alone, and train, test and predict over the dataset, along with the peak memory of a training run."""
+    results = dict()
+
+    # Construction (and compilation for the compiled engine).
+    def construct(_):
+        network = networkclass()
+        if engine == "compiled":
+            network.compile()
+        return network
+    results["init"] = summarise(timeeach(construct, range(constructions)))
+
+    # The forward and backward passes, each timed alone, for every sample.
+    network = construct(None)
+    forward, backward = list(), list()
+    for features, labels in zip(featurelist, labellist):
+        network._setlabels(labels)
+        started = time.perf_counter()
+        network._feedforward(features)
+        forward.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        network._backpropagate()
+        backward.append(time.perf_counter() - started)
+    results["feedforward"] = summarise(forward)
+    results["backpropagate"] = summarise(backward)
+
+    # Whole runs of train and test, reported per sample.
+    started = time.perf_counter()
+    network.train(featurelist, labellist, len(featurelist), record=False, display=False)
+    elapsed = time.perf_counter() - started
+    results["train"] = {"seconds": elapsed, "persecond": len(featurelist) / elapsed}
+    started = time.perf_counter()
+    network.test(featurelist, labellist)
+    elapsed = time.perf_counter() - started
+    results["test"] = {"seconds": elapsed, "persecond": len(featurelist) / elapsed}
+    results["predict"] = summarise(timeeach(network.predict, featurelist))
+
+    # Peak memory of constructing a network and training it over the dataset.
+    tracemalloc.start()
+    construct(None).train(featurelist, labellist, len(featurelist), record=False, display=False)
+    results["peakbytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results
+
+
+def benchmarkbatched(networkclass: type, featurelist: list[dict], labellist: list[dict], batchsize: int = 32) -> dict:
+    """benchmarkbatched times the NumPy engine, an epoch of trainbatched and predictmany over the dataset."""
+    network = networkclass()
+    network.compile()
+    started = time.perf_counter()
+    network.trainbatched(featurelist, labellist, 1, batchsize)
+    elapsed = time.perf_counter() - started
+    results = {"trainbatched": {"seconds": elapsed, "persecond": len(featurelist) / elapsed}}
+    started = time.perf_counter()
+    for _ in network.predictmany(featurelist):
+        pass
+    elapsed = time.perf_counter() - started
+    results["predictmany"] = {"seconds": elapsed, "persecond": len(featurelist) / elapsed}
+    return results
+
+
+def benchmarktiming(inputs: int, depth: int, width: int, outputs: int, skipdensity: float = 0.0, activations: list[str] = HIDDENACTIVATIONS,
+                    samples: int = 200, seed: int = 0) -> dict:
+    """benchmarktiming times a synthetic design on every engine available, returning the results with the design and environment they
+    were measured with. Weights are scaled down with the width so values stay finite through deep designs of unbounded activations."""
+    networkclass = loadnetworkclass(generatesource("TimingBenchmark", inputs, depth, width, outputs, skipdensity, activations,
+                                                   learningrate=0.001, seed=seed, weightrange=1 / max(inputs, width) ** 0.5),
+                                    "TimingBenchmark")
+    featurelist, labellist = generatedata(inputs, outputs, samples, seed)
+
+    results = {"design": {"inputs": inputs, "depth": depth, "width": width, "outputs": outputs, "skipdensity": skipdensity,
+                          "activations": activations, "samples": samples, "seed": seed, "synapses": len(networkclass()._synapses)},
+               "environment": {"python": platform.python_version(), "numpy": numpy.__version__ if numpy is not None else None},
+               "engines": {engine: benchmarkengine(networkclass, engine, featurelist, labellist) for engine in ("object", "compiled")}}
+    if numpy is not None:
+        results["engines"]["batched"] = benchmarkbatched(networkclass, featurelist, labellist)
+    return results
+
+
+def compareresults(baseline: dict, current: dict, tolerance: float = 0.1) -> list[str]:
+    """compareresults compares the rates (samples per second) of two benchmarktiming results, returning a line for each measurement that
+    fell by more than the tolerance (as a fraction of the baseline)."""
+    regressions = list()
+    for engine, stages in current["engines"].items():
+        for stage, measurement in stages.items():
+            if not isinstance(measurement, dict) or stage not in baseline["engines"].get(engine, {}):
+                continue
+            before, after = baseline["engines"][engine][stage]["persecond"], measurement["persecond"]
+            if after < before * (1 - tolerance):
+                regressions.append(engine + " " + stage + ": " + format(before, ".1f") + " -> " + format(after, ".1f") + " per second (" +
+                                   format(after / before - 1, "+.1%") + ")")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for NuNetLibrary.")
+    parser.add_argument("suite", choices=["memory", "timing", "construction"], help="the benchmark to run")
+    parser.add_argument("--inputs", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--width", type=int, default=200)
+    parser.add_argument("--outputs", type=int, default=4)
+    parser.add_argument("--skipdensity", type=float, default=0.0)
+    parser.add_argument("--activations", nargs="+", default=HIDDENACTIVATIONS, help="activation functions to choose hidden neurons' from")
+    parser.add_argument("--samples", type=int, default=200, help="size of the synthetic dataset (timing)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file to save the JSON results to")
+    parser.add_argument("--compare", help="JSON results of an earlier timing run to report regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="fractional slowdown reported as a regression")
+    arguments = parser.parse_args()
+
+    if arguments.suite == "memory":
+        results = benchmarkmemory(arguments.inputs, arguments.depth, arguments.width, arguments.outputs, arguments.skipdensity)
+    elif arguments.suite == "construction":
+        results = benchmarkconstruction(arguments.inputs, arguments.depth, arguments.width, arguments.outputs, arguments.skipdensity)
+    else:
+        results = benchmarktiming(arguments.inputs, arguments.depth, arguments.width, arguments.outputs, arguments.skipdensity,
+                                  arguments.activations, arguments.samples, arguments.seed)
+
+    print(json.dumps(results, indent=4))
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if arguments.compare:
+        with open(arguments.compare, "r") as file:
+            regressions = compareresults(json.load(file), results, arguments.tolerance)
+        print("\n".join(regressions) if regressions else "No regressions.")
@@ -1,10 +1,12 @@
 import json
+import os
 from math import pi, cos, sin
 from tkinter import Tk, filedialog
 from itertools import chain
 from pygame import *
 from pickle import dump, load, PickleError
 from operator import itemgetter
+from NuNetLibrary import DesignFile
 
 
 # Position is used to store coordinates (as well as vectors) in terms of both pixels,
@@ -2458,7 +2460,9 @@ class Data:
         return True
 
     # generate converts the network designed into working python code by setting up a new class for the described network, and importing the Nunet Library to run it.
-    def generate(self, networkname, location, learningrate, library):
+    # If compact, the design is written to a JSON file beside the code and loaded when the network is first created (see DesignFile in
+    # NuNetLibrary), rather than written as code, which keeps large designs fast to import. If compact is None it is used for large designs.
+    def generate(self, networkname, location, learningrate, library, compact=None):
 
         # Checking that the design is valid from a connections standpoint.
         if self.__getdesignvalidity():
@@ -2476,9 +2480,19 @@ class Data:
                 except KeyError:
                     neuronstructure[neuronobject.getposition()[0]] = [dataholder]
 
+            # Large designs are generated compactly by default.
+            if compact is None:
+                compact = len(self.__synapses) > 5000
+
+            # In compact mode the design is written to a sidecar data file, and the python file only holds a small class that loads it.
+            if compact:
+                self.__generatecompact(networkname, location, learningrate, library, neuronstructure)
+                return
+
             # Holding the text to be written in the python file, the name of the network is not the same as the filename, as different versions of a
-            # network may be made from the same file.
-            generatetext = "from NuNetLibrary import *\n\nclass " + networkname + "(Network):\n\tdef __init__(self):\n\t\tNetwork.__init__(self, ["
+            # network may be made from the same file. The optimiser (see Optimiser in the library) is chosen when the network is constructed.
+            generatetext = ("from NuNetLibrary import *\n\nclass " + networkname +
+                            "(Network):\n\tdef __init__(self, optimiser=None):\n\t\tNetwork.__init__(self, [")
 
             # While there are still neuron to add, cycle through each layer, producing a representation of a list of Neuron, Input and Output objects.
             while bool(neuronstructure):
@@ -2531,7 +2545,7 @@ class Data:
                     synapseobject.getendposition()) + ", " + "{'interval' : " + str(
                     synapseobject.getinterval()) + ", 'min' : " + str(synapseobject.getmin()) + ", 'max' : " + str(
                     synapseobject.getmax()) + "}, " + str(synapseobject.getbias()) + "),"
-            generatetext = generatetext[:-1] + "], " + str(learningrate) + ")"
+            generatetext = generatetext[:-1] + "], " + str(learningrate) + ", optimiser=optimiser)"
 
             # Write the python file in the location specified.
             file = open(location, "x")
@@ -2540,18 +2554,66 @@ class Data:
 
             # If the user wants a copy of the library included (if folder does not already contain it), library created.
             if library:
-                # Copy of NuNetLibrary is copied.
-                library = open("NuNetLibrary.py", "r")
-                newlocation = open("/".join(location.split('/')[:-1]) + '/NuNetLibrary.py', "x")
-                newlocation.write(''.join(library.readlines()))
-                newlocation.close()
-                library.close()
+                self.__copylibrary(location)
 
         else:
 
             # If design is invalid, anj appropriate error message is shown.
             self.__errorNotifications.append("Design invalid, some neurons are not properly connected.")
 
+    # copylibrary writes a copy of NuNetLibrary into the folder of the generated file (if the folder does not already contain it).
+    def __copylibrary(self, location):
+        library = open("NuNetLibrary.py", "r")
+        newlocation = open("/".join(location.split('/')[:-1]) + '/NuNetLibrary.py', "x")
+        newlocation.write(''.join(library.readlines()))
+        newlocation.close()
+        library.close()
+
+    # generatecompact writes the design (neurons in layers, and synapse columns) to a JSON design file named after the code file, and the code of
+    # a class that loads it to the python file. Both files are created before either is written, so an existing file leaves neither behind.
+    def __generatecompact(self, networkname, location, learningrate, library, neuronstructure):
+
+        # Creating the record of each neuron [kind, name, position, activation, constant] for each layer, in layer order.
+        layers = list()
+        for currentlayer in sorted(neuronstructure.keys()):
+            layer = list()
+            for neurondescription in sorted(neuronstructure[currentlayer], key=itemgetter('across')):
+                neuronobject = neurondescription["object"]
+                layer.append([neuronobject.gettype(), None if neuronobject.gettype() == "Neuron" else neuronobject.getname(),
+                              neuronobject.getposition(), neuronobject.getfunction(),
+                              int(neuronobject.getconstant()) if neuronobject.getconstant().isnumeric() else None])
+            layers.append(layer)
+
+        # Creating a column for each synapse attribute.
+        synapses = list(self.__synapses.values())
+        columns = {"startpositions": [synapseobject.getstartposition() for synapseobject in synapses],
+                   "endpositions": [synapseobject.getendposition() for synapseobject in synapses],
+                   "intervals": [synapseobject.getinterval() for synapseobject in synapses],
+                   "minimums": [synapseobject.getmin() for synapseobject in synapses],
+                   "maximums": [synapseobject.getmax() for synapseobject in synapses],
+                   "biasenabled": [synapseobject.getbias() for synapseobject in synapses]}
+
+        # Creating the python file and the design file beside it, removing the python file again if the design file already exists.
+        datalocation = location.rsplit(".", 1)[0] + ".json"
+        file = open(location, "x")
+        try:
+            open(datalocation, "x").close()
+        except OSError:
+            file.close()
+            os.remove(location)
+            raise
+
+        # Writing the design in the library's design file format.
+        DesignFile.save(datalocation, layers, columns)
+        file.write("from NuNetLibrary import *\n\nclass " + networkname + "(Network):\n\tdef __init__(self, optimiser=None):\n\t\t" +
+                   "Network.__init__(self, *DesignFile.load(" + repr(datalocation.split('/')[-1]) + ", __file__), " + str(learningrate) +
+                   ", optimiser=optimiser)")
+        file.close()
+
+        # If the user wants a copy of the library included (if folder does not already contain it), library created.
+        if library:
+            self.__copylibrary(location)
+
     # gettype returns the object type, in this case 'Data'.
     def gettype(self):
         return "Data"
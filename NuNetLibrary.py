@@ -1,7 +1,32 @@
-from math import log1p, cosh, tanh, e
-from random import randint
-from collections import namedtuple
-
+from math import log1p, cosh, tanh, e, exp, log, sqrt, floor
+from random import randint, Random
+from array import array
+from itertools import islice, product, repeat
+import csv
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from multiprocessing import Event, Pool, Process, Queue, cpu_count
+from collections import namedtuple, deque
+
+# NumPy is optional, it is only needed for batched training (the rest of the library uses the standard library alone).
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Layout of binary weight files: a header of an identifier, format version, reserved field and synapse count, followed by contiguous
+# little-endian arrays of the synapse positions (start layer, start across, end layer, end across as int64), weights and biases (float64,
+# NaN where the bias is not enabled). Every array starts on an 8 byte boundary so the file can be memory-mapped and its arrays viewed without
+# parsing, the values are then copied into the network.
+WEIGHTFILEIDENTIFIER = b"NUNETWTS"
+WEIGHTFILEVERSION = 1
+WEIGHTFILEHEADER = struct.Struct("<8sIIQ")
 
 # Creating a named tuple type for the activation and loss functions
 FuncReturn = namedtuple("Activation", "result derivative")
@@ -70,6 +95,71 @@ class ActivationFunctions:
         return FuncReturn(result=value, derivative=1)
 
 
+class InferenceFunctions:
+    """InferenceFunctions holds a value only version of each activation function, used for inference where derivatives are not needed.
+    They return a float rather than a FuncReturn."""
+
+    @staticmethod
+    def getfunction(activation: str):
+        """getfunction returns the inference function for an activation function, using the same names as Neuron._setactivation."""
+        activations = {"TANH": InferenceFunctions.tanh,
+                       "SIGMOID": InferenceFunctions.sigmoid,
+                       "LEAKY ReLU": InferenceFunctions.leakyReLU,
+                       "ReLU": InferenceFunctions.rectlinearunit,
+                       "SOFTPLUS": InferenceFunctions.softplus,
+                       "eLU": InferenceFunctions.expolinearunit,
+                       "LINEAR": InferenceFunctions.linear,
+                       "BINARY STEP": InferenceFunctions.binstep,
+                       "NONE": InferenceFunctions.none
+                       }
+        return activations[activation]
+
+    @staticmethod
+    def binstep(value: float, constant: float = 0) -> float:
+        """Binstep (binary step) value."""
+        return 1 if value > 0 else 0
+
+    @staticmethod
+    def linear(value: float, constant: float = 0) -> float:
+        """Linear value."""
+        return constant * value
+
+    @staticmethod
+    def expolinearunit(value: float, constant: float = 0) -> float:
+        """Expolinearunit (exponential linear unit) value."""
+        return value if value > 0 else constant * (e ** value - 1)
+
+    @staticmethod
+    def softplus(value: float, constant: float = 0) -> float:
+        """Softplus value."""
+        return log1p(1 + e ** value)
+
+    @staticmethod
+    def rectlinearunit(value: float, constant: float = 0) -> float:
+        """Rectlinearunit (rectified linear unit) value."""
+        return value if value > 0 else 0
+
+    @staticmethod
+    def leakyReLU(value: float, constant: float = 0) -> float:
+        """LeakyReLU (leaky rectified linear unit) value."""
+        return value if value > 0 else constant * value
+
+    @staticmethod
+    def sigmoid(value: float, constant: float = 0) -> float:
+        """Sigmoid value."""
+        return (1 + e ** -value) ** -1
+
+    @staticmethod
+    def tanh(value: float, constant: float = 0) -> float:
+        """Tanh value."""
+        return tanh(value)
+
+    @staticmethod
+    def none(value: float, constant: float = 0) -> float:
+        """None value, returns the value unchanged."""
+        return value
+
+
 class LossFunctions:
     """LossFunctions is used as a container for the loss functions that can be used by output neurons."""
 
@@ -110,22 +200,306 @@ class LossFunctions:
         """logcoshloss (Log-Cosh Loss) loss function."""
         return FuncReturn(result=log1p(cosh(predicted - label)), derivative=tanh(predicted - label))
 
+
+class BatchActivationFunctions:
+    """BatchActivationFunctions holds a batched version of each activation function, evaluating a whole array of values at once. Each kernel
+    writes the results and derivatives into preallocated buffers (NumPy arrays, array.array or lists the same length as the values) rather
+    than returning a FuncReturn per value. NumPy arrays are processed with NumPy, other buffers with a loop using the math module. If
+    derivatives is None only the results are calculated (used for inference)."""
+
+    @staticmethod
+    def getfunction(activation: str):
+        """getfunction returns the kernel for an activation function, using the same names as Neuron._setactivation."""
+        activations = {"TANH": BatchActivationFunctions.tanh,
+                       "SIGMOID": BatchActivationFunctions.sigmoid,
+                       "LEAKY ReLU": BatchActivationFunctions.leakyReLU,
+                       "ReLU": BatchActivationFunctions.rectlinearunit,
+                       "SOFTPLUS": BatchActivationFunctions.softplus,
+                       "eLU": BatchActivationFunctions.expolinearunit,
+                       "LINEAR": BatchActivationFunctions.linear,
+                       "BINARY STEP": BatchActivationFunctions.binstep,
+                       "NONE": BatchActivationFunctions.none
+                       }
+        return activations[activation]
+
+    @staticmethod
+    def binstep(values, constant: float, results, derivatives=None) -> None:
+        """Binstep (binary step) kernel."""
+        if _isndarray(values):
+            numpy.greater(values, 0, out=results)
+            if derivatives is not None:
+                derivatives.fill(0)
+        else:
+            for index, value in enumerate(values):
+                results[index] = 1 if value > 0 else 0
+            if derivatives is not None:
+                for index in range(len(values)):
+                    derivatives[index] = 0
+
+    @staticmethod
+    def linear(values, constant: float, results, derivatives=None) -> None:
+        """Linear kernel."""
+        if _isndarray(values):
+            numpy.multiply(values, constant, out=results)
+            if derivatives is not None:
+                derivatives.fill(constant)
+        else:
+            for index, value in enumerate(values):
+                results[index] = constant * value
+            if derivatives is not None:
+                for index in range(len(values)):
+                    derivatives[index] = constant
+
+    @staticmethod
+    def expolinearunit(values, constant: float, results, derivatives=None) -> None:
+        """Expolinearunit (exponential linear unit) kernel."""
+        if _isndarray(values):
+            # Only non-positive values use the exponential, so positive values are clipped to avoid overflow.
+            exponentials = numpy.exp(numpy.minimum(values, 0))
+            numpy.multiply(exponentials, constant, out=results)
+            results -= constant
+            positive = values > 0
+            numpy.copyto(results, values, where=positive)
+            if derivatives is not None:
+                numpy.multiply(exponentials, constant, out=derivatives)
+                numpy.copyto(derivatives, 1, where=positive)
+        else:
+            for index, value in enumerate(values):
+                results[index] = value if value > 0 else constant * (e ** value - 1)
+            if derivatives is not None:
+                for index, value in enumerate(values):
+                    derivatives[index] = 1 if value > 0 else constant * e ** value
+
+    @staticmethod
+    def softplus(values, constant: float, results, derivatives=None) -> None:
+        """Softplus kernel."""
+        if _isndarray(values):
+            numpy.exp(values, out=results)
+            results += 1
+            numpy.log1p(results, out=results)
+            if derivatives is not None:
+                numpy.negative(values, out=derivatives)
+                numpy.exp(derivatives, out=derivatives)
+                derivatives += 1
+                numpy.reciprocal(derivatives, out=derivatives)
+        else:
+            for index, value in enumerate(values):
+                results[index] = log1p(1 + e ** value)
+            if derivatives is not None:
+                for index, value in enumerate(values):
+                    derivatives[index] = (1 + e ** -value) ** -1
+
+    @staticmethod
+    def rectlinearunit(values, constant: float, results, derivatives=None) -> None:
+        """Rectlinearunit (rectified linear unit) kernel."""
+        if _isndarray(values):
+            numpy.maximum(values, 0, out=results)
+            if derivatives is not None:
+                numpy.greater(values, 0, out=derivatives)
+        else:
+            for index, value in enumerate(values):
+                results[index] = value if value > 0 else 0
+            if derivatives is not None:
+                for index, value in enumerate(values):
+                    derivatives[index] = 1 if value > 0 else 0
+
+    @staticmethod
+    def leakyReLU(values, constant: float, results, derivatives=None) -> None:
+        """LeakyReLU (leaky rectified linear unit) kernel."""
+        if _isndarray(values):
+            positive = values > 0
+            numpy.multiply(values, constant, out=results)
+            numpy.copyto(results, values, where=positive)
+            if derivatives is not None:
+                derivatives.fill(constant)
+                numpy.copyto(derivatives, 1, where=positive)
+        else:
+            for index, value in enumerate(values):
+                results[index] = value if value > 0 else constant * value
+            if derivatives is not None:
+                for index, value in enumerate(values):
+                    derivatives[index] = 1 if value > 0 else constant
+
+    @staticmethod
+    def sigmoid(values, constant: float, results, derivatives=None) -> None:
+        """Sigmoid kernel."""
+        if _isndarray(values):
+            numpy.negative(values, out=results)
+            numpy.exp(results, out=results)
+            results += 1
+            numpy.reciprocal(results, out=results)
+            if derivatives is not None:
+                numpy.subtract(1, results, out=derivatives)
+                derivatives *= results
+        else:
+            for index, value in enumerate(values):
+                results[index] = (1 + e ** -value) ** -1
+            if derivatives is not None:
+                for index in range(len(values)):
+                    derivatives[index] = results[index] * (1 - results[index])
+
+    @staticmethod
+    def tanh(values, constant: float, results, derivatives=None) -> None:
+        """Tanh kernel."""
+        if _isndarray(values):
+            numpy.tanh(values, out=results)
+            if derivatives is not None:
+                numpy.multiply(results, results, out=derivatives)
+                numpy.subtract(1, derivatives, out=derivatives)
+        else:
+            for index, value in enumerate(values):
+                results[index] = tanh(value)
+            if derivatives is not None:
+                for index in range(len(values)):
+                    derivatives[index] = 1 - results[index] ** 2
+
+    @staticmethod
+    def none(values, constant: float, results, derivatives=None) -> None:
+        """None kernel, passes the values through unchanged."""
+        if _isndarray(values):
+            numpy.copyto(results, values)
+            if derivatives is not None:
+                derivatives.fill(1)
+        else:
+            for index, value in enumerate(values):
+                results[index] = value
+            if derivatives is not None:
+                for index in range(len(values)):
+                    derivatives[index] = 1
+
+
+class BatchLossFunctions:
+    """BatchLossFunctions holds a batched version of each loss function, taking arrays of labels and predictions (in the same argument order
+    as LossFunctions) and writing the losses and derivatives into preallocated buffers."""
+
+    @staticmethod
+    def getfunction(loss: str):
+        """getfunction returns the kernel for a loss function, using the same names as Output._setactivation."""
+        losses = {"LOG-COSH": BatchLossFunctions.logcoshloss,
+                  "HUBER LOSS": BatchLossFunctions.huberloss,
+                  "HINGE LOSS": BatchLossFunctions.hingeloss,
+                  "LOG LOSS": BatchLossFunctions.logloss,
+                  "L1-LOSS": BatchLossFunctions.l1loss,
+                  "MSE": BatchLossFunctions.meansquarederror
+                  }
+        return losses[loss]
+
+    @staticmethod
+    def meansquarederror(labels, predicted, constant: float, results, derivatives) -> None:
+        """Meansquarederror (Mean Squared Error or L2 Loss) kernel."""
+        if _isndarray(labels):
+            numpy.subtract(predicted, labels, out=derivatives)
+            numpy.multiply(derivatives, derivatives, out=results)
+            derivatives *= -2
+        else:
+            for index, label in enumerate(labels):
+                difference = predicted[index] - label
+                results[index] = difference ** 2
+                derivatives[index] = -2 * difference
+
+    @staticmethod
+    def l1loss(labels, predicted, constant: float, results, derivatives) -> None:
+        """l1loss (absolute loss) kernel."""
+        if _isndarray(labels):
+            numpy.subtract(labels, predicted, out=derivatives)
+            numpy.absolute(derivatives, out=results)
+            numpy.sign(derivatives, out=derivatives)
+        else:
+            for index, label in enumerate(labels):
+                difference = label - predicted[index]
+                results[index] = abs(difference)
+                derivatives[index] = abs(difference) / difference
+
+    @staticmethod
+    def logloss(labels, predicted, constant: float, results, derivatives) -> None:
+        """Logloss (Log Loss) kernel, labels other than 0 or 1 have no defined loss and produce NaN."""
+        if _isndarray(labels):
+            results[:] = numpy.where(labels == 1, -numpy.log1p(predicted), numpy.where(labels == 0, -numpy.log1p(1 - predicted), numpy.nan))
+            derivatives[:] = numpy.where(labels == 1, -1 / numpy.log1p(predicted), numpy.where(labels == 0, -1 / (1 - predicted), numpy.nan))
+        else:
+            for index, label in enumerate(labels):
+                if label == 1:
+                    results[index] = - log1p(predicted[index])
+                    derivatives[index] = -1 / log1p(predicted[index])
+                elif label == 0:
+                    results[index] = - log1p(1 - predicted[index])
+                    derivatives[index] = -1 / (1 - predicted[index])
+                else:
+                    results[index] = derivatives[index] = float("nan")
+
+    @staticmethod
+    def hingeloss(labels, predicted, constant: float, results, derivatives) -> None:
+        """hingeloss (Hinge Loss) kernel."""
+        if _isndarray(labels):
+            numpy.multiply(labels, predicted, out=results)
+            numpy.subtract(1, results, out=results)
+            numpy.maximum(results, 0, out=results)
+            numpy.negative(labels, out=derivatives)
+            numpy.maximum(derivatives, 0, out=derivatives)
+        else:
+            for index, label in enumerate(labels):
+                results[index] = max(0, 1 - label * predicted[index])
+                derivatives[index] = max(0, -label)
+
+    @staticmethod
+    def huberloss(labels, predicted, constant: float, results, derivatives) -> None:
+        """huberloss (Huber Loss) kernel."""
+        if _isndarray(labels):
+            difference = labels - predicted
+            inside = numpy.absolute(difference) <= constant
+            results[:] = numpy.where(inside, 0.5 * difference ** 2, constant * numpy.absolute(difference) - (constant ** 2) / 2)
+            derivatives[:] = numpy.where(inside, -difference, -constant)
+        else:
+            for index, label in enumerate(labels):
+                difference = label - predicted[index]
+                if abs(difference) <= constant:
+                    results[index] = 0.5 * difference ** 2
+                    derivatives[index] = predicted[index] - label
+                else:
+                    results[index] = constant * abs(difference) - (constant ** 2) / 2
+                    derivatives[index] = -constant
+
+    @staticmethod
+    def logcoshloss(labels, predicted, constant: float, results, derivatives) -> None:
+        """logcoshloss (Log-Cosh Loss) kernel."""
+        if _isndarray(labels):
+            numpy.subtract(predicted, labels, out=derivatives)
+            numpy.cosh(derivatives, out=results)
+            numpy.log1p(results, out=results)
+            numpy.tanh(derivatives, out=derivatives)
+        else:
+            for index, label in enumerate(labels):
+                results[index] = log1p(cosh(predicted[index] - label))
+                derivatives[index] = tanh(predicted[index] - label)
+
+
+def _isndarray(values) -> bool:
+    """isndarray checks if a buffer is a NumPy array (and so can be processed by NumPy rather than a python loop)."""
+    return numpy is not None and isinstance(values, numpy.ndarray)
+
+
 # The synapse class contains all attributes required for synapse connections (weight, bias, initialisations), and provides back and forward propagation
 # functionality, it also adjusts its own weight and bias in accordance with the backpropagated derivative passed to it.
 class Synapse:
     synapseID = 0
 
+    # Slots are used in place of an instance dictionary, as large designs hold hundreds of thousands of synapses.
+    __slots__ = ("__identity", "__startPosition", "__endPosition", "__interval", "__min", "__max", "__startNeuron", "__endNeuron",
+                 "__biasEnabled", "__biasValue", "__weightValue", "__inputValue", "__activationValue", "__backpropDerivative", "__learningRate")
+
     def __init__(self, startposition, endposition, weightinitialisation, biasenabled):
         # setup of synapse identity
         self.__identity = Synapse.synapseID
         Synapse.synapseID += 1
 
         # Setup of initial positions
-        self.__startPosition = startposition
-        self.__endPosition = endposition
+        self.__startPosition = tuple(startposition)
+        self.__endPosition = tuple(endposition)
 
-        # attribute to hold weight intitialisation parameters (interval, min, max)
-        self.__weightInitialisation = weightinitialisation
+        # attributes to hold weight intitialisation parameters (interval, min, max), taken from the dictionary so it is not kept per synapse.
+        self.__interval = weightinitialisation["interval"]
+        self.__min = weightinitialisation["min"]
+        self.__max = weightinitialisation["max"]
 
         # Holder for neuron objects:
         self.__startNeuron = None
@@ -152,18 +526,46 @@ class Synapse:
         # Storing the learning rate (used to change the sensitivity of synapse weight and bias adjustment to backpropagated derivative.
         self.__learningRate = float()
 
-        # Setting up the intial reandom weight and bias of the synapse.
-        self.initialise()
-
-    # initialise uses the passed weight initialisation settings to randomly generate the weight, bias.
-    def initialise(self):
-        range = self.__weightInitialisation["max"] - self.__weightInitialisation["min"]
-        interval = self.__weightInitialisation["interval"]
+        # The weight and bias are left at zero rather than drawn here, as the network initialises them all at once.
 
-        self.__weightValue = self.__weightInitialisation["min"] + randint(0, range // interval) * interval
+    # fromcolumns creates synapses in bulk from columns of their start positions, end positions, weight initialisation parameters (interval,
+    # min and max) and bias flags. A parameter or bias flag shared by every synapse can be given as a single value in place of a column.
+    # Weights and biases are left at zero rather than drawn for each synapse, as the network initialises them all at once.
+    @staticmethod
+    def fromcolumns(startpositions, endpositions, intervals, minimums, maximums, biasenabled):
+        columns = [column if hasattr(column, "__len__") else repeat(column) for column in (intervals, minimums, maximums, biasenabled)]
+        synapses = list()
+        identity = Synapse.synapseID
+        for startposition, endposition, interval, minimum, maximum, bias in zip(startpositions, endpositions, *columns):
+            synapse = Synapse.__new__(Synapse)
+            synapse.__identity = identity
+            identity += 1
+            synapse.__startPosition = tuple(startposition)
+            synapse.__endPosition = tuple(endposition)
+            synapse.__interval = interval
+            synapse.__min = minimum
+            synapse.__max = maximum
+            synapse.__startNeuron = synapse.__endNeuron = None
+            synapse.__biasEnabled = bias
+            synapse.__biasValue = synapse.__weightValue = synapse.__inputValue = synapse.__activationValue = 0.0
+            synapse.__backpropDerivative = synapse.__learningRate = 0.0
+            synapses.append(synapse)
+        Synapse.synapseID = identity
+        return synapses
+
+    # initialise uses the passed weight initialisation settings to randomly generate the weight, bias. A Random object can be passed to draw
+    # from, otherwise the global random generator is used.
+    def initialise(self, generator=None):
+        draw = randint if generator is None else generator.randint
+
+        self.__weightValue = self.__min + draw(0, self.getsteps()) * self.__interval
 
         if self.__biasEnabled:
-            self.__biasValue = self.__weightInitialisation["min"] + randint(0, range // interval) * interval
+            self.__biasValue = self.__min + draw(0, self.getsteps()) * self.__interval
+
+    # getsteps returns the number of intervals above the minimum that a random weight or bias can be initialised to.
+    def getsteps(self):
+        return int((self.__max - self.__min) // self.__interval)
 
     # Resetvalues resets the values associated with the synapse for one training cycle.
     def resetvalues(self):
@@ -189,6 +591,10 @@ class Synapse:
         # Feeding the result to the next neuron or input.
         self.__endNeuron.giveinput(self.__activationValue)
 
+    # infer feeds the activation of the synapse into the neuron it feeds, without storing any values (used for inference).
+    def infer(self, value):
+        self.__endNeuron.giveinput(value * self.__weightValue + self.__biasValue)
+
     # passbackwards adjusts the neuron weight (and bias if applicable) and passed the derivative onto the input or neuron before it.
     def passbackwards(self, derivative):
 
@@ -214,11 +620,23 @@ class Synapse:
 
     # getstartposition returns the start-position of the synapse in the design grid.
     def getstartposition(self):
-        return tuple(self.__startPosition)
+        return self.__startPosition
 
     # getendposition returns the end-position of the synapse in the design grid.
     def getendposition(self):
-        return tuple(self.__endPosition)
+        return self.__endPosition
+
+    # getinterval returns the interval of the random initialisation of the weight and bias.
+    def getinterval(self):
+        return self.__interval
+
+    # getmin returns the minimum value of the random initialisation of the weight and bias.
+    def getmin(self):
+        return self.__min
+
+    # getmax returns the maximum value of the random initialisation of the weight and bias.
+    def getmax(self):
+        return self.__max
 
     # getstartneuron returns the neuron the synapse feeds from.
     def getstartneuron(self):
@@ -243,6 +661,15 @@ class Synapse:
     def getweightvalue(self):
         return self.__weightValue
 
+    # setweightvalue sets the weight of the synapse (used by the compiled engine to write back trained weights).
+    def setweightvalue(self, weight):
+        self.__weightValue = weight
+
+    # setbiasvalue sets the bias of the synapse, if the bias is not enabled it is left at zero.
+    def setbiasvalue(self, bias):
+        if self.__biasEnabled:
+            self.__biasValue = bias
+
     # getinputvalue returns the value of the input last given to the synapse in the current training cycle.
     def getinputvalue(self):
         return self.__inputValue
@@ -264,6 +691,10 @@ class Neuron:
     # NeuronID used to generate unique neuron identities for referencing.
     neuronID: int = 0
 
+    # Slots are used in place of an instance dictionary to reduce the memory used by large designs.
+    __slots__ = ("__identity", "__position", "_activationType", "_activationConstant", "_activationFunction", "_inferenceFunction", "_toSynapses",
+                 "_fromSynapses", "_inputSum", "_inputValue", "_activationValue", "_activationDerivative", "_backpropDerivative")
+
     def __init__(self, position: (int,int), activationtype: str, activationconstant: float = 0) -> None:
 
         # Setting up the unique identity of the neuron.
@@ -287,11 +718,18 @@ class Neuron:
         # TODO using activationfunction type as type
         self._activationFunction = self._setactivation(activationtype)
 
+        # Storing a reference to the value only version of the activation function, used for inference (outputs have none).
+        self._inferenceFunction = None if isinstance(self, Output) else InferenceFunctions.getfunction(activationtype)
+
         # Storing neuron connections, differentiating between 'to' and 'from' to aid with forward/back propagation.
         self._toSynapses: list[Synapse] = list()
         self._fromSynapses: list[Synapse] = list()
 
         # Setting up neuron values:
+        # inputSum accumulates the inputs given to the neuron during a pass, it is consumed (moved to inputValue and zeroed) when the neuron
+        # passes forwards, so no reset is needed before the next pass.
+        self._inputSum: float = float()
+
         # inputValue holds the value input to the neuron
         self._inputValue: float = float()
 
@@ -323,7 +761,8 @@ class Neuron:
         return activations[activation]
 
     def resetvalues(self) -> None:
-        """resetvalues sets the values dependent on forward and back propagation to zero, ready for the next training cycle."""
+        """resetvalues sets the values dependent on forward and back propagation to zero."""
+        self._inputSum = 0
         self._inputValue = 0
         self._activationValue = 0
         self._activationDerivative = 0
@@ -339,7 +778,7 @@ class Neuron:
 
     def giveinput(self, value: int) -> None:
         """giveinput adds an input to the neuron (used by synapses feeding forwards a value)."""
-        self._inputValue += value
+        self._inputSum += value
 
     def givederivative(self, derivative: float) -> None:
         """givederivative adds a given derivative to the neuron, and is used by backpropagating synapses."""
@@ -348,12 +787,24 @@ class Neuron:
     def passforwards(self) -> None:
         """passforwards creates the activation value and derivative. Storing the latter and sending the former to all synapses the neuron feeds
         into."""
+        # Consuming the inputs given during this pass, and clearing the derivative that the coming backpropagation adds to.
+        self._inputValue, self._inputSum = self._inputSum, 0
+        self._backpropDerivative = 0
+
         self._activationValue, self._activationDerivative = self._activationFunction(self._inputValue, self._activationConstant)
 
         # Iterating through each connected synapse in order to pass the value onwards.
         for synapse in self._toSynapses:
             synapse.passforwards(self._activationValue)
 
+    def infer(self) -> None:
+        """infer calculates only the activation value of the neuron (no derivative), and sends it to all synapses the neuron feeds into
+        without them storing any values. Used for inference."""
+        self._inputValue, self._inputSum = self._inputSum, 0
+        activationvalue = self._inferenceFunction(self._inputValue, self._activationConstant)
+        for synapse in self._toSynapses:
+            synapse.infer(activationvalue)
+
     def passbackwards(self) -> None:
         """passbackwards backpropagates the derivative of the neuron, multiplied by the derivative passed to it."""
 
@@ -407,6 +858,8 @@ class Neuron:
 
 class Input(Neuron):
     """Input is used to hold the attributes and methods for an input neuron."""
+    __slots__ = ("_name",)
+
     def __init__(self, name: str, position: (int,int), activationtype: str, activationconstant: float = 0) -> None:
         # Initialising the Neuron class to inherit it's attributes and methods.
         # Note: some attributes (such as fromSynapse) are not used due to the nature of Input Neurons.
@@ -430,6 +883,8 @@ class Input(Neuron):
 
 class Output(Neuron):
     """Output contains all attributes and methods required by an output neuron."""
+    __slots__ = ("_name", "_labelValue")
+
     def __init__(self, name: str, position: (int,int), activationtype: str, activationconstant: float = 0) -> None:
 
         # Initialising the Neuron class to inherit it's attributes and methods.
@@ -460,6 +915,9 @@ class Output(Neuron):
 
     def passforwards(self) -> None:
         """passforwards is overridden from the Neuron class, it checks for a label value, if present it calculates the loss and loss derivative."""
+        # Consuming the inputs given during this pass.
+        self._inputValue, self._inputSum = self._inputSum, 0
+
         # Checking a label value is present to calculate loss from.
         if not self._labelValue is None:
             # Calculating loss and loss derivative.
@@ -467,6 +925,13 @@ class Output(Neuron):
 
             # Setting up the derivative to be backpropagated.
             self._backpropDerivative = self._activationDerivative
+        else:
+            # Without a label there is no loss, or derivative to backpropagate.
+            self._activationValue = self._activationDerivative = self._backpropDerivative = 0
+
+    def infer(self) -> None:
+        """infer is overridden from the Neuron class, for inference an output only takes its input (no loss is calculated)."""
+        self._inputValue, self._inputSum = self._inputSum, 0
 
     def passbackwards(self) -> None:
         """passbackwards is overridden from the Neuron class and sends the derivative of the neuron to each synapse feeding into it."""
@@ -485,14 +950,981 @@ class Output(Neuron):
         """gettype is overridden from the Neuron class, it returns the type of object, in this case 'Output'."""
         return 'Output'
 
+
+class CheckpointWriter:
+    """CheckpointWriter writes checkpoint files atomically on a background thread, so training continues while the file is written. The
+    contents are written to a temporary file beside the checkpoint, which then replaces it, so an interrupted write leaves the previous
+    checkpoint intact. Only one write is in flight at a time, a write started while another is running waits for it first."""
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread = None
+        self._error: BaseException = None
+
+    def write(self, path: str, contents: bytes) -> None:
+        """write starts writing the contents to the path in the background."""
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(path, contents))
+        self._thread.start()
+
+    def wait(self) -> None:
+        """wait blocks until the write in flight (if any) has finished, raising any error it met."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self, path: str, contents: bytes) -> None:
+        try:
+            temporarypath = path + ".tmp"
+            with open(temporarypath, "wb") as file:
+                file.write(contents)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporarypath, path)
+        except BaseException as error:
+            self._error = error
+
+
+class TrainingRecord:
+    """TrainingRecord is a sink for the cycles of Network.train, passed as its record argument in place of True (which keeps the original
+    list of every cycle). It keeps running statistics of the loss at each output, the mean and an exponential moving average (EMA) with
+    the decay given, in constant memory. Subclasses also store the cycles themselves."""
+
+    def __init__(self, emadecay: float = 0.99) -> None:
+        self._emaDecay: float = emadecay
+        self._cycles: int = 0
+        self._lossSums: dict = dict()
+        self._lossCounts: dict = dict()
+        self._emaLoss: dict = dict()
+
+    def add(self, cycle: int, dataindex: int, features: dict, labels: dict, predicted: dict, loss: dict) -> None:
+        """add records a training cycle."""
+        self._cycles += 1
+        for labelname, value in loss.items():
+            if labelname in self._lossSums:
+                self._lossSums[labelname] += value
+                self._lossCounts[labelname] += 1
+                self._emaLoss[labelname] = self._emaDecay * self._emaLoss[labelname] + (1 - self._emaDecay) * value
+            else:
+                self._lossSums[labelname] = value
+                self._lossCounts[labelname] = 1
+                self._emaLoss[labelname] = value
+
+    def addrows(self, firstcycle: int, predicted: dict, loss: dict) -> None:
+        """addrows records consecutive cycles at once, from columns {label name : sequence of values} of the predicted value and loss of
+        each label. The data index of each cycle is its cycle number (used for evaluations, where each row is used once in order)."""
+        for labelname, values in loss.items():
+            if not len(values):
+                continue
+            if labelname not in self._lossSums:
+                self._lossSums[labelname] = 0.0
+                self._lossCounts[labelname] = 0
+                self._emaLoss[labelname] = values[0]
+            self._lossSums[labelname] += sum(values)
+            self._lossCounts[labelname] += len(values)
+            ema = self._emaLoss[labelname]
+            for value in values:
+                ema = self._emaDecay * ema + (1 - self._emaDecay) * value
+            self._emaLoss[labelname] = ema
+        self._cycles += len(next(iter(loss.values()), ()))
+
+    def flush(self) -> None:
+        """flush is called as training finishes, so that any stored cycles still buffered are written."""
+
+    def getcycles(self) -> int:
+        """getcycles returns the number of cycles recorded."""
+        return self._cycles
+
+    def getmeanloss(self) -> dict:
+        """getmeanloss returns the mean loss of each label over the cycles recorded with that label."""
+        return {labelname: total / self._lossCounts[labelname] for labelname, total in self._lossSums.items()}
+
+    def getemaloss(self) -> dict:
+        """getemaloss returns the exponential moving average of the loss of each label."""
+        return dict(self._emaLoss)
+
+
+class RingRecord(TrainingRecord):
+    """RingRecord keeps the last size cycles (in the same form as the list Network.train returns when record is True), older cycles are
+    dropped as new ones are added."""
+
+    def __init__(self, size: int, emadecay: float = 0.99) -> None:
+        TrainingRecord.__init__(self, emadecay)
+        self._ring: deque = deque(maxlen=size)
+
+    def add(self, cycle: int, dataindex: int, features: dict, labels: dict, predicted: dict, loss: dict) -> None:
+        TrainingRecord.add(self, cycle, dataindex, features, labels, predicted, loss)
+        self._ring.append({"cycle": cycle, "features": features, "labels": labels, "predicted": predicted, "loss": loss})
+
+    def getrecord(self) -> list[dict]:
+        """getrecord returns the cycles held, oldest first."""
+        return list(self._ring)
+
+
+class FileRecord(TrainingRecord):
+    """FileRecord appends the cycles to a columnar file: a JSON header line naming the columns, followed by blocks of blocksize cycles,
+    each a little-endian uint64 row count and then every column as contiguous float64 values. The columns are the cycle, the index of the
+    row of the dataset used (the features and labels themselves are not copied) and the predicted value and loss of each label. Only one
+    block is held in memory, and recording into an existing file appends to it (as when resuming training)."""
+
+    def __init__(self, path: str, blocksize: int = 4096, emadecay: float = 0.99) -> None:
+        TrainingRecord.__init__(self, emadecay)
+        self._path: str = path
+        self._blockSize: int = blocksize
+        self._columns: list[str] = None
+        self._block: list[array] = None
+
+    def add(self, cycle: int, dataindex: int, features: dict, labels: dict, predicted: dict, loss: dict) -> None:
+        TrainingRecord.add(self, cycle, dataindex, features, labels, predicted, loss)
+
+        # Setting up the columns from the labels of the first cycle.
+        if self._columns is None:
+            self._columns = (["cycle", "dataindex"] + ["predicted:" + labelname for labelname in predicted] +
+                             ["loss:" + labelname for labelname in loss])
+            self._block = [array("d") for _ in self._columns]
+
+        row = [cycle, dataindex, *predicted.values(), *loss.values()]
+        for column, value in zip(self._block, row):
+            column.append(value)
+
+        if len(self._block[0]) >= self._blockSize:
+            self.flush()
+
+    def addrows(self, firstcycle: int, predicted: dict, loss: dict) -> None:
+        TrainingRecord.addrows(self, firstcycle, predicted, loss)
+        rows = len(next(iter(loss.values()), ()))
+        if self._columns is None:
+            self._columns = (["cycle", "dataindex"] + ["predicted:" + labelname for labelname in predicted] +
+                             ["loss:" + labelname for labelname in loss])
+            self._block = [array("d") for _ in self._columns]
+
+        self._block[0].extend(range(firstcycle, firstcycle + rows))
+        self._block[1].extend(range(firstcycle, firstcycle + rows))
+        for column, values in zip(self._block[2:], [*predicted.values(), *loss.values()]):
+            column.extend(values)
+
+        if len(self._block[0]) >= self._blockSize:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._block is None or not self._block[0]:
+            return
+
+        with open(self._path, "ab") as file:
+            # Writing the header if the file is new.
+            if file.tell() == 0:
+                file.write(json.dumps({"columns": self._columns}).encode() + b"\n")
+
+            file.write(struct.pack("<Q", len(self._block[0])))
+            for column in self._block:
+                if sys.byteorder == "big":
+                    column.byteswap()
+                file.write(column.tobytes())
+
+        self._block = [array("d") for _ in self._columns]
+
+    @staticmethod
+    def read(path: str) -> dict:
+        """read returns the columns of a record file as {column name : array of values}."""
+        with open(path, "rb") as file:
+            columns = json.loads(file.readline())["columns"]
+            values = {name: array("d") for name in columns}
+            while header := file.read(8):
+                rows = struct.unpack("<Q", header)[0]
+                for name in columns:
+                    values[name].frombytes(file.read(8 * rows))
+        if sys.byteorder == "big":
+            for column in values.values():
+                column.byteswap()
+        return values
+
+
+class TrainingMonitor:
+    """TrainingMonitor samples the state of a network during Network.train (passed as its display argument in place of True, which prints
+    the whole network every cycle). Every given number of cycles and/or seconds it summarises each layer, the norm of the weights and of
+    the last gradient of the synapses feeding it and the mean, standard deviation, minimum and maximum of its neurons' values (the
+    predictions for outputs), and sends the summary to each of its sinks. Between samples a cycle costs only the check of whether a sample
+    is due, and the time spent sampling is measured and reported in each summary."""
+
+    def __init__(self, sinks: list, cycles: int = None, seconds: float = None) -> None:
+        # Sampling once a second if no interval is given.
+        if cycles is None and seconds is None:
+            seconds = 1.0
+
+        self._sinks: list = sinks
+        self._cycles: int = cycles
+        self._seconds: float = seconds
+        self._started: float = time.monotonic()
+        self._lastSample: float = self._started
+        self._samples: int = 0
+        self._overhead: float = 0.0
+
+    def due(self, cycle: int) -> bool:
+        """due returns whether a sample should be taken after the given cycle."""
+        return ((self._cycles is not None and cycle % self._cycles == 0) or
+                (self._seconds is not None and time.monotonic() - self._lastSample >= self._seconds))
+
+    def sample(self, network: "Network", cycle: int) -> dict:
+        """sample summarises the network after the given cycle, sends the summary to the sinks and returns it."""
+        started = time.perf_counter()
+        buffers = network._getbuffers()
+        kinds, inputvalues, activationvalues = buffers["kinds"], buffers["inputvalues"], buffers["activationvalues"]
+        derivatives = buffers["backpropderivatives"]
+
+        # Finding the layer of each neuron (neurons are held in layer order).
+        layerof = list()
+        for layer, neurons in enumerate(network._neurons):
+            layerof.extend([layer] * len(neurons))
+        layercount = len(network._neurons)
+
+        # Summing the squares of the weights and gradients (of weights and biases) of the synapses feeding each layer.
+        weightsquares = [0.0] * layercount
+        gradientsquares = [0.0] * layercount
+        for start, end, weight, biasenabled in zip(buffers["edgestarts"], buffers["edgeends"], buffers["weights"], buffers["biasenabled"]):
+            layer = layerof[end]
+            weightsquares[layer] += weight * weight
+            gradient = activationvalues[start] * derivatives[end]
+            gradientsquares[layer] += gradient * gradient
+            if biasenabled:
+                gradientsquares[layer] += derivatives[end] * derivatives[end]
+
+        # Summarising the values of the neurons in each layer.
+        layers = list()
+        first = 0
+        for layer, neurons in enumerate(network._neurons):
+            values = [inputvalues[index] if kinds[index] == CompiledNetwork.OUTPUT else activationvalues[index]
+                      for index in range(first, first + len(neurons))]
+            first += len(neurons)
+            mean = sum(values) / len(values)
+            layers.append({"layer": layer, "weightnorm": sqrt(weightsquares[layer]), "gradientnorm": sqrt(gradientsquares[layer]),
+                           "mean": mean, "std": sqrt(sum((value - mean) ** 2 for value in values) / len(values)),
+                           "min": min(values), "max": max(values)})
+
+        self._samples += 1
+        self._overhead += time.perf_counter() - started
+        self._lastSample = time.monotonic()
+        summary = {"cycle": cycle, "seconds": self._lastSample - self._started, "loss": network._getloss(), "layers": layers,
+                   "monitorseconds": self._overhead}
+        for sink in self._sinks:
+            sink.emit(summary)
+        return summary
+
+    def getoverhead(self) -> dict:
+        """getoverhead returns the number of samples taken and the total time spent taking them."""
+        return {"samples": self._samples, "seconds": self._overhead}
+
+
+class ConsoleSink:
+    """ConsoleSink prints each summary of a TrainingMonitor as a single line, the loss of each label and the weight norm, gradient norm and
+    mean value of each layer."""
+
+    def emit(self, summary: dict) -> None:
+        loss = " ".join(labelname + "=" + format(value, ".4g") for labelname, value in summary["loss"].items())
+        layers = " | ".join("L" + str(layer["layer"]) + " w=" + format(layer["weightnorm"], ".3g") + " g=" + format(layer["gradientnorm"], ".3g") +
+                            " a=" + format(layer["mean"], ".3g") for layer in summary["layers"])
+        print("Cycle: " + str(summary["cycle"]) + "  loss: " + loss + "  " + layers)
+
+
+class JSONLinesSink:
+    """JSONLinesSink appends each summary of a TrainingMonitor to a file as a line of JSON."""
+
+    def __init__(self, path: str) -> None:
+        self._path: str = path
+
+    def emit(self, summary: dict) -> None:
+        with open(self._path, "a") as file:
+            file.write(json.dumps(summary) + "\n")
+
+
+class ProfileStats:
+    """ProfileStats gathers the timings of a network's training phases while profiling is enabled (see Network.profile): the number of
+    calls and total wall-time of each phase, and with detail the time spent in each layer and each activation type during the forward and
+    backward passes."""
+
+    def __init__(self) -> None:
+        self._phases: dict = dict()
+        self._layers: dict = dict()
+        self._activations: dict = dict()
+
+    def wrap(self, phase: str, function) -> "function":
+        """wrap returns the function timed as the given phase."""
+        timing = self._phases.setdefault(phase, [0, 0.0])
+
+        def timed(*arguments):
+            started = time.perf_counter()
+            result = function(*arguments)
+            timing[0] += 1
+            timing[1] += time.perf_counter() - started
+            return result
+
+        return timed
+
+    def addlayer(self, phase: str, layer: int, seconds: float) -> None:
+        """addlayer adds the time spent in a layer during a phase."""
+        timing = self._layers.setdefault((phase, layer), [0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+
+    def addactivation(self, phase: str, activation: str, seconds: float) -> None:
+        """addactivation adds the time spent in a neuron of the given activation type during a phase."""
+        timing = self._activations.setdefault((phase, activation), [0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+
+    def reset(self) -> None:
+        """reset clears every timing gathered so far."""
+        for timings in (self._phases, self._layers, self._activations):
+            for timing in timings.values():
+                timing[0], timing[1] = 0, 0.0
+
+    @staticmethod
+    def _summarise(calls: int, seconds: float) -> dict:
+        return {"calls": calls, "seconds": seconds, "mean": seconds / calls if calls else 0.0}
+
+    def getphases(self) -> dict:
+        """getphases returns {phase : {"calls", "seconds", "mean"}} for each phase profiled."""
+        return {phase: ProfileStats._summarise(*timing) for phase, timing in self._phases.items()}
+
+    def getlayers(self) -> dict:
+        """getlayers returns {phase : {layer : {"calls", "seconds", "mean"}}} for the layers timed with detail."""
+        layers = dict()
+        for (phase, layer), timing in self._layers.items():
+            layers.setdefault(phase, dict())[layer] = ProfileStats._summarise(*timing)
+        return layers
+
+    def getactivations(self) -> dict:
+        """getactivations returns {phase : {activation type : {"calls", "seconds", "mean"}}} for the neurons timed with detail."""
+        activations = dict()
+        for (phase, activation), timing in self._activations.items():
+            activations.setdefault(phase, dict())[activation] = ProfileStats._summarise(*timing)
+        return activations
+
+    def display(self) -> None:
+        """display prints the total time, calls and mean time of each phase, then of each layer and activation type if timed."""
+        print("*" * 74)
+        for title, timings in (("Phase", self.getphases()), *((phase + " layer", layers) for phase, layers in self.getlayers().items()),
+                               *((phase + " activation", activations) for phase, activations in self.getactivations().items())):
+            print(title.ljust(30) + "calls".rjust(12) + "seconds".rjust(16) + "mean".rjust(16))
+            for name, timing in timings.items():
+                print(("  " + str(name)).ljust(30) + str(timing["calls"]).rjust(12) + format(timing["seconds"], ".6f").rjust(16) +
+                      format(timing["mean"], ".3e").rjust(16))
+        print("*" * 74)
+
+
+class DesignFile:
+    """DesignFile reads and writes the sidecar data files of compact generated networks (see Data.generate), so the generated module is a
+    small class and the design is only read when the network is first created. A design file is JSON of the form:
+        {"version": 1, "layers": [[[kind, name, position, activation type, constant], ...], ...], "synapses": {synapse columns}}
+    with the kind "Neuron", "Input" or "Output", the name None for neurons, the constant None for the default, and the synapse columns those
+    taken by Synapse.fromcolumns. Designs are cached once read, each network created from them gets new neuron and synapse objects."""
+
+    VERSION: int = 1
+    _cache: dict = dict()
+
+    @staticmethod
+    def save(path: str, layers: list[list], synapses: dict) -> None:
+        """save writes a design file, from the neuron records of each layer and the synapse columns."""
+        with open(path, "w") as file:
+            json.dump({"version": DesignFile.VERSION, "layers": layers, "synapses": synapses}, file, separators=(",", ":"))
+
+    @staticmethod
+    def load(path: str, relativeto: str = None) -> (list[list[Neuron]], dict):
+        """load returns the neurons (in layers) and synapse columns of a design file, to pass to Network.__init__. A relative path is taken
+        from the directory of the relativeto file (the generated module's __file__) if given."""
+        if relativeto is not None:
+            path = os.path.join(os.path.dirname(os.path.abspath(relativeto)), path)
+
+        # Reading the design the first time it is used.
+        design = DesignFile._cache.get(path)
+        if design is None:
+            with open(path, "r") as file:
+                design = json.load(file)
+            if design.get("version") != DesignFile.VERSION:
+                raise ValueError("Unsupported design file version.")
+            DesignFile._cache[path] = design
+
+        constructors = {"Neuron": lambda name, *arguments: Neuron(*arguments), "Input": Input, "Output": Output}
+        layers = [[constructors[kind](name, tuple(position), activationtype, *([] if constant is None else [constant]))
+                   for kind, name, position, activationtype, constant in layer] for layer in design["layers"]]
+        return layers, design["synapses"]
+
+    @staticmethod
+    def clearcache() -> None:
+        """clearcache forgets every design read, so they are read again (such as after a design file is regenerated)."""
+        DesignFile._cache.clear()
+
+
+class DatasetRows:
+    """DatasetRows is a read-only view of the features or labels of a Dataset, usable in place of a list of dictionaries (such as the
+    featurelist and labellist of Network.train and test). Indexing a row builds its dictionary only when it is used, and slicing returns a
+    columnar dictionary of {name : column slice} without copying. The batched engines read the columns directly (see getcolumns)."""
+
+    def __init__(self, columns: dict, skipmissing: bool, dataset: "Dataset" = None) -> None:
+        self._columns: dict = columns
+        self._dataset: Dataset = dataset
+        self._names: list[str] = list(columns.keys())
+        self._buffers: list = list(columns.values())
+        self._skipMissing: bool = skipmissing
+        self._length: int = len(self._buffers[0]) if self._buffers else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return {name: column[index] for name, column in self._columns.items()}
+
+        # Missing labels (stored as NaN) are left out of the dictionary, so produce no loss.
+        if self._skipMissing:
+            return {name: value for name, value in zip(self._names, (column[index] for column in self._buffers)) if value == value}
+        return {name: column[index] for name, column in zip(self._names, self._buffers)}
+
+    def __iter__(self) -> "Generator[dict]":
+        for index in range(self._length):
+            yield self[index]
+
+    def __reduce__(self) -> tuple:
+        # Views are sent to other processes as their dataset (see Dataset.__reduce__).
+        if self._dataset is not None:
+            return (Dataset.getlabels if self._skipMissing else Dataset.getfeatures), (self._dataset,)
+        return DatasetRows, ({name: array("d", column) for name, column in self._columns.items()}, self._skipMissing)
+
+    def getcolumns(self) -> dict:
+        """getcolumns returns the columns as a dictionary of {input or output name : column}."""
+        return self._columns
+
+
+class Dataset:
+    """Dataset holds a dataset as contiguous float64 columns, read from CSV, JSON-lines or binary column files, so that a dictionary is
+    never built for every row up front. The features and labels arguments map each input or output name of the network to a column name,
+    either a dictionary of {input or output name : column name} or a list of names used as both. The mapping is resolved once, getfeatures
+    and getlabels then return DatasetRows views for Network.train, test, trainbatched, trainparallel, predictmany and evaluate.
+
+    Binary column files are a JSON header line {"columns": [column names], "rows": rows} padded to a multiple of 8 bytes, followed by each
+    column as contiguous little-endian float64 values. These are memory-mapped when opened, so datasets larger than memory are paged in
+    from disk as they are used, epoch after epoch. Missing features are read as 0 and missing labels as NaN (no loss)."""
+
+    def __init__(self, columns: dict, features, labels, path: str = None) -> None:
+        self._columns: dict = columns
+        self._path: str = path
+        self._featureNames: dict = Dataset._mapping(features)
+        self._labelNames: dict = Dataset._mapping(labels)
+        self._features: DatasetRows = DatasetRows({name: columns[column] for name, column in self._featureNames.items()}, False, self)
+        self._labels: DatasetRows = DatasetRows({name: columns[column] for name, column in self._labelNames.items()}, True, self)
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def __reduce__(self) -> tuple:
+        # Memory-mapped datasets are reopened from their file by other processes, others are copied.
+        if self._path is not None:
+            return Dataset.open, (self._path, self._featureNames, self._labelNames)
+        return Dataset, ({name: array("d", column) for name, column in self._columns.items()}, self._featureNames, self._labelNames)
+
+    @staticmethod
+    def _mapping(names) -> dict:
+        """mapping returns the {input or output name : column name} mapping from a dictionary, or from a list of names used as both."""
+        return dict(names) if isinstance(names, dict) else {name: name for name in names}
+
+    def getfeatures(self) -> DatasetRows:
+        """getfeatures returns the features, by input name."""
+        return self._features
+
+    def getlabels(self) -> DatasetRows:
+        """getlabels returns the labels, by output name."""
+        return self._labels
+
+    def getcolumn(self, name: str):
+        """getcolumn returns a column of the dataset by its column name."""
+        return self._columns[name]
+
+    def save(self, path: str) -> None:
+        """save writes the columns used as features or labels to a binary column file."""
+        names = list(dict.fromkeys([*self._featureNames.values(), *self._labelNames.values()]))
+        Dataset._writecolumns(path, names, len(self), [[self._columns[name] for name in names]])
+
+    @staticmethod
+    def _writecolumns(path: str, names: list[str], rows: int, chunks) -> None:
+        """writecolumns writes a binary column file of the given rows, from chunks (each a list of a slice of every column), writing each
+        chunk into place so only one is held in memory."""
+        header = json.dumps({"columns": names, "rows": rows}).encode()
+        header += b" " * (-(len(header) + 1) % 8) + b"\n"
+        with open(path, "wb") as file:
+            file.write(header)
+            file.truncate(len(header) + 8 * rows * len(names))
+            first = 0
+            for chunk in chunks:
+                for columnindex, values in enumerate(chunk):
+                    values = array("d", values)
+                    if sys.byteorder == "big":
+                        values.byteswap()
+                    file.seek(len(header) + 8 * (rows * columnindex + first))
+                    file.write(values.tobytes())
+                first += len(chunk[0]) if chunk else 0
+
+    @staticmethod
+    def open(path: str, features, labels, memorymap: bool = True) -> "Dataset":
+        """open reads a binary column file, memory-mapping it unless memorymap is False (in which case it is read into memory)."""
+        with open(path, "rb") as file:
+            header = file.readline()
+            description = json.loads(header)
+            names, rows = description["columns"], description["rows"]
+
+            # Memory-mapping the file and casting a view of each column (mapped files can only be used as is on little-endian machines).
+            if memorymap and sys.byteorder == "little" and rows:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                view = memoryview(mapped)
+                columns = {name: view[len(header) + 8 * rows * index:len(header) + 8 * rows * (index + 1)].cast("d")
+                           for index, name in enumerate(names)}
+                return Dataset(columns, features, labels, path)
+
+            columns = dict()
+            for name in names:
+                columns[name] = array("d")
+                columns[name].fromfile(file, rows)
+                if sys.byteorder == "big":
+                    columns[name].byteswap()
+        return Dataset(columns, features, labels)
+
+    @staticmethod
+    def fromcsv(path: str, features, labels, cachepath: str = None, chunksize: int = 65536) -> "Dataset":
+        """fromcsv reads a CSV file with a header row of column names, parsing only the columns used chunksize rows at a time. If cachepath
+        is given the columns are written to a binary column file there (without holding the dataset in memory) and it is opened, so later
+        runs can open the cache directly."""
+        featurenames, labelnames = Dataset._mapping(features), Dataset._mapping(labels)
+        names = list(dict.fromkeys([*featurenames.values(), *labelnames.values()]))
+        defaults = [float("nan") if name in labelnames.values() else 0.0 for name in names]
+
+        def chunks(file) -> "Generator[list]":
+            reader = csv.reader(file)
+            header = next(reader)
+            indexes = [header.index(name) for name in names]
+            for rows in iter(lambda: list(islice(reader, chunksize)), []):
+                yield [array("d", [float(row[index]) if row[index] else default for row in rows])
+                       for index, default in zip(indexes, defaults)]
+
+        def count(file) -> int:
+            return sum(1 for _ in csv.reader(file)) - 1
+
+        return Dataset._read(path, names, featurenames, labelnames, chunks, count, cachepath)
+
+    @staticmethod
+    def fromjsonlines(path: str, features, labels, cachepath: str = None, chunksize: int = 65536) -> "Dataset":
+        """fromjsonlines reads a JSON-lines file of one object {column name : value} per row, chunksize rows at a time. If cachepath is
+        given the columns are written to a binary column file there (without holding the dataset in memory) and it is opened."""
+        featurenames, labelnames = Dataset._mapping(features), Dataset._mapping(labels)
+        names = list(dict.fromkeys([*featurenames.values(), *labelnames.values()]))
+        defaults = [float("nan") if name in labelnames.values() else 0.0 for name in names]
+
+        def chunks(file) -> "Generator[list]":
+            rows = (json.loads(line) for line in file if line.strip())
+            for chunk in iter(lambda: list(islice(rows, chunksize)), []):
+                yield [array("d", [row.get(name, default) for row in chunk]) for name, default in zip(names, defaults)]
+
+        def count(file) -> int:
+            return sum(1 for line in file if line.strip())
+
+        return Dataset._read(path, names, featurenames, labelnames, chunks, count, cachepath)
+
+    @staticmethod
+    def _read(path: str, names: list[str], featurenames: dict, labelnames: dict, chunks, count, cachepath: str) -> "Dataset":
+        """read builds a dataset from the chunks of columns read from a text file, in memory or through a binary column file cache (count
+        returns the number of rows in the file)."""
+        with open(path, "r", newline="") as file:
+            if cachepath is None:
+                columns = {name: array("d") for name in names}
+                for chunk in chunks(file):
+                    for name, values in zip(names, chunk):
+                        columns[name].extend(values)
+                return Dataset(columns, featurenames, labelnames)
+
+            # Counting the rows first, so each chunk can be written into place in the cache.
+            rows = count(file)
+            file.seek(0)
+            Dataset._writecolumns(cachepath, names, rows, chunks(file))
+        return Dataset.open(cachepath, featurenames, labelnames)
+
+
+class Prefetcher:
+    """Prefetcher runs a producer (a function returning an iterable, called with the arguments given) on a background thread, or in a
+    background process if process is True, holding up to depth blocks of blocksize of the items it produces in a bounded queue. Iterating
+    over the prefetcher yields the items in order, so the work of producing them (such as reading and building samples) overlaps with the
+    work done with them. Errors raised by the producer are raised again where the items are used. In a process the producer and its
+    arguments must be picklable, and the items are copied between the processes. A thread's stop event can be given, for producers that
+    wait on something other than the queue (such as a free buffer) to also watch, as it is set when the prefetcher is closed."""
+
+    def __init__(self, producer, arguments: tuple = (), depth: int = 2, blocksize: int = 1, process: bool = False,
+                 stop: threading.Event = None) -> None:
+        if process:
+            self._stop = Event()
+            self._queue = Queue(depth)
+            self._worker = Process(target=Prefetcher._produce, args=(self._queue, self._stop, producer, arguments, blocksize), daemon=True)
+        else:
+            self._stop = threading.Event() if stop is None else stop
+            self._queue = queue.Queue(depth)
+            self._worker = threading.Thread(target=Prefetcher._produce, args=(self._queue, self._stop, producer, arguments, blocksize),
+                                            daemon=True)
+        self._worker.start()
+
+    def __iter__(self) -> "Generator":
+        try:
+            while True:
+                more, block = self._queue.get()
+                if not more:
+                    if block is not None:
+                        raise block
+                    return
+                yield from block
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """close stops the producer (if it has not finished), and waits for the thread or process to end."""
+        self._stop.set()
+
+        # Emptying the queue while waiting, so a producer blocked adding to it can stop.
+        while self._worker.is_alive():
+            try:
+                self._queue.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        self._worker.join()
+
+    @staticmethod
+    def _produce(items, stop, producer, arguments: tuple, blocksize: int) -> None:
+        """produce runs on the background thread or process, adding (True, block) to the queue for each block of items produced, then
+        (False, None) once finished, or (False, error) if the producer raises an error."""
+
+        def put(item: tuple) -> bool:
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            iterator = iter(producer(*arguments))
+            for block in iter(lambda: list(islice(iterator, blocksize)), []):
+                if not put((True, block)):
+                    return
+        except Exception as error:
+            put((False, error))
+            return
+        put((False, None))
+
+
+class Sampler:
+    """Sampler gives the order the samples of a dataset of the given size are used in, an epoch at a time. The base sampler uses every
+    sample in turn (the order Network.train has always used), subclasses shuffle, stratify or weight the samples. Each epoch's order is
+    written into one index buffer reused every epoch, and depends only on the sampler's seed and the epoch number, so training resumed
+    from a checkpoint continues with the same order. With NumPy orders are drawn by a NumPy generator, so differ from those without it."""
+
+    def __init__(self, size: int, epochsize: int = None) -> None:
+        self._size: int = size
+        self._epochSize: int = size if epochsize is None else epochsize
+        self._buffer: array = array("q", bytes(8 * self._epochSize))
+        self._epoch: int = None
+
+    def getsize(self) -> int:
+        """getsize returns the number of samples in the dataset."""
+        return self._size
+
+    def getepochsize(self) -> int:
+        """getepochsize returns the number of samples used each epoch."""
+        return self._epochSize
+
+    def getepoch(self, epoch: int) -> array:
+        """getepoch returns the index buffer holding the order of the given epoch, which is overwritten when another epoch is requested."""
+        if epoch != self._epoch:
+            self._fill(epoch)
+            self._epoch = epoch
+        return self._buffer
+
+    def indexes(self, first: int, last: int) -> "Generator[int]":
+        """indexes yields the sample index used at each position (such as a training cycle) from first up to last, across epochs."""
+        position = first
+        while position < last:
+            epoch, offset = divmod(position, self._epochSize)
+            order = self.getepoch(epoch)
+            end = min(self._epochSize, offset + last - position)
+            yield from order[offset:end]
+            position += end - offset
+
+    def _fill(self, epoch: int) -> None:
+        """fill writes the order of an epoch into the index buffer (the same every epoch for the base sampler, so written once)."""
+        if self._epoch is None:
+            for position in range(self._epochSize):
+                self._buffer[position] = position % self._size
+
+    def _generator(self, seed, epoch: int):
+        """generator returns the random number generator for an epoch (a NumPy generator if NumPy is available), from the seed given."""
+        if numpy is not None:
+            return numpy.random.default_rng(None if seed is None else [seed, epoch])
+        return Random(None if seed is None else "{}:{}".format(seed, epoch))
+
+    def _view(self) -> "numpy.ndarray":
+        """view returns a NumPy array sharing the index buffer's memory."""
+        return numpy.frombuffer(self._buffer, dtype=numpy.int64)
+
+
+class ShuffleSampler(Sampler):
+    """ShuffleSampler uses every sample once each epoch, in a new random order every epoch."""
+
+    def __init__(self, size: int, seed: int = None) -> None:
+        Sampler.__init__(self, size)
+        self._seed: int = seed
+
+    def _fill(self, epoch: int) -> None:
+        generator = self._generator(self._seed, epoch)
+        if numpy is not None:
+            order = self._view()
+            order[:] = numpy.arange(self._size)
+            generator.shuffle(order)
+        else:
+            self._buffer[:] = array("q", range(self._size))
+            generator.shuffle(self._buffer)
+
+
+class StratifiedSampler(ShuffleSampler):
+    """StratifiedSampler uses every sample once each epoch in a random order, spreading the samples of each stratum (given by a key for
+    every sample, such as its class label) evenly through the epoch, so that any stretch of the epoch (such as a batch) holds each stratum
+    in close to its proportion of the dataset."""
+
+    def __init__(self, strata: list, seed: int = None) -> None:
+        ShuffleSampler.__init__(self, len(strata), seed)
+
+        # Grouping the sample indexes by stratum, in order of each stratum's first appearance.
+        groups = dict()
+        for index, stratum in enumerate(strata):
+            groups.setdefault(stratum, array("q")).append(index)
+        self._strata: list[array] = list(groups.values())
+        self._keys = numpy.empty(self._size) if numpy is not None else [0.0] * self._size
+
+    def _fill(self, epoch: int) -> None:
+        # Each stratum's samples are shuffled and given evenly spaced keys (with a random offset) over the epoch, then ordered by key.
+        generator = self._generator(self._seed, epoch)
+        keys = self._keys
+        if numpy is not None:
+            for group in self._strata:
+                members = numpy.frombuffer(group, dtype=numpy.int64)
+                keys[generator.permutation(members)] = (numpy.arange(len(members)) + generator.random()) / len(members)
+            self._view()[:] = numpy.argsort(keys, kind="stable")
+        else:
+            for group in self._strata:
+                members = list(group)
+                generator.shuffle(members)
+                offset = generator.random()
+                for position, index in enumerate(members):
+                    keys[index] = (position + offset) / len(members)
+            self._buffer[:] = array("q", sorted(range(self._size), key=keys.__getitem__))
+
+
+class WeightedSampler(Sampler):
+    """WeightedSampler draws epochsize samples (the size of the dataset by default) each epoch with replacement, each sample being drawn
+    with probability proportional to its weight, such as to oversample rare cases."""
+
+    def __init__(self, weights: list[float], seed: int = None, epochsize: int = None) -> None:
+        Sampler.__init__(self, len(weights), epochsize)
+        self._seed: int = seed
+
+        # Storing the cumulative weights, each draw is found by searching them for a uniform value up to the total weight.
+        self._cumulative: array = array("d")
+        total = 0.0
+        for weight in weights:
+            if weight < 0:
+                raise ValueError("Sample weights cannot be negative.")
+            total += weight
+            self._cumulative.append(total)
+        if total <= 0:
+            raise ValueError("At least one sample weight must be positive.")
+
+    def _fill(self, epoch: int) -> None:
+        generator = self._generator(self._seed, epoch)
+        if numpy is not None:
+            cumulative = numpy.frombuffer(self._cumulative)
+            numpy.minimum(numpy.searchsorted(cumulative, generator.random(self._epochSize) * cumulative[-1], side="right"), self._size - 1,
+                          out=self._view())
+        else:
+            self._buffer[:] = array("q", generator.choices(range(self._size), cum_weights=self._cumulative, k=self._epochSize))
+
+
+class Optimiser:
+    """Optimiser adjusts the weights and biases of a network by their loss gradients, and is passed to Network (or a generated network)
+    as its optimiser. The base optimiser is plain stochastic gradient descent (SGD), its subclasses keep state for every weight and bias
+    (such as a momentum) in contiguous arrays, the weights' followed by the biases', allocated at the first step. The state is always
+    held in the order of the network's synapse list, engines holding the weights in another order (the compiled engine's edge order)
+    pass that order to step, so the state carries over between engines and checkpoints. With NumPy the state is held in NumPy arrays
+    and updated with vectorised operations. Networks without an optimiser adjust their weights by SGD as they backpropagate."""
+
+    # The number of state arrays the optimiser keeps.
+    STATES: int = 0
+
+    def __init__(self) -> None:
+        self._state: list = None
+        self._size: int = 0
+        self._steps: int = 0
+
+    def reset(self) -> None:
+        """reset discards the optimiser's state, it is allocated again at the next step."""
+        self._state = None
+        self._size = 0
+        self._steps = 0
+
+    def getsteps(self) -> int:
+        """getsteps returns the number of steps taken since the state was last reset."""
+        return self._steps
+
+    def getstate(self) -> dict:
+        """getstate returns the state of the optimiser as {"steps", "state"}, with a list of values for each state array (used for
+        checkpoints)."""
+        return {"steps": self._steps, "state": None if self._state is None else [list(values) for values in self._state]}
+
+    def setstate(self, state: dict) -> None:
+        """setstate restores a state returned by getstate."""
+        self.reset()
+        if state["state"] is not None:
+            self._state = [numpy.array(values, dtype=float) if numpy is not None else array("d", values) for values in state["state"]]
+            self._size = len(state["state"][0]) // 2 if state["state"] else 0
+            self._steps = state["steps"]
+
+    def step(self, weights, biases, weightgradients, biasgradients, learningrate: float, order: list[int] = None) -> None:
+        """step adjusts the weights and biases (lists or NumPy arrays, changed in place) by their gradients (zero for biases that are not
+        enabled). If the parameters are not in synapse-list order, order gives the synapse-list index of each."""
+        size = len(weights)
+        if self._state is None or self._size != size:
+            self._size = size
+            self._steps = 0
+            self._state = [numpy.zeros(2 * size) if numpy is not None else array("d", bytes(16 * size)) for _ in range(self.STATES)]
+        self._steps += 1
+
+        if numpy is not None:
+            indexes = numpy.arange(size) if order is None else numpy.asarray(order, dtype=numpy.intp)
+        for parameters, gradients, first in ((weights, weightgradients, 0), (biases, biasgradients, size)):
+            if numpy is not None:
+                # Gathering the state into the parameters' order, and scattering it back once updated.
+                values = parameters if isinstance(parameters, numpy.ndarray) else numpy.array(parameters, dtype=float)
+                states = [state[first + indexes] for state in self._state]
+                values -= self._direction(numpy.asarray(gradients, dtype=float), states, learningrate)
+                for state, updated in zip(self._state, states):
+                    state[first + indexes] = updated
+                if not isinstance(parameters, numpy.ndarray):
+                    parameters[:] = values.tolist()
+            else:
+                for index in range(size):
+                    parameters[index] -= self._scalardirection(gradients[index], first + (index if order is None else order[index]),
+                                                               learningrate)
+
+    def _direction(self, gradients: "numpy.ndarray", states: list, learningrate: float) -> "numpy.ndarray":
+        """direction updates the state views given and returns the change to subtract from the parameters (NumPy)."""
+        return gradients * learningrate
+
+    def _scalardirection(self, gradient: float, index: int, learningrate: float) -> float:
+        """scalardirection updates the state of one parameter and returns the change to subtract from it (without NumPy)."""
+        return gradient * learningrate
+
+
+class MomentumOptimiser(Optimiser):
+    """MomentumOptimiser is SGD with momentum, the weights and biases move by a velocity that accumulates past gradients:
+        v = momentum * v + g,   p -= learningrate * v"""
+    STATES: int = 1
+
+    def __init__(self, momentum: float = 0.9) -> None:
+        Optimiser.__init__(self)
+        self._momentum: float = momentum
+
+    def _direction(self, gradients: "numpy.ndarray", states: list, learningrate: float) -> "numpy.ndarray":
+        velocity, = states
+        velocity *= self._momentum
+        velocity += gradients
+        return velocity * learningrate
+
+    def _scalardirection(self, gradient: float, index: int, learningrate: float) -> float:
+        velocity = self._state[0]
+        velocity[index] = self._momentum * velocity[index] + gradient
+        return velocity[index] * learningrate
+
+
+class NesterovOptimiser(MomentumOptimiser):
+    """NesterovOptimiser is SGD with Nesterov momentum, which steps by the gradient plus the velocity it is about to move by:
+        v = momentum * v + g,   p -= learningrate * (g + momentum * v)"""
+
+    def _direction(self, gradients: "numpy.ndarray", states: list, learningrate: float) -> "numpy.ndarray":
+        velocity = MomentumOptimiser._direction(self, gradients, states, 1.0)
+        return (gradients + self._momentum * velocity) * learningrate
+
+    def _scalardirection(self, gradient: float, index: int, learningrate: float) -> float:
+        velocity = MomentumOptimiser._scalardirection(self, gradient, index, 1.0)
+        return (gradient + self._momentum * velocity) * learningrate
+
+
+class RMSPropOptimiser(Optimiser):
+    """RMSPropOptimiser divides each gradient by a moving average of its recent magnitude, so every weight and bias steps at a similar rate:
+        s = decay * s + (1 - decay) * g^2,   p -= learningrate * g / (sqrt(s) + epsilon)"""
+    STATES: int = 1
+
+    def __init__(self, decay: float = 0.9, epsilon: float = 1e-8) -> None:
+        Optimiser.__init__(self)
+        self._decay: float = decay
+        self._epsilon: float = epsilon
+
+    def _direction(self, gradients: "numpy.ndarray", states: list, learningrate: float) -> "numpy.ndarray":
+        squares, = states
+        squares *= self._decay
+        squares += (1 - self._decay) * gradients * gradients
+        return learningrate * gradients / (numpy.sqrt(squares) + self._epsilon)
+
+    def _scalardirection(self, gradient: float, index: int, learningrate: float) -> float:
+        squares = self._state[0]
+        squares[index] = self._decay * squares[index] + (1 - self._decay) * gradient * gradient
+        return learningrate * gradient / (sqrt(squares[index]) + self._epsilon)
+
+
+class AdamOptimiser(Optimiser):
+    """AdamOptimiser keeps moving averages of each gradient and its square, corrected for their bias towards zero over the first steps:
+        m = beta1 * m + (1 - beta1) * g,   v = beta2 * v + (1 - beta2) * g^2,
+        p -= learningrate * (m / (1 - beta1^t)) / (sqrt(v / (1 - beta2^t)) + epsilon)"""
+    STATES: int = 2
+
+    def __init__(self, beta1: float = 0.9, beta2: float = 0.999, epsilon: float = 1e-8) -> None:
+        Optimiser.__init__(self)
+        self._beta1: float = beta1
+        self._beta2: float = beta2
+        self._epsilon: float = epsilon
+
+    def _direction(self, gradients: "numpy.ndarray", states: list, learningrate: float) -> "numpy.ndarray":
+        means, squares = states
+        means *= self._beta1
+        means += (1 - self._beta1) * gradients
+        squares *= self._beta2
+        squares += (1 - self._beta2) * gradients * gradients
+        return (learningrate * (means / (1 - self._beta1 ** self._steps)) /
+                (numpy.sqrt(squares / (1 - self._beta2 ** self._steps)) + self._epsilon))
+
+    def _scalardirection(self, gradient: float, index: int, learningrate: float) -> float:
+        means, squares = self._state
+        means[index] = self._beta1 * means[index] + (1 - self._beta1) * gradient
+        squares[index] = self._beta2 * squares[index] + (1 - self._beta2) * gradient * gradient
+        return (learningrate * (means[index] / (1 - self._beta1 ** self._steps)) /
+                (sqrt(squares[index] / (1 - self._beta2 ** self._steps)) + self._epsilon))
+
+
 # The network class stores the structure of the network, and manages the forward and backpropagation algorithms.
 class Network:
-    def __init__(self, neurons, synapses, learningrate):
+    # The synapses are either a list of synapse objects, or a dictionary of columns {"startpositions", "endpositions", "intervals",
+    # "minimums", "maximums", "biasenabled"} to create them from in bulk (see Synapse.fromcolumns), which is faster for large designs.
+    # optimiser is None (adjusting weights and biases by plain SGD as they are backpropagated) or an Optimiser, such as AdamOptimiser().
+    def __init__(self, neurons, synapses, learningrate, seed=None, optimiser=None):
 
         # Storing the neuron objects as a 2D array, with each index being a list of a given layer's neurons.
         self._neurons = neurons
 
         # Storing a list of all synapse objects in the network.
+        if isinstance(synapses, dict):
+            synapses = Synapse.fromcolumns(**synapses)
         self._synapses = synapses
 
         # Setting up a dictionary with items {feature name : corresponding input neuron}, to more easily set inputs.
@@ -501,20 +1933,41 @@ class Network:
         # Setting up a dictionary with items {label name : corresponding output neuron}, to more easily set inputs.
         self._outputs = dict()
 
-        # Storing the network's learning rate.
+        # Storing the network's learning rate, and the optimiser adjusting the weights and biases (None for plain SGD).
         self._learningRate = learningrate
+        self._optimiser = optimiser
+
+        # Holding the compiled engine, None while the network runs on its neuron and synapse objects (see compile).
+        self._engine = None
 
-        # usng a temporary dictionary to holds neurons with their position as the key (used for connecting synapse and neuron objects).
+        # Indexing the neurons by their position (also used for connecting synapse and neuron objects) and by their identity, and adding
+        # input neurons to 'inputs' and output neurons to 'outputs'.
         neurondict = dict()
+        self._neuronIdentities = dict()
         for layer in neurons:
             for neuronobject in layer:
                 neurondict[neuronobject.getposition()] = neuronobject
+                self._neuronIdentities[neuronobject.getidentity()] = neuronobject
+                if isinstance(neuronobject, Input):
+                    self._inputs[neuronobject.getname()] = neuronobject
+                elif isinstance(neuronobject, Output):
+                    self._outputs[neuronobject.getname()] = neuronobject
+        self._neuronPositions = neurondict
 
-        # Iterating through each synapses, adding a reference to it in the neurons it connects, and a reference to the neurons it connects to it.
+        # Setting up the indexes of synapses by their identity and by their start and end positions, and the initialisation grid of each
+        # synapse (minimum, interval and number of steps) in the order of the synapse list.
+        self._synapseIdentities = dict()
+        self._synapsePositions = dict()
+        self._initialisationGrid = (list(), list(), list())
+        minimums, intervals, steps = self._initialisationGrid
+
+        # Iterating through each synapses once, adding a reference to it in the neurons it connects, and a reference to the neurons it
+        # connects to it, then indexing it.
         for synapseobject in self._synapses:
             # Finding the start and end neurons.
-            startneuron = neurondict[synapseobject.getstartposition()]
-            endneuron = neurondict[synapseobject.getendposition()]
+            startposition, endposition = synapseobject.getstartposition(), synapseobject.getendposition()
+            startneuron = neurondict[startposition]
+            endneuron = neurondict[endposition]
 
             # Adding the start and end neurons to the synapse object.
             synapseobject.setneurons(startneuron, endneuron)
@@ -523,29 +1976,267 @@ class Network:
             startneuron.addtosynapse(synapseobject)
             endneuron.addfromsynapse(synapseobject)
 
-        # Iterating through the layers, then neurons, in order to add input neurons to 'inputs' and output neurons to 'outputs'.
-        for layer in self._neurons:
-            for neuronobject in layer:
-                if neuronobject.gettype() == "Input":
-                    self._inputs[neuronobject.getname()] = neuronobject
-                elif neuronobject.gettype() == "Output":
-                    self._outputs[neuronobject.getname()] = neuronobject
+            self._synapseIdentities[synapseobject.getidentity()] = synapseobject
+            self._synapsePositions[(startposition, endposition)] = synapseobject
+            minimums.append(synapseobject.getmin())
+            intervals.append(synapseobject.getinterval())
+            steps.append(synapseobject.getsteps())
+
+        # Setting up the network's own random number stream, used for weight initialisation (seeded by initialise if a seed is given).
+        self._random = Random()
 
         # initialising random values for weight (and bias if required) of the synapses.
-        self.initialise()
+        self.initialise(seed)
 
     # initialise is used set weight and bias values for synapses to random (based on their initialisation settings - Min, Max, Interval).
-    def initialise(self):
+    # If a seed is given the network's random stream is restarted from it, so the same seed always gives the same weights and biases. With
+    # NumPy the steps are drawn by a NumPy generator (see drawsteps), so a seed gives different weights with and without NumPy installed.
+    def initialise(self, seed=None):
 
-        # Setting up learning rates for synapses.
+        # Setting up learning rates for synapses, and discarding any optimiser state kept for the previous weights.
         self.setlearningrate(self._learningRate)
+        if self._optimiser is not None:
+            self._optimiser.reset()
+
+        # Clearing any values left from passes with the previous weights.
+        self._resetvalues()
+
+        if seed is not None:
+            self._random = Random(seed)
 
-        # Iterating through all synapses in the network.
+        # Drawing the steps of every weight, then every bias, in one bulk draw (biases are drawn for all synapses, and used where enabled).
+        minimums, intervals, steps = self._initialisationGrid
+        draws = self._drawsteps(steps + steps)
+        weights = [minimum + draw * interval for minimum, draw, interval in zip(minimums, draws, intervals)]
+        biases = [minimum + draw * interval for minimum, draw, interval in zip(minimums, draws[len(steps):], intervals)]
+
+        self._setsynapseweights(weights, biases)
+
+    # setsynapseweights sets the weight and bias of every synapse from lists in the order of the synapse list. If compiled the values are
+    # written straight into the engine's arrays, otherwise into the synapse objects.
+    def _setsynapseweights(self, weights, biases):
+        if self._engine is not None:
+            self._engine.setsynapseweights(weights, biases)
+        else:
+            for synapse, weight, bias in zip(self._synapses, weights, biases):
+                synapse.setweightvalue(weight)
+                synapse.setbiasvalue(bias)
+
+    # getsynapseweights returns lists of the weight and bias of every synapse, in the order of the synapse list (biases are NaN where not
+    # enabled). The values come from the engine if compiled.
+    def _getsynapseweights(self):
+        if self._engine is not None:
+            return self._engine.getsynapseweights()
+        return ([synapse.getweightvalue() for synapse in self._synapses],
+                [synapse.getbiasvalue() if synapse.getbiasenabled() else float("nan") for synapse in self._synapses])
+
+    # getpositionarray returns an array of the start and end position of every synapse (start layer, start across, end layer, end across),
+    # in the order of the synapse list.
+    def _getpositionarray(self):
+        positions = array("q")
         for synapse in self._synapses:
-            # Running a given synapse's initialise method.
-            synapse.initialise()
+            positions.extend(synapse.getstartposition() + synapse.getendposition())
+        return positions
+
+    # saveweights writes the weights and biases of the network to a binary weight file (see WEIGHTFILEHEADER), keyed by synapse position.
+    def saveweights(self, path):
+        with open(path, "wb") as file:
+            file.write(self._weightbytes())
+
+    # weightbytes returns the contents of a binary weight file for the current weights and biases.
+    def _weightbytes(self):
+        weights, biases = self._getsynapseweights()
+        arrays = [self._getpositionarray(), array("d", weights), array("d", biases)]
+
+        # The arrays are stored little-endian, whatever the byte order of the machine.
+        if sys.byteorder == "big":
+            for values in arrays:
+                values.byteswap()
+
+        return WEIGHTFILEHEADER.pack(WEIGHTFILEIDENTIFIER, WEIGHTFILEVERSION, 0, len(self._synapses)) + b"".join(values.tobytes() for values in arrays)
+
+    # loadweights reads the weights and biases of the network from a binary weight file. The file is memory-mapped and its arrays viewed in
+    # place rather than parsed, the values are then copied into the synapses (the mapped arrays are not kept as the network's weights). If
+    # its synapses are in the same order as the network's (the case for files saved by the same design) the values are taken in a single
+    # copy, otherwise each synapse is matched by its start and end position.
+    def loadweights(self, path):
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            self._loadweightbuffer(mapped)
+
+    # savecheckpoint writes a checkpoint of the training state to a file: a binary weight file (so loadweights also reads checkpoints)
+    # followed by the learning rate, the number of training cycles completed and the state of the network's random stream as JSON.
+    def savecheckpoint(self, path, cycle=0):
+        with open(path, "wb") as file:
+            file.write(self._checkpointbytes(cycle))
+
+    # checkpointbytes returns the contents of a checkpoint file for the current training state.
+    def _checkpointbytes(self, cycle):
+        version, internalstate, gaussnext = self._random.getstate()
+        state = {"cycle": cycle, "learningrate": self._learningRate, "random": [version, internalstate, gaussnext],
+                 "optimiser": None if self._optimiser is None else self._optimiser.getstate()}
+        return self._weightbytes() + json.dumps(state).encode()
+
+    # loadcheckpoint restores the training state from a checkpoint file (weights, biases, learning rate and random stream), returning
+    # the number of training cycles completed when it was saved.
+    def loadcheckpoint(self, path):
+        with open(path, "rb") as file:
+            contents = file.read()
+        self._loadweightbuffer(contents)
+
+        # The JSON state follows the weight arrays.
+        count = WEIGHTFILEHEADER.unpack_from(contents)[3]
+        state = json.loads(contents[WEIGHTFILEHEADER.size + 48 * count:])
+        self.setlearningrate(state["learningrate"])
+        version, internalstate, gaussnext = state["random"]
+        self._random.setstate((version, tuple(internalstate), gaussnext))
+        if self._optimiser is not None and state.get("optimiser") is not None:
+            self._optimiser.setstate(state["optimiser"])
+        return state["cycle"]
+
+    # loadweightbuffer sets the weights and biases of the network from the contents of a binary weight file.
+    def _loadweightbuffer(self, buffer):
+        identifier, version, _, count = WEIGHTFILEHEADER.unpack_from(buffer)
+        if identifier != WEIGHTFILEIDENTIFIER or version != WEIGHTFILEVERSION:
+            raise ValueError("Not a NuNet weight file (or an unsupported version).")
+
+        # Viewing the arrays in place, the views are released before the buffer is closed.
+        first = WEIGHTFILEHEADER.size
+        view = memoryview(buffer)
+        views = [view[first:first + 32 * count].cast("q"), view[first + 32 * count:first + 40 * count].cast("d"),
+                 view[first + 40 * count:first + 48 * count].cast("d")]
+        try:
+            positions, weights, biases = views
+
+            # On big-endian machines the arrays are copied so they can be swapped to the machine's byte order.
+            if sys.byteorder == "big":
+                positions, weights, biases = array("q", positions), array("d", weights), array("d", biases)
+                for values in (positions, weights, biases):
+                    values.byteswap()
+
+            if count == len(self._synapses) and positions == self._getpositionarray():
+                weightlist, biaslist = weights.tolist(), biases.tolist()
+            else:
+                # Matching each synapse of the network to its entry in the file by position.
+                entries = {tuple(positions[4 * entry:4 * entry + 4]): entry for entry in range(count)}
+                order = list()
+                for synapse in self._synapses:
+                    entry = entries.get(synapse.getstartposition() + synapse.getendposition())
+                    if entry is None:
+                        raise ValueError("The weight file has no weights for the synapse from " + str(synapse.getstartposition()) +
+                                         " to " + str(synapse.getendposition()) + ".")
+                    order.append(entry)
+                weightlist, biaslist = [weights[entry] for entry in order], [biases[entry] for entry in order]
+        finally:
+            for values in views:
+                values.release()
+            view.release()
+
+        self._setsynapseweights(weightlist, biaslist)
+
+    # drawsteps draws a random integer from 0 to each of the given steps (inclusive) from the network's random stream. With NumPy all are
+    # drawn at once, by a generator seeded from the network's stream.
+    def _drawsteps(self, steps):
+        if numpy is not None:
+            generator = numpy.random.default_rng(self._random.getrandbits(64))
+            return generator.integers(0, numpy.array(steps, dtype=numpy.int64) + 1).tolist()
+        return [self._random.randint(0, step) for step in steps]
+
+    # compile flattens the network into a CompiledNetwork, which then runs all training, testing and prediction. While compiled the weights held
+    # by the synapse objects are not updated, syncweights (or decompile) writes them back. Compiling a network that is already compiled
+    # returns the engine in use, as a new one would be built from the (out of date) synapse objects.
+    def compile(self):
+        if self._engine is None:
+            self._engine = CompiledNetwork(self)
+        return self._engine
+
+    # decompile writes the compiled engine's weights back into the synapse objects and returns the network to the object engine.
+    def decompile(self):
+        if self._engine is not None:
+            self._engine.syncweights()
+            self._engine = None
+
+    # syncweights writes the weights and biases of the compiled engine (if in use) back into the synapse objects.
+    def syncweights(self):
+        if self._engine is not None:
+            self._engine.syncweights()
+
+    # getbuffers returns the values of the neurons and synapses from the last pass as flat lists (see CompiledNetwork.getbuffers), read
+    # from the engine if compiled and otherwise gathered from the neuron and synapse objects.
+    def _getbuffers(self):
+        if self._engine is not None:
+            return self._engine.getbuffers()
+
+        neurons = [neuronobject for layer in self._neurons for neuronobject in layer]
+        indices = {id(neuronobject): index for index, neuronobject in enumerate(neurons)}
+        kinds = {"Neuron": CompiledNetwork.NEURON, "Input": CompiledNetwork.INPUT, "Output": CompiledNetwork.OUTPUT}
+        return {"kinds": [kinds[neuronobject.gettype()] for neuronobject in neurons],
+                "inputvalues": [neuronobject.getinputvalue() for neuronobject in neurons],
+                "activationvalues": [neuronobject.getactivationvalue() for neuronobject in neurons],
+                "backpropderivatives": [neuronobject.getbackpropderivative() for neuronobject in neurons],
+                "edgestarts": [indices[id(synapse.getstartneuron())] for synapse in self._synapses],
+                "edgeends": [indices[id(synapse.getendneuron())] for synapse in self._synapses],
+                "weights": [synapse.getweightvalue() for synapse in self._synapses],
+                "biasenabled": [synapse.getbiasenabled() for synapse in self._synapses]}
+
+    # profile enables profiling of the training phases (setlabels, feedforward, backpropagate and recordcycle), returning the
+    # ProfileStats the timings are gathered into. With detail the forward and backward passes are also timed per layer and per activation
+    # type (on the object engine only, a compiled engine runs each pass as one loop). Each phase is timed by replacing its method on the
+    # network with a timed one, so when profiling is disabled (profile(False)) no cost is left behind.
+    def profile(self, enabled=True, detail=False):
+
+        # Removing any timed methods, returning to those of the class.
+        for phase in ("_setlabels", "_feedforward", "_backpropagate", "_recordcycle"):
+            self.__dict__.pop(phase, None)
+
+        if not enabled:
+            return None
+
+        stats = ProfileStats()
+        if detail:
+            self._feedforward = lambda features: self._profiledpass(stats, "feedforward", features)
+            self._backpropagate = lambda: self._profiledpass(stats, "backpropagate")
+        for phase in ("_setlabels", "_feedforward", "_backpropagate", "_recordcycle"):
+            setattr(self, phase, stats.wrap(phase.lstrip("_"), getattr(self, phase)))
+        return stats
+
+    # profiledpass runs a forward pass (given the features) or a backward pass, timing each layer and each neuron by its activation type.
+    def _profiledpass(self, stats, phase, features=None):
+
+        # A compiled engine runs the pass as a whole.
+        if self._engine is not None:
+            if features is None:
+                self._engine.backpropagate()
+            else:
+                self._engine.feedforward(features)
+            return
 
-    # resetvalues is used to set all training cycle dependent attributes of neurons and synapses to zero (their current value, derivative)
+        if features is None:
+            layers = list(enumerate(self._neurons))[::-1]
+        else:
+            layers = enumerate(self._neurons)
+            self._giveinputs(features)
+
+        for layerindex, layer in layers:
+            layerstarted = time.perf_counter()
+            for neuronobject in layer:
+                started = time.perf_counter()
+                if features is None:
+                    neuronobject.passbackwards()
+                else:
+                    neuronobject.passforwards()
+                stats.addactivation(phase, neuronobject.getactivationtype(), time.perf_counter() - started)
+            stats.addlayer(phase, layerindex, time.perf_counter() - layerstarted)
+
+        # As in backpropagate, with an optimiser the synapses only pass the derivatives back and the optimiser adjusts the weights and biases.
+        if features is None and self._optimiser is not None:
+            self._stepoptimiser()
+
+    # getengine returns the compiled engine in use, or None if the network is using its neuron and synapse objects.
+    def getengine(self):
+        return self._engine
+
+    # resetvalues is used to set all training cycle dependent attributes of neurons and synapses to zero (their current value, derivative).
+    # It is not needed between passes, as each neuron consumes its inputs when it passes forwards and every synapse value is overwritten.
     def _resetvalues(self):
 
         # Iterating through each layer in the network.
@@ -564,20 +2255,46 @@ class Network:
     # feedforward forward propagates a given set of features through the network.
     def _feedforward(self, features):
 
-        # Resetting synapse and neuron values for the next pass.
-        self._resetvalues()
+        # If compiled, the engine runs the pass instead.
+        if self._engine is not None:
+            self._engine.feedforward(features)
+            return
 
         # adding each feature to its corresponding input neuron.
-        for featurekey in features.keys():
-            self._inputs[featurekey].giveinput(features[featurekey])
+        self._giveinputs(features)
 
         # Instructing each neuron in each layer (in order) to pass their value forwards.
         for layer in self._neurons:
             for neuronobject in layer:
                 neuronobject.passforwards()
 
+    # infer forward propagates a given set of features for inference, calculating activation values only (no derivatives or loss) and
+    # storing no synapse values.
+    def _infer(self, features):
+
+        # If compiled, the engine runs the pass instead.
+        if self._engine is not None:
+            self._engine.infer(features)
+            return
+
+        self._giveinputs(features)
+
+        for layer in self._neurons:
+            for neuronobject in layer:
+                neuronobject.infer()
+
+    # giveinputs adds each feature to its input neuron. Every input neuron is looked up before any is given its feature, so an unknown
+    # feature key raises a KeyError without leaving part of the features in the input sums, to be consumed by the next pass.
+    def _giveinputs(self, features):
+        inputs = [(self._inputs[featurekey], features[featurekey]) for featurekey in features.keys()]
+        for inputobject, value in inputs:
+            inputobject.giveinput(value)
+
     # Setlabels is used to provide the output neurons their corresponding labels for a given training cycle.
     def _setlabels(self, labels):
+        if self._engine is not None:
+            self._engine.setlabels(labels)
+            return
         for labelkey in labels.keys():
             self._outputs[labelkey].setlabel(labels[labelkey])
 
@@ -585,21 +2302,78 @@ class Network:
     # to their start neurons.
     def _backpropagate(self):
 
+        # If compiled, the engine runs the pass instead.
+        if self._engine is not None:
+            self._engine.backpropagate()
+            return
+
         # Iterating backwards through the layers.
         for layer in self._neurons[::-1]:
             for neuronobject in layer:
                 neuronobject.passbackwards()
 
-    # setlearningrate sets the learning rate of every synapse to that of the network.
+        # With an optimiser the synapses only pass the derivatives back, the optimiser then adjusts the weights and biases.
+        if self._optimiser is not None:
+            self._stepoptimiser()
+
+    # stepoptimiser gathers the gradient of every synapse's weight and bias from the last backward pass of the object engine (the input to the
+    # synapse and the derivative of the neuron it feeds), and adjusts them by the optimiser.
+    def _stepoptimiser(self):
+        weights, biases, weightgradients, biasgradients = list(), list(), list(), list()
+        for synapse in self._synapses:
+            derivative = synapse.getendneuron().getbackpropderivative()
+            weights.append(synapse.getweightvalue())
+            weightgradients.append(synapse.getinputvalue() * derivative)
+            if synapse.getbiasenabled():
+                biases.append(synapse.getbiasvalue())
+                biasgradients.append(derivative)
+            else:
+                biases.append(0.0)
+                biasgradients.append(0.0)
+
+        self._optimiser.step(weights, biases, weightgradients, biasgradients, self._learningRate)
+        for synapse, weight, bias in zip(self._synapses, weights, biases):
+            synapse.setweightvalue(weight)
+            synapse.setbiasvalue(bias)
+
+    # setoptimiser sets the optimiser adjusting the weights and biases (None for plain SGD), starting from a reset state.
+    def setoptimiser(self, optimiser):
+        self._optimiser = optimiser
+        if optimiser is not None:
+            optimiser.reset()
+        self.setlearningrate(self._learningRate)
+        if self._engine is not None:
+            self._engine.setoptimiser(optimiser)
+
+    # getoptimiser returns the optimiser adjusting the weights and biases (None for plain SGD).
+    def getoptimiser(self):
+        return self._optimiser
+
+    # setlearningrate sets the learning rate of every synapse to that of the network (or to zero with an optimiser, as the optimiser then
+    # adjusts the weights and biases instead of the synapses).
     def setlearningrate(self, learningrate):
         self._learningRate = learningrate
         for synapse in self._synapses:
-            synapse.setlearningrate(learningrate)
+            synapse.setlearningrate(learningrate if self._optimiser is None else 0)
+        if self._engine is not None:
+            self._engine.setlearningrate(learningrate)
+
+    # getpredicted returns the value at each output neuron from the last forward pass, with the label names as keys.
+    def _getpredicted(self):
+        if self._engine is not None:
+            return self._engine.getpredicted()
+        return {output.getname(): output.getinputvalue() for output in self._outputs.values()}
 
-    # predict is used to retreive the prediction made by the network from a given set of features.
+    # getloss returns the loss at each output neuron from the last forward pass, with the label names as keys.
+    def _getloss(self):
+        if self._engine is not None:
+            return self._engine.getloss()
+        return {output.getname(): output.getloss() for output in self._outputs.values()}
+
+    # predict is used to retreive the prediction made by the network from a given set of features (using the inference pass).
     def predict(self, features):
-        self._feedforward(features)
-        return {output.getname(): output.getinputvalue() for output in self._outputs.values()}
+        self._infer(features)
+        return self._getpredicted()
 
     # test is used to generate statistics about the current loss of the network over a given test dataset, without changing the network's weights and biases.
     def test(self, featurelist, labellist):
@@ -620,7 +2394,7 @@ class Network:
             self._feedforward(featurelist[cycle])
 
             # Stroing the loss for the given set of labels.
-            loss = {output.getname(): output.getloss() for output in self._outputs.values()}
+            loss = self._getloss()
 
             # Appending the features, labels and loss to the list for each prediction cycle.
             testcycles.append({"features": featurelist[cycle], "labels": labellist[cycle], "loss": loss})
@@ -638,44 +2412,242 @@ class Network:
         return testcycles, averagelabelloss
 
     # train is used to repeatedly forward propagate, then backpropagate and adjust the network to allow it to learn for a set of data.
-    def train(self, featurelist, labellist, cycles, record=True, display=True):
+    # record is either True (returning a list of every cycle), False, or a TrainingRecord to stream the cycles into (which is returned).
+    # display is either True (printing the whole network every cycle), False, or a TrainingMonitor to sample the network with.
+    # If a checkpoint path is given the training state is saved to it every checkpointcycles cycles and/or checkpointseconds seconds (and
+    # once training finishes), written in the background. Passing a checkpoint file as resumefrom restores its state and continues from the
+    # cycle it was saved at, cycles being the total number of cycles to train for.
+    # prefetch is either False, "thread" (or True) or "process", to read and build the samples of upcoming cycles on a background thread or
+    # process (see Prefetcher) while the network trains, useful where reading a sample is slow (such as a memory-mapped Dataset on disk).
+    # sampler gives the order samples are used in (see Sampler, such as ShuffleSampler), by default each in turn.
+    def train(self, featurelist, labellist, cycles, record=True, display=True, checkpoint=None, checkpointcycles=None, checkpointseconds=None,
+              resumefrom=None, prefetch=False, sampler=None):
 
         # Creating a list to store the values for each training cycle.
         trainingrecord = list()
 
-        # Iterating through the number of cycles required.
-        for cycle in range(0, cycles):
+        # Restoring the training state to resume from, if given.
+        firstcycle = 0
+        if resumefrom is not None:
+            firstcycle = self.loadcheckpoint(resumefrom)
+
+        # Setting up the background writer and the time of the last checkpoint, if checkpointing.
+        if checkpoint is not None:
+            writer = CheckpointWriter()
+            lastcheckpoint = time.monotonic()
+
+        # Getting the index, features and labels of each cycle's sample, in the background if prefetching.
+        samples = _trainingsamples(featurelist, labellist, firstcycle, cycles, sampler)
+        if prefetch:
+            samples = Prefetcher(_trainingsamples, (featurelist, labellist, firstcycle, cycles, sampler), 4, 256, prefetch == "process")
 
-            # Storing the index of the feature to be input (as cycles can be longer than the feature list if the user wants data to be used multiple times).
-            dataindex = cycle % len(featurelist)
+        # Iterating through the number of cycles required.
+        for cycle, dataindex, features, labels in samples:
 
             # Setting the labels of the output neurons.
-            self._setlabels(labellist[dataindex])
+            self._setlabels(labels)
 
             # Feeding forward the inputs.
-            self._feedforward(featurelist[dataindex])
+            self._feedforward(features)
 
             # Backpropagating the loss derivative, and adjusting synapse weights and biases in the process.
             self._backpropagate()
 
             # If the user has opted to display, the network state is displayed, with current values included.
-            if display:
+            if isinstance(display, TrainingMonitor):
+                if display.due(cycle):
+                    display.sample(self, cycle)
+            elif display:
                 print("\n\nCycle:   " + str(cycle))
                 self.displaynetwork(True)
 
             # If the user has opted to record the training cycles, the cycle data is added to the training record.
             if record:
-                trainingrecord.append(
-                    {"cycle": cycle, "features": featurelist[dataindex], "labels": labellist[dataindex], "predicted": {output.getname(): output.getinputvalue() for output in self._outputs.values()},
-                     "loss": {output.getname(): output.getloss() for output in self._outputs.values()}})
+                self._recordcycle(record, trainingrecord, cycle, dataindex, features, labels)
+
+            # Checkpointing when due, the state is copied now and written in the background.
+            if checkpoint is not None:
+                if ((checkpointcycles is not None and (cycle + 1) % checkpointcycles == 0) or
+                        (checkpointseconds is not None and time.monotonic() - lastcheckpoint >= checkpointseconds)):
+                    writer.write(checkpoint, self._checkpointbytes(cycle + 1))
+                    lastcheckpoint = time.monotonic()
+
+        # Saving the final state, and waiting for it to be written.
+        if checkpoint is not None:
+            writer.write(checkpoint, self._checkpointbytes(max(cycles, firstcycle)))
+            writer.wait()
 
         # If the user opts to receive training data, it is returned.
+        if isinstance(record, TrainingRecord):
+            record.flush()
+            return record
         if record:
             return trainingrecord
 
+    # recordcycle adds a training cycle to the record given to train, either a TrainingRecord or (if record is True) the list of cycles.
+    def _recordcycle(self, record, trainingrecord, cycle, dataindex, features, labels):
+        if isinstance(record, TrainingRecord):
+            record.add(cycle, dataindex, features, labels, self._getpredicted(), self._getloss())
+        else:
+            trainingrecord.append({"cycle": cycle, "features": features, "labels": labels, "predicted": self._getpredicted(),
+                                   "loss": self._getloss()})
+
+    # predictmany yields predictions for a stream of features, processing them in chunks without resetting the network for every row. The
+    # features are either an iterable of feature dictionaries (such as a generator reading a file), or a columnar dictionary of
+    # {feature name : sequence of values}. Only one chunk is held in memory at a time.
+    def predictmany(self, features, chunksize=256):
+
+        # Predictions run on the compiled engine, if the network is not compiled an engine is made for the duration of the predictions.
+        engine = self._engine
+        if engine is None:
+            engine = CompiledNetwork(self, optimiser=False)
+
+        # Splitting columns into slices, or rows into lists, of chunksize rows.
+        if isinstance(features, DatasetRows):
+            features = features.getcolumns()
+        if isinstance(features, dict):
+            samples = len(next(iter(features.values()), ()))
+            chunks = ({name: column[first:first + chunksize] for name, column in features.items()} for first in range(0, samples, chunksize))
+        else:
+            rows = iter(features)
+            chunks = iter(lambda: list(islice(rows, chunksize)), [])
+
+        yield from engine.predictmany(chunks)
+
+    # evaluate streams a test dataset through the network in chunks, returning only aggregate metrics rather than the per row record test
+    # builds: the number of rows and mean loss of each label, and optionally the given quantiles of the loss (which keeps the loss of every
+    # row, 8 bytes a row per label) and a histogram of histogrambins bins over histogramrange (with counts of values below and above it).
+    # Features and labels are either iterables of dictionaries (such as generators reading a file) or columnar dictionaries of {name :
+    # sequence of values}. With more than one process the chunks are evaluated across a pool of processes, at most two chunks per process
+    # being in flight so the dataset is never held in memory. Per row detail (predicted value and loss of each label) is written to
+    # detailfile as a FileRecord if given. Rows without a label have zero loss for it (unlike test, where a missing label keeps the value
+    # of the previous row).
+    def evaluate(self, features, labels, processes=1, chunksize=1024, quantiles=None, histogrambins=0, histogramrange=(0.0, 1.0), detailfile=None):
+
+        # Evaluation runs on the compiled engine, if the network is not compiled an engine is made for the duration of the evaluation.
+        engine = self._engine
+        if engine is None:
+            engine = CompiledNetwork(self, optimiser=False)
+        names = list(self._outputs.keys())
+
+        # Splitting the dataset into chunks of (features, labels), as slices of columns or lists of rows.
+        if isinstance(features, DatasetRows):
+            features, labels = features.getcolumns(), labels.getcolumns()
+        if isinstance(features, dict):
+            samples = len(next(iter(features.values()), ()))
+            chunks = (({name: column[first:first + chunksize] for name, column in features.items()},
+                       {name: column[first:first + chunksize] for name, column in labels.items()}) for first in range(0, samples, chunksize))
+        else:
+            rows = zip(features, labels)
+            chunks = (tuple(map(list, zip(*chunk))) for chunk in iter(lambda: list(islice(rows, chunksize)), []))
+
+        # Setting up the running totals, the kept losses for quantiles, and the histogram counts (below, bins..., above) of each label.
+        totals = [0.0] * len(names)
+        kept = [array("d") for _ in names] if quantiles else None
+        histograms = [[0] * (histogrambins + 2) for _ in names] if histogrambins else None
+        record = FileRecord(detailfile) if detailfile is not None else None
+        rowcount = 0
+
+        for predicted, loss in CompiledNetwork.evaluatechunks(engine, chunks, processes):
+            for column, values in enumerate(loss):
+                totals[column] += sum(values)
+                if kept is not None:
+                    kept[column].extend(values)
+                if histograms is not None:
+                    Network._histogram(histograms[column], values, histogrambins, histogramrange)
+            if record is not None:
+                record.addrows(rowcount, dict(zip(names, predicted)), dict(zip(names, loss)))
+            rowcount += len(loss[0]) if loss else 0
+
+        if record is not None:
+            record.flush()
+
+        # Creating the metrics of each label.
+        metrics = {"rows": rowcount, "meanloss": {name: total / rowcount if rowcount else 0.0 for name, total in zip(names, totals)}}
+        if kept is not None:
+            metrics["quantiles"] = {name: Network._quantiles(values, quantiles) for name, values in zip(names, kept)}
+        if histograms is not None:
+            low, high = histogramrange
+            metrics["histograms"] = {name: {"edges": [low + (high - low) * step / histogrambins for step in range(histogrambins + 1)],
+                                            "counts": counts[1:-1], "below": counts[0], "above": counts[-1]}
+                                     for name, counts in zip(names, histograms)}
+        return metrics
+
+    # histogram adds each value to the counts (below, a count for each bin, above) of a histogram of bins over the range given.
+    @staticmethod
+    def _histogram(counts, values, bins, valuerange):
+        low, high = valuerange
+        if numpy is not None:
+            values = numpy.frombuffer(values) if isinstance(values, array) else numpy.asarray(values)
+            counts[0] += int((values < low).sum())
+            counts[-1] += int((values > high).sum())
+            for index, count in enumerate(numpy.histogram(values, bins, valuerange)[0].tolist(), 1):
+                counts[index] += count
+            return
+        width = (high - low) / bins
+        for value in values:
+            if value < low:
+                counts[0] += 1
+            elif value > high:
+                counts[-1] += 1
+            else:
+                counts[1 + min(int((value - low) / width), bins - 1)] += 1
+
+    # quantiles returns {quantile : value} of the given values for each quantile (0 to 1), interpolating linearly between the nearest values.
+    @staticmethod
+    def _quantiles(values, quantiles):
+        ordered = sorted(values)
+        if not ordered:
+            return {quantile: float("nan") for quantile in quantiles}
+        result = dict()
+        for quantile in quantiles:
+            position = quantile * (len(ordered) - 1)
+            lower = floor(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            result[quantile] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+        return result
+
+    # trainbatched trains the network on mini-batches, evaluating a whole batch at once with NumPy and adjusting weights and biases by the
+    # gradient averaged over the batch. It requires NumPy, and returns the mean loss of each label for every epoch. If prefetch is True batches
+    # are gathered on a background thread while the previous batch trains (see CompiledNetwork.trainbatched). sampler gives the order samples
+    # are used in each epoch (see Sampler), by default each in turn.
+    def trainbatched(self, featurelist, labellist, epochs, batchsize=32, prefetch=False, sampler=None):
+
+        # Batched training runs on the compiled engine, if the network is not compiled an engine is made for the duration of training.
+        engine = self._engine
+        if engine is None:
+            engine = CompiledNetwork(self)
+
+        # Training the engine, then writing the weights back to the synapse objects if the network is not compiled.
+        epochrecord = engine.trainbatched(featurelist, labellist, epochs, batchsize, prefetch, sampler)
+        if self._engine is None:
+            engine.syncweights()
+
+        return epochrecord
+
+    # trainparallel trains the network with data parallelism across a pool of processes (see CompiledNetwork.trainparallel for the
+    # synchronous and local modes). The network is compiled for the duration of training if it is not already. Returns the mean loss of each
+    # label for every epoch.
+    def trainparallel(self, featurelist, labellist, epochs, processes=None, batchsize=32, mode="synchronous", syncinterval=1, seed=None,
+                      sampler=None):
+        engine = self._engine
+        if engine is None:
+            engine = CompiledNetwork(self)
+
+        epochrecord = engine.trainparallel(featurelist, labellist, epochs, processes, batchsize, mode, syncinterval, seed, sampler)
+        if self._engine is None:
+            engine.syncweights()
+
+        return epochrecord
+
     # displaynetwork displays the network's neurons and synapse attributes. If value is True (False by default), cycle associated values are also displayed.
     def displaynetwork(self, values=False):
 
+        # If compiled, the engine's weights and values are written back to the objects so that they are current.
+        if self._engine is not None:
+            self._engine.syncweights()
+            self._engine.syncvalues()
+
         # Displaying the title for the user.
         print("\n" + "*" * 30 + "NETWORK VALUES" + "*" * 30)
 
@@ -733,31 +2705,1090 @@ class Network:
     def getlearningrate(self):
         return self._learningRate
 
-    # getsynapse uses the synapse identity to return a given synapse object.
+    # getsynapse uses the synapse identity to return a given synapse object (None if identity is not present for a synapse in the network).
     def getsynapse(self, identity):
+        return self._synapseIdentities.get(identity)
 
-        # Iterating through all synapses.
-        for synapse in self._synapses:
+    # getneuron returns a neuron object for a given identity (None if there are no neurons with the provided identity).
+    def getneuron(self, identity):
+        return self._neuronIdentities.get(identity)
+
+    # getsynapseat returns the synapse object connecting the given start and end positions, or None if there is none.
+    def getsynapseat(self, startposition, endposition):
+        return self._synapsePositions.get((tuple(startposition), tuple(endposition)))
+
+    # getneuronat returns the neuron object at the given position, or None if there is none.
+    def getneuronat(self, position):
+        return self._neuronPositions.get(tuple(position))
+
+    # getweights returns an array of the weight of every synapse, in the order of the synapse list (the order is the same on every call, and
+    # that of getsynapses). If compiled the weights are read from the engine.
+    def getweights(self):
+        return array("d", self._getsynapseweights()[0])
+
+    # getbiases returns an array of the bias of every synapse in the order of the synapse list, NaN where the synapse has no bias.
+    def getbiases(self):
+        return array("d", self._getsynapseweights()[1])
+
+    # setweights sets the weight (and bias if given, ignored where not enabled) of every synapse, from sequences in the order of the synapse
+    # list.
+    def setweights(self, weights, biases=None):
+        if len(weights) != len(self._synapses) or (biases is not None and len(biases) != len(self._synapses)):
+            raise ValueError("Expected a weight (and bias) for each of the " + str(len(self._synapses)) + " synapses.")
+        if biases is None:
+            biases = self._getsynapseweights()[1]
+        self._setsynapseweights(list(weights), list(biases))
+
+    # getsynapses returns the list of synapse objects, in the order used by getweights and getbiases.
+    def getsynapses(self):
+        return self._synapses
+
+class CompiledNetwork:
+    """CompiledNetwork flattens a network's neurons and synapses into arrays, so that forward and back propagation are loops over indexes
+    rather than method calls between objects. Results match those of the object engine, trained weights are held in the engine's arrays
+    until syncweights writes them back into the synapse objects. Engines made only to predict or evaluate are made with optimiser False,
+    so they leave the network's optimiser untouched."""
+
+    # Kinds of neuron held in the kind table.
+    NEURON: int = 0
+    INPUT: int = 1
+    OUTPUT: int = 2
+
+    def __init__(self, network: "Network", optimiser: bool = True) -> None:
+
+        # Flattening the layers into one list, this is the order the network passes neurons forwards in (a topological order of the design).
+        self._neurons: list[Neuron] = [neuronobject for layer in network._neurons for neuronobject in layer]
+        neuroncount: int = len(self._neurons)
+
+        # Holding the index of each neuron by its position, used to find the neurons a synapse connects.
+        self._positions: dict = {neuronobject.getposition(): index for index, neuronobject in enumerate(self._neurons)}
+
+        # Backpropagation visits the layers in reverse, but the neurons within a layer in their original order.
+        self._backwardOrder: array = array("l")
+        layerstart: int = neuroncount
+        for layer in network._neurons[::-1]:
+            layerstart -= len(layer)
+            self._backwardOrder.extend(range(layerstart, layerstart + len(layer)))
+
+        # Layer pointers: layer i holds neurons layerPointers[i] to layerPointers[i + 1].
+        self._layerPointers: list[int] = [0]
+        for layer in network._neurons:
+            self._layerPointers.append(self._layerPointers[-1] + len(layer))
+
+        # Building the activation kind table: the kind of neuron, its activation (or loss) function, and the constant it uses.
+        self._kinds: array = array("b")
+        self._activationTypes: list[str] = list()
+        self._activationFunctions: list = list()
+        self._activationConstants: array = array("d")
+
+        # Holding the index of the input and output neurons by name, to set features and labels.
+        self._inputs: dict = dict()
+        self._outputs: dict = dict()
+
+        self._inferenceFunctions: list = list()
+
+        for index, neuronobject in enumerate(self._neurons):
+            self._inferenceFunctions.append(neuronobject._inferenceFunction)
+            if isinstance(neuronobject, Input):
+                self._kinds.append(CompiledNetwork.INPUT)
+                self._inputs[neuronobject.getname()] = index
+            elif isinstance(neuronobject, Output):
+                self._kinds.append(CompiledNetwork.OUTPUT)
+                self._outputs[neuronobject.getname()] = index
+            else:
+                self._kinds.append(CompiledNetwork.NEURON)
+            self._activationTypes.append(neuronobject.getactivationtype())
+            self._activationFunctions.append(neuronobject._activationFunction)
+            self._activationConstants.append(neuronobject._activationConstant)
+
+        # Finding the start and end neuron index of every synapse.
+        synapsestarts: list[int] = [self._positions[synapseobject.getstartposition()] for synapseobject in network._synapses]
+        synapseends: list[int] = [self._positions[synapseobject.getendposition()] for synapseobject in network._synapses]
+
+        # Edges are ordered by start neuron (keeping the order of the synapse list within a neuron), as neurons pass forwards in that order.
+        edgeorder: list[int] = sorted(range(len(network._synapses)), key=synapsestarts.__getitem__)
+
+        # Holding the synapse objects in edge order, to read and write back their weights, and the position of each edge's synapse in the
+        # network's synapse list.
+        self._synapses: list[Synapse] = [network._synapses[synapseindex] for synapseindex in edgeorder]
+        self._edgeOrder: list[int] = edgeorder
+
+        # Edge arrays of start, end, weight and bias, with a flag for the synapses that have a bias enabled.
+        self._edgeStarts: list[int] = [synapsestarts[synapseindex] for synapseindex in edgeorder]
+        self._edgeEnds: list[int] = [synapseends[synapseindex] for synapseindex in edgeorder]
+        self._weights: list[float] = [0.0] * len(edgeorder)
+        self._biases: list[float] = [0.0] * len(edgeorder)
+        self._biasEnabled: list[bool] = [synapseobject.getbiasenabled() for synapseobject in self._synapses]
+        self.loadweights()
+
+        # Forward pointers: the edges leaving neuron i are edges forwardPointers[i] to forwardPointers[i + 1].
+        self._forwardPointers: array = self._pointers(self._edgeStarts, neuroncount)
+
+        # Backward pointers index backwardEdges, which holds edges grouped by end neuron, in the order of the synapse list (the order
+        # neurons hold their from-synapses).
+        edgeposition: dict = {synapseindex: edge for edge, synapseindex in enumerate(edgeorder)}
+        backwardorder: list[int] = sorted(range(len(network._synapses)), key=synapseends.__getitem__)
+        self._backwardEdges: list[int] = [edgeposition[synapseindex] for synapseindex in backwardorder]
+        self._backwardPointers: array = self._pointers(array("l", [synapseends[synapseindex] for synapseindex in backwardorder]), neuroncount)
+
+        # Per neuron values for a training cycle, each array is indexed by neuron index and overwritten by every pass. Inputs accumulate in
+        # inputSums, which a neuron consumes (moving the sum to inputValues and zeroing it) when it passes forwards, so nothing is cleared
+        # between passes.
+        self._inputSums: list[float] = [0.0] * neuroncount
+        self._inputValues: list[float] = [0.0] * neuroncount
+        self._activationValues: list[float] = [0.0] * neuroncount
+        self._activationDerivatives: list[float] = [0.0] * neuroncount
+        self._backpropDerivatives: list[float] = [0.0] * neuroncount
+
+        # Labels of the output neurons (None where no label is set, as with Output objects).
+        self._labels: list = [None] * neuroncount
+        for name, index in self._outputs.items():
+            self._labels[index] = network._outputs[name]._labelValue
+
+        # Storing the learning rate, and the network's optimiser (None for plain SGD) if the engine trains.
+        self._learningRate: float = network.getlearningrate()
+        self._optimiser: Optimiser = network.getoptimiser() if optimiser else None
+
+        # Holding the gradients of each weight and bias from the last pass, used when an optimiser adjusts them.
+        self._weightGradients: list[float] = [0.0] * len(edgeorder)
+        self._biasGradients: list[float] = [0.0] * len(edgeorder)
+
+        # Holding the NumPy index arrays used by batched passes, created on first use.
+        self._plan = None
 
-            # If synapse identity matchs identity being searched for, return the synapse.
-            if synapse.getidentity() == identity:
-                return synapse
+    @staticmethod
+    def _pointers(sortedindexes: array, count: int) -> array:
+        """pointers creates a CSR pointer array of length count + 1 from a sorted array of neuron indexes."""
+        pointers = array("l", [0]) * (count + 1)
+        for index in sortedindexes:
+            pointers[index + 1] += 1
+        for index in range(count):
+            pointers[index + 1] += pointers[index]
+        return pointers
+
+    def loadweights(self) -> None:
+        """loadweights reads the weights and biases of the synapse objects into the edge arrays."""
+        for edge, synapseobject in enumerate(self._synapses):
+            self._weights[edge] = synapseobject.getweightvalue()
+            self._biases[edge] = synapseobject.getbiasvalue() if self._biasEnabled[edge] else 0.0
+
+    def syncweights(self) -> None:
+        """syncweights writes the weights and biases of the edge arrays back into the synapse objects."""
+        for edge, synapseobject in enumerate(self._synapses):
+            synapseobject.setweightvalue(self._weights[edge])
+            synapseobject.setbiasvalue(self._biases[edge])
+
+    def syncvalues(self) -> None:
+        """syncvalues writes the values of the last training cycle into the neuron objects (used for displaying the network)."""
+        for index, neuronobject in enumerate(self._neurons):
+            neuronobject._inputValue = self._inputValues[index]
+            neuronobject._activationValue = self._activationValues[index]
+            neuronobject._activationDerivative = self._activationDerivatives[index]
+            neuronobject._backpropDerivative = self._backpropDerivatives[index]
+
+    def setlearningrate(self, learningrate: float) -> None:
+        """setlearningrate sets the learning rate used to adjust the weights and biases."""
+        self._learningRate = learningrate
 
-        # If identity is not present for a synapse in the network, return None
-        return None
+    def setoptimiser(self, optimiser: Optimiser) -> None:
+        """setoptimiser sets the optimiser adjusting the weights and biases (None for plain SGD)."""
+        self._optimiser = optimiser
 
-    # getneuron returns a neuron object for a given identity.
-    def getneuron(self, identity):
+    def setlabels(self, labels: dict) -> None:
+        """setlabels sets the label values of the output neurons, from a dictionary of {label name : value}."""
+        for labelkey in labels.keys():
+            self._labels[self._outputs[labelkey]] = labels[labelkey]
+
+    def _giveinputs(self, features: dict) -> None:
+        """giveinputs adds each feature to the input sum of its input neuron. Every index is looked up first, so an unknown feature key
+        raises a KeyError before any input sum is changed."""
+        inputs = [(self._inputs[featurekey], features[featurekey]) for featurekey in features.keys()]
+        inputsums = self._inputSums
+        for index, value in inputs:
+            inputsums[index] += value
+
+    def feedforward(self, features: dict) -> None:
+        """feedforward forward propagates a set of features, calculating the loss at outputs that have a label."""
+        kinds = self._kinds
+        functions = self._activationFunctions
+        constants = self._activationConstants
+        labels = self._labels
+        pointers = self._forwardPointers
+        ends = self._edgeEnds
+        weights = self._weights
+        biases = self._biases
+        inputsums = self._inputSums
+        inputvalues = self._inputValues
+        activationvalues = self._activationValues
+        activationderivatives = self._activationDerivatives
+        backpropderivatives = self._backpropDerivatives
+
+        # Adding each feature to its input neuron.
+        self._giveinputs(features)
+
+        for index in range(len(kinds)):
+
+            # Consuming the inputs given to the neuron during this pass.
+            inputvalue = inputvalues[index] = inputsums[index]
+            inputsums[index] = 0.0
+
+            # Outputs calculate the loss and its derivative if they have a label, and pass nothing forwards.
+            if kinds[index] == CompiledNetwork.OUTPUT:
+                label = labels[index]
+                if label is None:
+                    activationvalues[index] = activationderivatives[index] = backpropderivatives[index] = 0
+                else:
+                    activationvalues[index], activationderivatives[index] = functions[index](inputvalue, label, constants[index])
+                    backpropderivatives[index] = activationderivatives[index]
+                continue
+
+            # Calculating the activation, then feeding each synapse's activation (wx + b) into its end neuron.
+            activationvalue, activationderivatives[index] = functions[index](inputvalue, constants[index])
+            activationvalues[index] = activationvalue
+            backpropderivatives[index] = 0
+            first, last = pointers[index], pointers[index + 1]
+            for end, weight, bias in zip(ends[first:last], weights[first:last], biases[first:last]):
+                inputsums[end] += activationvalue * weight + bias
+
+    def infer(self, features: dict) -> None:
+        """infer forward propagates a set of features for inference, calculating only the input and activation value of each neuron (no
+        derivatives or loss)."""
+        kinds = self._kinds
+        functions = self._inferenceFunctions
+        constants = self._activationConstants
+        pointers = self._forwardPointers
+        ends = self._edgeEnds
+        weights = self._weights
+        biases = self._biases
+        inputsums = self._inputSums
+        inputvalues = self._inputValues
+        activationvalues = self._activationValues
+
+        self._giveinputs(features)
+
+        for index in range(len(kinds)):
+            inputvalue = inputvalues[index] = inputsums[index]
+            inputsums[index] = 0.0
+            if kinds[index] == CompiledNetwork.OUTPUT:
+                continue
+
+            activationvalue = activationvalues[index] = functions[index](inputvalue, constants[index])
+            first, last = pointers[index], pointers[index + 1]
+            for end, weight, bias in zip(ends[first:last], weights[first:last], biases[first:last]):
+                inputsums[end] += activationvalue * weight + bias
+
+    def backpropagate(self) -> None:
+        """backpropagate passes the loss derivative back through the network, adjusting the weights and biases as it goes (or with an
+        optimiser, calculating their gradients then adjusting them by the optimiser)."""
+        if self._optimiser is not None:
+            self.gradients()
+            self._optimiser.step(self._weights, self._biases, self._weightGradients, self._biasGradients, self._learningRate,
+                                 self._edgeOrder)
+            return
+
+        kinds = self._kinds
+        pointers = self._backwardPointers
+        backwardedges = self._backwardEdges
+        starts = self._edgeStarts
+        weights = self._weights
+        biases = self._biases
+        biasenabled = self._biasEnabled
+        activationvalues = self._activationValues
+        activationderivatives = self._activationDerivatives
+        backpropderivatives = self._backpropDerivatives
+        learningrate = self._learningRate
+
+        for index in self._backwardOrder:
+            kind = kinds[index]
+
+            # Outputs pass back their loss derivative as it is, other neurons multiply it by their activation derivative.
+            if kind == CompiledNetwork.OUTPUT:
+                derivative = backpropderivatives[index]
+            else:
+                derivative = backpropderivatives[index] * activationderivatives[index]
+                backpropderivatives[index] = derivative
+
+                # Inputs have no synapses to pass back to.
+                if kind == CompiledNetwork.INPUT:
+                    continue
+
+            # Passing the derivative back through each synapse feeding the neuron, adjusting its bias and weight.
+            for edge in backwardedges[pointers[index]:pointers[index + 1]]:
+                start = starts[edge]
+                if biasenabled[edge]:
+                    biases[edge] -= derivative * learningrate
+                backpropderivatives[start] += derivative * weights[edge]
+                weights[edge] -= activationvalues[start] * derivative * learningrate
+
+    def gradients(self) -> (list[float], list[float]):
+        """gradients passes the loss derivative back through the network like backpropagate, but leaves the weights and biases unchanged,
+        returning the gradient of each weight and bias (zero where not enabled) in edge order. The lists are reused by every pass."""
+        kinds = self._kinds
+        pointers = self._backwardPointers
+        backwardedges = self._backwardEdges
+        starts = self._edgeStarts
+        weights = self._weights
+        biasenabled = self._biasEnabled
+        activationvalues = self._activationValues
+        activationderivatives = self._activationDerivatives
+        backpropderivatives = self._backpropDerivatives
+        weightgradients = self._weightGradients
+        biasgradients = self._biasGradients
+
+        for index in self._backwardOrder:
+            kind = kinds[index]
+
+            # Outputs pass back their loss derivative as it is, other neurons multiply it by their activation derivative.
+            if kind == CompiledNetwork.OUTPUT:
+                derivative = backpropderivatives[index]
+            else:
+                derivative = backpropderivatives[index] * activationderivatives[index]
+                backpropderivatives[index] = derivative
+                if kind == CompiledNetwork.INPUT:
+                    continue
+
+            for edge in backwardedges[pointers[index]:pointers[index + 1]]:
+                start = starts[edge]
+                if biasenabled[edge]:
+                    biasgradients[edge] = derivative
+                backpropderivatives[start] += derivative * weights[edge]
+                weightgradients[edge] = activationvalues[start] * derivative
+        return weightgradients, biasgradients
+
+    def trainbatched(self, featurelist: list[dict], labellist: list[dict], epochs: int, batchsize: int = 32, prefetch: bool = False,
+                     sampler: Sampler = None) -> list[dict]:
+        """trainbatched trains on mini-batches of the dataset, evaluating each batch with NumPy matrix operations and adjusting the weights
+        and biases by the gradient averaged over the batch. If prefetch is True each batch is copied from the dataset's columns into one
+        of two reused batch buffers on a background thread while the previous batch trains, rather than converting the whole dataset into
+        matrices first (so a memory-mapped Dataset is never held in memory). If a sampler is given, each epoch's batches are gathered in
+        the order it gives. Returns the mean loss of each label for every epoch."""
+        if numpy is None:
+            raise ImportError("Batched training requires NumPy.")
+
+        # Converting the dataset into matrices once, with a row for each input or output neuron and a column for each sample (or, if
+        # prefetching, taking its rows to gather batches from).
+        if prefetch or sampler is not None:
+            features, labels = self._batchrows(featurelist, labellist)
+            samples = len(featurelist) if sampler is None else sampler.getepochsize()
+        else:
+            features = self._featurematrix(featurelist)
+            labels = self._labelmatrix(labellist)
+            samples = features.shape[1]
+
+        # Working on NumPy copies of the weights and biases, written back to the edge lists once training is finished.
+        weights = numpy.array(self._weights, dtype=float)
+        biases = numpy.array(self._biases, dtype=float)
+
+        epochrecord = list()
+        for epoch in range(epochs):
+            if prefetch or sampler is not None:
+                order = numpy.arange(samples) if sampler is None else numpy.frombuffer(sampler.getepoch(epoch), dtype=numpy.int64)
+                epochloss = self._traingathered(features, labels, order, batchsize, weights, biases, prefetch)
+            else:
+                epochloss = self._trainbatches(features, labels, batchsize, weights, biases)
+            epochrecord.append({"epoch": epoch, "loss": dict(zip(self._outputs.keys(), (epochloss / samples).tolist()))})
+
+        self._weights[:] = weights.tolist()
+        self._biases[:] = biases.tolist()
+        return epochrecord
+
+    def _trainbatches(self, features: "numpy.ndarray", labels: "numpy.ndarray", batchsize: int, weights: "numpy.ndarray",
+                      biases: "numpy.ndarray") -> "numpy.ndarray":
+        """trainbatches trains one pass over the columns of the feature and label matrices, adjusting the given weights and biases in place
+        after every batch. Returns the summed loss of each output."""
+        biasenabled = numpy.array(self._biasEnabled, dtype=bool)
+        totalloss = numpy.zeros(len(self._outputs))
+        for first in range(0, features.shape[1], batchsize):
+            batchfeatures = features[:, first:first + batchsize]
+            batchlabels = labels[:, first:first + batchsize]
+
+            # Calculating the gradients of the batch, then adjusting the weights and biases.
+            totalloss += self._trainbatch(batchfeatures, batchlabels, weights, biases, biasenabled)
+        return totalloss
+
+    def _trainbatch(self, features: "numpy.ndarray", labels: "numpy.ndarray", weights: "numpy.ndarray", biases: "numpy.ndarray",
+                    biasenabled: "numpy.ndarray") -> "numpy.ndarray":
+        """trainbatch calculates the gradients of a batch, then adjusts the given weights and biases in place. Returns the summed loss of
+        each output."""
+        weightgradients, biasgradients, batchloss = self._batchgradients(weights, biases, features, labels)
+        if self._optimiser is not None:
+            self._optimiser.step(weights, biases, weightgradients, numpy.where(biasenabled, biasgradients, 0), self._learningRate,
+                                 self._edgeOrder)
+        else:
+            weights -= weightgradients * self._learningRate
+            biases -= numpy.where(biasenabled, biasgradients, 0) * self._learningRate
+        return batchloss
+
+    def _traingathered(self, features: list, labels: list, order: "numpy.ndarray", batchsize: int, weights: "numpy.ndarray",
+                       biases: "numpy.ndarray", prefetch: bool) -> "numpy.ndarray":
+        """traingathered trains one pass over the samples in the order given, from the feature and label rows of batchrows. Batches are
+        gathered into two pairs of batch buffers, if prefetching on a background thread so one is filled while the other is trained on
+        (buffers are returned to the free queue once trained on). If training a batch raises an error the background thread is stopped
+        before it is raised. Returns the summed loss of each output."""
+        biasenabled = numpy.array(self._biasEnabled, dtype=bool)
+        totalloss = numpy.zeros(len(self._outputs))
+
+        # Missing inputs stay zero and missing labels NaN, as those rows of the buffers are never written.
+        free = queue.Queue()
+        for _ in range(2):
+            free.put((numpy.zeros((len(features), batchsize)), numpy.full((len(labels), batchsize), numpy.nan)))
+
+        stop = threading.Event()
+        batches = CompiledNetwork._gatherbatches(features, labels, order, batchsize, free, stop)
+        if prefetch:
+            batches = Prefetcher(CompiledNetwork._gatherbatches, (features, labels, order, batchsize, free, stop), 1, stop=stop)
+
+        # Stopping the gathering (which may be waiting for a free buffer) however training ends.
+        try:
+            for batchfeatures, batchlabels, buffers in batches:
+                totalloss += self._trainbatch(batchfeatures, batchlabels, weights, biases, biasenabled)
+                free.put(buffers)
+        finally:
+            stop.set()
+            batches.close()
+        return totalloss
 
-        # Iterating through each layer.
-        for layer in self._neurons:
+    @staticmethod
+    def _gatherbatches(features: list, labels: list, order: "numpy.ndarray", batchsize: int, free: queue.Queue,
+                       stop: threading.Event) -> "Generator[tuple]":
+        """gatherbatches copies the samples of each batch into the next free pair of buffers, yielding the batch's feature and label
+        matrices (views of the buffers) and the buffers to return to the free queue. It returns early once stop is set, including while
+        waiting for a free buffer."""
+        for first in range(0, len(order), batchsize):
+            indexes = order[first:first + batchsize]
+            while True:
+                try:
+                    featurebuffer, labelbuffer = buffers = free.get(timeout=0.05)
+                    break
+                except queue.Empty:
+                    if stop.is_set():
+                        return
+            for buffer, rows in ((featurebuffer, features), (labelbuffer, labels)):
+                for row, column in enumerate(rows):
+                    if column is not None:
+                        numpy.take(column, indexes, out=buffer[row, :len(indexes)])
+            yield featurebuffer[:, :len(indexes)], labelbuffer[:, :len(indexes)], buffers
+
+    def _batchrows(self, featurelist, labellist) -> (list, list):
+        """batchrows returns a NumPy array of every sample's value for each input and output neuron (None where missing), from lists of
+        dictionaries or the columns of a Dataset (which are used as they are, rather than copied)."""
+        if isinstance(featurelist, DatasetRows):
+            featurecolumns, labelcolumns = featurelist.getcolumns(), labellist.getcolumns()
+            return ([numpy.asarray(featurecolumns[name], dtype=float) if name in featurecolumns else None for name in self._inputs.keys()],
+                    [numpy.asarray(labelcolumns[name], dtype=float) if name in labelcolumns else None for name in self._outputs.keys()])
+        return list(self._featurematrix(featurelist)), list(self._labelmatrix(labellist))
+
+    def predictmany(self, chunks) -> "Generator[dict]":
+        """predictmany forward propagates chunks of features, yielding a dictionary of predictions for each row. Chunks are either lists of
+        feature dictionaries or columnar dictionaries of {feature name : sequence of values}. With NumPy each chunk is evaluated at once,
+        otherwise row by row."""
+        names = list(self._outputs.keys())
+        if numpy is not None:
+            weights = numpy.array(self._weights, dtype=float)
+            biases = numpy.array(self._biases, dtype=float)
+            outputs = self._batchplan()["outputs"]
+            for chunk in chunks:
+                inputvalues = self._batchforward(weights, biases, self._featurematrix(chunk), inference=True)[0]
+                for predicted in inputvalues[outputs].T.tolist():
+                    yield dict(zip(names, predicted))
+        else:
+            for chunk in chunks:
+                if isinstance(chunk, dict):
+                    chunk = [dict(zip(chunk.keys(), values)) for values in zip(*chunk.values())]
+                for features in chunk:
+                    self.infer(features)
+                    yield self.getpredicted()
+
+    def _featurematrix(self, featurelist) -> "numpy.ndarray":
+        """featurematrix creates a matrix of features with a row for each input neuron (missing features are zero), from either a list of
+        feature dictionaries or a columnar dictionary of {feature name : sequence of values} (such as the columns of a Dataset)."""
+        if isinstance(featurelist, DatasetRows):
+            featurelist = featurelist.getcolumns()
+        if isinstance(featurelist, dict):
+            samples = len(next(iter(featurelist.values()), ()))
+            return numpy.array([featurelist[name] if name in featurelist else numpy.zeros(samples) for name in self._inputs.keys()],
+                               dtype=float).reshape(len(self._inputs), samples)
+        return numpy.array([[features.get(name, 0.0) for features in featurelist] for name in self._inputs.keys()], dtype=float)
+
+    def _labelmatrix(self, labellist) -> "numpy.ndarray":
+        """labelmatrix creates a matrix of labels with a row for each output neuron (missing labels are NaN, and produce no loss), from
+        either a list of label dictionaries or a columnar dictionary of {label name : sequence of values} (such as the columns of a
+        Dataset)."""
+        if isinstance(labellist, DatasetRows):
+            labellist = labellist.getcolumns()
+        if isinstance(labellist, dict):
+            samples = len(next(iter(labellist.values()), ()))
+            return numpy.array([labellist[name] if name in labellist else numpy.full(samples, numpy.nan) for name in self._outputs.keys()],
+                               dtype=float).reshape(len(self._outputs), samples)
+        return numpy.array([[labels.get(name, numpy.nan) for labels in labellist] for name in self._outputs.keys()], dtype=float)
+
+    def _layerconnections(self) -> (list[int], list[dict]):
+        """layerconnections splits the neurons into the layers the batched passes evaluate at once, and groups the edges by the pair of
+        layers they connect. These are the layers of the design when every synapse runs from an earlier layer to a later one (as in every
+        design from the editor), otherwise each neuron is a layer of its own. Returns the layer pointers, and a connection {"startlayer",
+        "endlayer", "edges", "dense"} for each pair of connected layers, dense where the pair is fully connected."""
+        starts, ends = self._edgeStarts, self._edgeEnds
+        pointers = self._layerPointers
+        layerof = [layer for layer in range(len(pointers) - 1) for _ in range(pointers[layer], pointers[layer + 1])]
+        if any(layerof[start] >= layerof[end] for start, end in zip(starts, ends)):
+            pointers = list(range(len(self._kinds) + 1))
+            layerof = list(range(len(self._kinds)))
+
+        # Grouping the edges by the layers they connect.
+        groups = dict()
+        for edge, (start, end) in enumerate(zip(starts, ends)):
+            groups.setdefault((layerof[start], layerof[end]), list()).append(edge)
+
+        # A pair of layers is fully connected when every start neuron connects to every end neuron exactly once.
+        connections = list()
+        for (startlayer, endlayer), edges in sorted(groups.items()):
+            pairs = {(starts[edge], ends[edge]) for edge in edges}
+            size = (pointers[startlayer + 1] - pointers[startlayer]) * (pointers[endlayer + 1] - pointers[endlayer])
+            connections.append({"startlayer": startlayer, "endlayer": endlayer, "edges": edges, "dense": len(pairs) == len(edges) == size})
+        return pointers, connections
+
+    def getkernels(self) -> list[dict]:
+        """getkernels reports the kernel the batched passes use for the synapses between each pair of connected layers: "dense" (a matrix
+        product) where the layers are fully connected, and "sparse" (gathering and scattering by edge) otherwise."""
+        return [{"startlayer": connection["startlayer"], "endlayer": connection["endlayer"], "synapses": len(connection["edges"]),
+                 "kernel": "dense" if connection["dense"] else "sparse"} for connection in self._layerconnections()[1]]
+
+    def _batchplan(self) -> dict:
+        """batchplan creates (once) what the batched passes need. For each layer: its neurons grouped by kernel (each group's rows, and
+        for outputs their label rows), and its outgoing and incoming connections. A dense connection holds its edges ordered as the rows
+        (end neurons) and columns (start neurons) of its weight matrix, a sparse connection its edges with their start and end neurons."""
+        if self._plan is None:
+            pointers, connections = self._layerconnections()
+            starts = numpy.array(self._edgeStarts, dtype=numpy.intp)
+            ends = numpy.array(self._edgeEnds, dtype=numpy.intp)
+            outputrows = {index: row for row, index in enumerate(self._outputs.values())}
+
+            # Grouping the neurons of each layer by kind, activation and constant, so each group is evaluated by one kernel call.
+            layers = list()
+            for layer in range(len(pointers) - 1):
+                groups = dict()
+                for index in range(pointers[layer], pointers[layer + 1]):
+                    groups.setdefault((self._kinds[index], self._activationTypes[index], self._activationConstants[index]), list()).append(index)
+
+                kernelgroups = list()
+                for (kind, activation, constant), indexes in groups.items():
+                    output = kind == CompiledNetwork.OUTPUT
+                    kernel = BatchLossFunctions.getfunction(activation) if output else BatchActivationFunctions.getfunction(activation)
+                    rows = (slice(indexes[0], indexes[-1] + 1) if indexes[-1] - indexes[0] + 1 == len(indexes) else
+                            numpy.array(indexes, dtype=numpy.intp))
+                    labelrows = numpy.array([outputrows[index] for index in indexes], dtype=numpy.intp) if output else None
+                    kernelgroups.append((output, kernel, constant, rows, labelrows))
+                layers.append({"groups": kernelgroups, "outgoing": list(), "incoming": list()})
+
+            for connection in connections:
+                startlayer, endlayer = connection["startlayer"], connection["endlayer"]
+                edges = numpy.array(connection["edges"], dtype=numpy.intp)
+                entry = {"dense": connection["dense"], "start": slice(pointers[startlayer], pointers[startlayer + 1]),
+                         "end": slice(pointers[endlayer], pointers[endlayer + 1])}
+                if connection["dense"]:
+                    # Ordering the edges by end neuron then start neuron, so their weights reshape into the layer pair's weight matrix.
+                    entry["edges"] = edges[numpy.lexsort((starts[edges], ends[edges]))]
+                    entry["shape"] = (pointers[endlayer + 1] - pointers[endlayer], pointers[startlayer + 1] - pointers[startlayer])
+                else:
+                    entry["edges"], entry["starts"], entry["ends"] = edges, starts[edges], ends[edges]
+                layers[startlayer]["outgoing"].append(entry)
+                layers[endlayer]["incoming"].append(entry)
+
+            # Backpropagation visits the layers in reverse, if each neuron is a layer it visits them in the same order as backpropagate.
+            backward = list(range(len(layers)))[::-1] if pointers is self._layerPointers else list(self._backwardOrder)
+
+            self._plan = {"layers": layers,
+                          "backward": [layers[layer] for layer in backward],
+                          "inputs": numpy.array(list(self._inputs.values()), dtype=numpy.intp),
+                          "outputs": numpy.array(list(self._outputs.values()), dtype=numpy.intp)}
+        return self._plan
+
+    def _batchforward(self, weights: "numpy.ndarray", biases: "numpy.ndarray", features: "numpy.ndarray", labels: "numpy.ndarray" = None,
+                      inference: bool = False) -> tuple:
+        """batchforward forward propagates a batch (a column per sample), returning the input values, activation values, activation
+        derivatives and backpropagated (loss) derivatives of every neuron. Loss is only calculated if labels are given. For inference no
+        derivatives are calculated, and None is returned in their place."""
+        plan = self._batchplan()
+        neuroncount = len(self._kinds)
+        samples = features.shape[1]
+
+        # Per neuron values, with a row for each neuron and a column for each sample.
+        inputvalues = numpy.zeros((neuroncount, samples))
+        activationvalues = numpy.zeros((neuroncount, samples))
+        activationderivatives = None if inference else numpy.zeros((neuroncount, samples))
+        backpropderivatives = None if inference else numpy.zeros((neuroncount, samples))
+        inputvalues[plan["inputs"]] = features
+
+        # Forward propagating layer by layer, a layer's inputs are complete once every earlier layer has passed forwards.
+        for layer in plan["layers"]:
+            for output, kernel, constant, rows, labelrows in layer["groups"]:
+                results = numpy.empty((len(labelrows) if output else len(inputvalues[rows]), samples))
+                if output:
+                    if labels is None or inference:
+                        continue
+
+                    # Calculating loss where a label is present (missing labels produce no loss or derivative).
+                    label = labels[labelrows]
+                    unlabelled = numpy.isnan(label)
+                    derivatives = numpy.empty_like(results)
+                    kernel(inputvalues[rows], numpy.where(unlabelled, 0, label), constant, results, derivatives)
+                    results[unlabelled] = 0
+                    derivatives[unlabelled] = 0
+                    activationvalues[rows] = results
+                    backpropderivatives[rows] = derivatives
+                    continue
+
+                derivatives = None if inference else numpy.empty_like(results)
+                kernel(inputvalues[rows], constant, results, derivatives)
+                activationvalues[rows] = results
+                if not inference:
+                    activationderivatives[rows] = derivatives
+
+            # Feeding each synapse's activation (wx + b) into its end neuron, as a matrix product for fully connected layers.
+            for connection in layer["outgoing"]:
+                edges = connection["edges"]
+                if connection["dense"]:
+                    shape = connection["shape"]
+                    inputvalues[connection["end"]] += (weights[edges].reshape(shape) @ activationvalues[connection["start"]] +
+                                                       biases[edges].reshape(shape).sum(axis=1)[:, None])
+                else:
+                    numpy.add.at(inputvalues, connection["ends"], weights[edges, None] * activationvalues[connection["starts"]] + biases[edges, None])
+
+        return inputvalues, activationvalues, activationderivatives, backpropderivatives
+
+    def _batchgradients(self, weights: "numpy.ndarray", biases: "numpy.ndarray", features: "numpy.ndarray", labels: "numpy.ndarray") -> tuple:
+        """batchgradients forward and back propagates a batch (a column per sample), returning the weight and bias gradients averaged over
+        the batch, and the summed loss of each output."""
+        plan = self._batchplan()
+        samples = features.shape[1]
+        inputvalues, activationvalues, activationderivatives, backpropderivatives = self._batchforward(weights, biases, features, labels)
+
+        # Backpropagating layer by layer, gradients are calculated with the weights the batch was fed forwards with. Outputs pass back their
+        # loss derivative as it is, other neurons multiply it by their activation derivative.
+        weightgradients = numpy.zeros(len(weights))
+        biasgradients = numpy.zeros(len(biases))
+        for layer in plan["backward"]:
+            for output, _, _, rows, _ in layer["groups"]:
+                if not output:
+                    backpropderivatives[rows] *= activationderivatives[rows]
+
+            for connection in layer["incoming"]:
+                edges = connection["edges"]
+                if connection["dense"]:
+                    derivative = backpropderivatives[connection["end"]]
+                    backpropderivatives[connection["start"]] += weights[edges].reshape(connection["shape"]).T @ derivative
+                    weightgradients[edges] = (derivative @ activationvalues[connection["start"]].T).ravel() / samples
+                    biasgradients[edges] = numpy.repeat(derivative.mean(axis=1), connection["shape"][1])
+                else:
+                    derivative = backpropderivatives[connection["ends"]]
+                    numpy.add.at(backpropderivatives, connection["starts"], weights[edges, None] * derivative)
+                    weightgradients[edges] = (activationvalues[connection["starts"]] * derivative).sum(axis=1) / samples
+                    biasgradients[edges] = derivative.mean(axis=1)
+
+        return weightgradients, biasgradients, activationvalues[plan["outputs"]].sum(axis=1)
+
+    def accumulategradients(self, weightgradients: list[float], biasgradients: list[float]) -> None:
+        """accumulategradients backpropagates the loss derivative of the last pass like backpropagate, but adds the gradient of each weight
+        and bias to the given lists (in edge order) rather than adjusting them."""
+        kinds = self._kinds
+        pointers = self._backwardPointers
+        backwardedges = self._backwardEdges
+        starts = self._edgeStarts
+        weights = self._weights
+        biasenabled = self._biasEnabled
+        activationvalues = self._activationValues
+        activationderivatives = self._activationDerivatives
+        backpropderivatives = self._backpropDerivatives
+
+        for index in self._backwardOrder:
+            kind = kinds[index]
+            if kind == CompiledNetwork.OUTPUT:
+                derivative = backpropderivatives[index]
+            else:
+                derivative = backpropderivatives[index] * activationderivatives[index]
+                backpropderivatives[index] = derivative
+                if kind == CompiledNetwork.INPUT:
+                    continue
+
+            for edge in backwardedges[pointers[index]:pointers[index + 1]]:
+                start = starts[edge]
+                if biasenabled[edge]:
+                    biasgradients[edge] += derivative
+                backpropderivatives[start] += derivative * weights[edge]
+                weightgradients[edge] += activationvalues[start] * derivative
+
+    def setsynapseweights(self, weights: list[float], biases: list[float]) -> None:
+        """setsynapseweights replaces the weights and biases of the engine with lists in the order of the network's synapse list (biases are
+        ignored where not enabled)."""
+        self._weights[:] = [weights[synapseindex] for synapseindex in self._edgeOrder]
+        self._biases[:] = [biases[synapseindex] if enabled else 0.0 for synapseindex, enabled in zip(self._edgeOrder, self._biasEnabled)]
+
+    def getbuffers(self) -> dict:
+        """getbuffers returns the engine's arrays of the kind, input value, activation value and backpropagated derivative of each neuron,
+        and the start, end, weight and bias enabled flag of each edge. The arrays are not copied."""
+        return {"kinds": self._kinds, "inputvalues": self._inputValues, "activationvalues": self._activationValues,
+                "backpropderivatives": self._backpropDerivatives, "edgestarts": self._edgeStarts, "edgeends": self._edgeEnds,
+                "weights": self._weights, "biasenabled": self._biasEnabled}
+
+    def getsynapseweights(self) -> tuple:
+        """getsynapseweights returns lists of the weights and biases in the order of the network's synapse list (biases are NaN where not
+        enabled)."""
+        weights = [0.0] * len(self._weights)
+        biases = [0.0] * len(self._biases)
+        for edge, synapseindex in enumerate(self._edgeOrder):
+            weights[synapseindex] = self._weights[edge]
+            biases[synapseindex] = self._biases[edge] if self._biasEnabled[edge] else float("nan")
+        return weights, biases
+
+    def setedgeweights(self, weights, biases) -> None:
+        """setedgeweights replaces the weights and biases of the engine with the given sequences, in edge order (see Network.setweights for
+        synapse order)."""
+        self._weights[:] = list(weights)
+        self._biases[:] = list(biases)
+
+    def trainparallel(self, featurelist: list[dict], labellist: list[dict], epochs: int, processes: int = None, batchsize: int = 32,
+                      mode: str = "synchronous", syncinterval: int = 1, seed: int = None, sampler: Sampler = None) -> list[dict]:
+        """trainparallel trains with data parallelism across a pool of processes, each holding its own copy of the engine. In "synchronous"
+        mode each step gives every process batchsize samples, and the weights are adjusted by the gradient averaged over all of them. In
+        "local" mode (local SGD) each process trains on its own shard of the data for syncinterval batches (or the whole shard if None),
+        then the weights of all processes are averaged. The data is shuffled every epoch if a seed is given, results are reproducible for
+        the same seed and number of processes. If a sampler is given each epoch uses the order it gives instead. An optimiser is only
+        supported in "synchronous" mode, as the processes in "local" mode have no shared optimiser state to average. Returns the mean loss
+        of each label for every epoch."""
+        if mode not in ("synchronous", "local"):
+            raise ValueError("Mode must be 'synchronous' or 'local'.")
+        if mode == "local" and self._optimiser is not None:
+            raise ValueError("An optimiser is only supported in 'synchronous' mode.")
+        processes = processes or cpu_count()
+        random = Random(seed)
+        order = list(range(len(featurelist)))
+        if not order:
+            raise ValueError("There are no samples to train on.")
+        biasenabled = self._biasEnabled
+
+        epochrecord = list()
+        with Pool(processes, initializer=_initialiseworker, initargs=(self, featurelist, labellist)) as pool:
+            for epoch in range(epochs):
+                if sampler is not None:
+                    order = sampler.getepoch(epoch).tolist()
+                elif seed is not None:
+                    random.shuffle(order)
+                epochloss = [0.0] * len(self._outputs)
+
+                if mode == "synchronous":
+                    for first in range(0, len(order), batchsize * processes):
+                        batch = order[first:first + batchsize * processes]
+                        weights, biases = array("d", self._weights), array("d", self._biases)
+                        tasks = [(weights, biases, batch[shard:shard + batchsize]) for shard in range(0, len(batch), batchsize)]
+
+                        # Summing the gradients of every process, then adjusting by their average over the batch.
+                        weightgradients, biasgradients = [0.0] * len(self._weights), [0.0] * len(self._biases)
+                        for shardweights, shardbiases, shardloss in pool.map(_workergradients, tasks):
+                            weightgradients = [total + gradient for total, gradient in zip(weightgradients, shardweights)]
+                            biasgradients = [total + gradient for total, gradient in zip(biasgradients, shardbiases)]
+                            epochloss = [total + loss for total, loss in zip(epochloss, shardloss)]
+                        rate = self._learningRate / len(batch)
+                        if self._optimiser is not None:
+                            self._optimiser.step(self._weights, self._biases, [gradient / len(batch) for gradient in weightgradients],
+                                                 [gradient / len(batch) if enabled else 0.0
+                                                  for gradient, enabled in zip(biasgradients, biasenabled)], self._learningRate,
+                                                 self._edgeOrder)
+                        else:
+                            self._weights[:] = [weight - gradient * rate for weight, gradient in zip(self._weights, weightgradients)]
+                            self._biases[:] = [bias - gradient * rate if enabled else bias
+                                               for bias, gradient, enabled in zip(self._biases, biasgradients, biasenabled)]
+
+                else:
+                    shards = [order[process::processes] for process in range(processes)]
+                    roundsize = max(1, len(shards[0]) if syncinterval is None else syncinterval * batchsize)
+                    for first in range(0, len(shards[0]), roundsize):
+                        weights, biases = array("d", self._weights), array("d", self._biases)
+                        tasks = [(weights, biases, shard[first:first + roundsize], self._learningRate, batchsize) for shard in shards
+                                 if shard[first:first + roundsize]]
+
+                        # Averaging the weights each process trained to, weighted by the samples it trained on.
+                        results = pool.map(_workertrain, tasks)
+                        samples = [len(task[2]) for task in tasks]
+                        self._weights[:] = _weightedaverage([result[0] for result in results], samples)
+                        self._biases[:] = _weightedaverage([result[1] for result in results], samples)
+                        for result in results:
+                            epochloss = [total + loss for total, loss in zip(epochloss, result[2])]
+
+                epochrecord.append({"epoch": epoch, "loss": {name: loss / len(order) for name, loss in zip(self._outputs.keys(), epochloss)}})
+        return epochrecord
+
+    def __getstate__(self) -> dict:
+        """getstate is used when pickling the engine (to send it to other processes), the neuron and synapse objects are left behind so
+        the copy is detached from the network."""
+        state = self.__dict__.copy()
+        state["_neurons"] = None
+        state["_synapses"] = None
+        state["_plan"] = None
+        return state
+
+    def evaluatechunk(self, features, labels) -> (list[array], list[array]):
+        """evaluatechunk forward propagates a chunk of features and labels (lists of dictionaries, or columnar dictionaries of {name :
+        sequence of values}), returning columns of the predicted value and the loss of each output (in the order of the outputs) for each
+        row. With NumPy the chunk is evaluated at once, otherwise row by row."""
+        if numpy is not None:
+            weights = numpy.array(self._weights, dtype=float)
+            biases = numpy.array(self._biases, dtype=float)
+            inputvalues, activationvalues = self._batchforward(weights, biases, self._featurematrix(features), self._labelmatrix(labels))[:2]
+            outputs = self._batchplan()["outputs"]
+            return ([array("d", numpy.ascontiguousarray(row).tobytes()) for row in inputvalues[outputs]],
+                    [array("d", numpy.ascontiguousarray(row).tobytes()) for row in activationvalues[outputs]])
+
+        if isinstance(features, dict):
+            features = [dict(zip(features.keys(), values)) for values in zip(*features.values())]
+        if isinstance(labels, dict):
+            labels = [dict(zip(labels.keys(), values)) for values in zip(*labels.values())]
+        predicted = [array("d") for _ in self._outputs]
+        loss = [array("d") for _ in self._outputs]
+        indexes = list(self._outputs.values())
+
+        # Setting the labels of each row in a scratch buffer, so the labels set on the engine are left as they were.
+        labelbuffer = self._labels
+        self._labels = [None] * len(labelbuffer)
+        try:
+            for rowfeatures, rowlabels in zip(features, labels):
+                for index in indexes:
+                    self._labels[index] = None
+                self.setlabels(rowlabels)
+                self.feedforward(rowfeatures)
+                for column, index in enumerate(indexes):
+                    predicted[column].append(self._inputValues[index])
+                    loss[column].append(self._activationValues[index])
+        finally:
+            self._labels = labelbuffer
+        return predicted, loss
 
-            # Iterating through each neuron in the layer.
-            for neuron in layer:
+    @staticmethod
+    def evaluatechunks(engine: "CompiledNetwork", chunks, processes: int = 1) -> "Generator[tuple]":
+        """evaluatechunks yields the columns evaluatechunk returns for each chunk of (features, labels), in order. With more than one
+        process (None for one per CPU) the chunks are evaluated across a pool of processes each holding a copy of the engine, with at most
+        two chunks per process in flight."""
+        if processes == 1:
+            for features, labels in chunks:
+                yield engine.evaluatechunk(features, labels)
+            return
+
+        processes = processes or cpu_count()
+        with Pool(processes, initializer=_initialiseevaluationworker, initargs=(engine,)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                # Copying slices of memory-mapped columns (memoryviews cannot be sent to other processes).
+                chunk = tuple({name: array("d", column) if isinstance(column, memoryview) else column for name, column in part.items()}
+                              if isinstance(part, dict) else part for part in chunk)
+                pending.append(pool.apply_async(_evaluationworker, (chunk,)))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    def getpredicted(self) -> dict:
+        """getpredicted returns the value input to each output neuron in the last pass, with the label names as keys."""
+        return {name: self._inputValues[index] for name, index in self._outputs.items()}
+
+    def getloss(self) -> dict:
+        """getloss returns the loss at each output neuron in the last pass, with the label names as keys."""
+        return {name: self._activationValues[index] for name, index in self._outputs.items()}
+
+    def getedgeweights(self) -> array:
+        """getedgeweights returns the array of synapse weights, in edge order (see Network.getweights for synapse order)."""
+        return self._weights
+
+    def getedgebiases(self) -> array:
+        """getedgebiases returns the array of synapse biases (zero where not enabled), in edge order (see Network.getbiases for synapse
+        order)."""
+        return self._biases
+
+    def getedgesynapses(self) -> list[Synapse]:
+        """getedgesynapses returns the synapse objects in edge order (the order of the weight and bias arrays)."""
+        return self._synapses
+
+
+class Sweep:
+    """Sweep trains a generated network class (produced by Data.generate) under many configurations of learning rate, seed and cycles in
+    a pool of processes, and ranks the configurations by the average label loss Network.test reports on the test dataset. Results are
+    appended to a JSON-lines file as runs finish, so an interrupted sweep resumes by skipping the configurations already in the file."""
+
+    def __init__(self, networkclass: type, configurations: list[dict], featurelist: list[dict], labellist: list[dict],
+                 testfeatures: list[dict] = None, testlabels: list[dict] = None, resultfile: str = None) -> None:
+
+        # Storing the network class, and the configurations ({"learningrate", "seed", "cycles"}) to train it with.
+        self._networkClass: type = networkclass
+        self._configurations: list[dict] = configurations
+
+        # Storing the training and test datasets, the training dataset is used for testing if no test dataset is given.
+        self._data: tuple = (featurelist, labellist, testfeatures or featurelist, testlabels or labellist)
+
+        # Loading the results of any configurations already run from the result file.
+        self._resultFile: str = resultfile
+        self._results: list[dict] = list()
+        if resultfile is not None and os.path.exists(resultfile):
+            with open(resultfile, "r") as file:
+                self._results = [json.loads(line) for line in file if line.strip()]
+
+    @staticmethod
+    def gridconfigurations(learningrates: list[float], seeds: list[int] = (0,), cycles: list[int] = (1000,)) -> list[dict]:
+        """gridconfigurations returns every combination of the given learning rates, seeds and cycle counts."""
+        return [{"learningrate": learningrate, "seed": seed, "cycles": cyclecount} for learningrate, seed, cyclecount in
+                product(learningrates, seeds, cycles)]
+
+    @staticmethod
+    def randomconfigurations(runs: int, learningraterange: (float, float), seeds: list[int] = (0,), cycles: list[int] = (1000,),
+                             seed: int = 0) -> list[dict]:
+        """randomconfigurations returns configurations with learning rates drawn log-uniformly from the range given, and seeds and cycle
+        counts chosen from those given. The same seed always returns the same configurations."""
+        random = Random(seed)
+        low, high = log(learningraterange[0]), log(learningraterange[1])
+        return [{"learningrate": exp(random.uniform(low, high)), "seed": random.choice(seeds), "cycles": random.choice(cycles)}
+                for _ in range(runs)]
+
+    def run(self, processes: int = None) -> "Generator[dict]":
+        """run trains each configuration not already in the results, yielding each result as its run finishes (in order of completion)."""
+        completed = {Sweep._key(result) for result in self._results}
+        remaining = [configuration for configuration in self._configurations if Sweep._key(configuration) not in completed]
+        if not remaining:
+            return
+
+        with Pool(processes or cpu_count(), initializer=_initialisesweepworker, initargs=(self._networkClass, self._data)) as pool:
+            for result in pool.imap_unordered(_sweeprun, remaining):
+                self._results.append(result)
+
+                # Appending the result to the file as soon as it is available, so it survives an interrupted sweep.
+                if self._resultFile is not None:
+                    with open(self._resultFile, "a") as file:
+                        file.write(json.dumps(result) + "\n")
+                yield result
+
+    def ranked(self) -> list[dict]:
+        """ranked returns the results (including those loaded from the result file) ordered by total loss, lowest first."""
+        return sorted(self._results, key=lambda result: result["loss"])
+
+    def displayranked(self) -> None:
+        """displayranked prints the ranked results as a table."""
+        print("Rank\tLoss\t\t\tLearning Rate\tSeed\tCycles\tAverage Label Loss")
+        for rank, result in enumerate(self.ranked(), 1):
+            print(str(rank) + "\t" + format(result["loss"], ".6g") + "\t\t" + format(result["learningrate"], ".6g") + "\t\t" + str(result["seed"]) +
+                  "\t" + str(result["cycles"]) + "\t" + str(result["averagelabelloss"]))
+
+    @staticmethod
+    def _key(configuration: dict) -> tuple:
+        """key identifies a configuration, to match it against results loaded from the result file."""
+        return configuration["learningrate"], configuration["seed"], configuration["cycles"]
+
+
+# Each worker process of a sweep holds the network class and datasets.
+_sweepNetworkClass = None
+_sweepData = None
 
-                # If the neuron identity matches, return the neuron.
-                if neuron.getidentity() == identity:
-                    return neuron
 
-        # If there are no neurons with the provided identity, return None.
-        return None
\ No newline at end of file
+def _initialisesweepworker(networkclass: type, data: tuple) -> None:
+    """initialisesweepworker stores the network class and datasets in a newly started sweep worker process."""
+    global _sweepNetworkClass, _sweepData
+    _sweepNetworkClass = networkclass
+    _sweepData = data
+
+
+def _sweeprun(configuration: dict) -> dict:
+    """sweeprun trains a new network with one configuration and tests it, returning the configuration with its average label loss."""
+    featurelist, labellist, testfeatures, testlabels = _sweepData
+
+    # Initialising the weights from the configuration's seed, so the run can be reproduced.
+    network = _sweepNetworkClass()
+    network.initialise(configuration["seed"])
+    network.setlearningrate(configuration["learningrate"])
+
+    # Training on the compiled engine, which gives the same results as the object engine faster.
+    network.compile()
+    network.train(featurelist, labellist, configuration["cycles"], record=False, display=False)
+    averagelabelloss = network.test(testfeatures, testlabels)[1]
+
+    return {"learningrate": configuration["learningrate"], "seed": configuration["seed"], "cycles": configuration["cycles"],
+            "averagelabelloss": averagelabelloss, "loss": sum(averagelabelloss.values())}
+
+
+# Each worker process of a parallel training pool holds its own copy of the engine and the dataset (as matrices if NumPy is available).
+_workerEngine = None
+_workerData = None
+
+
+def _initialiseworker(engine: CompiledNetwork, featurelist: list[dict], labellist: list[dict]) -> None:
+    """initialiseworker stores the engine and dataset in a newly started worker process."""
+    global _workerEngine, _workerData
+    _workerEngine = engine
+    if numpy is not None:
+        _workerData = (engine._featurematrix(featurelist), engine._labelmatrix(labellist))
+    else:
+        _workerData = (featurelist, labellist)
+
+
+def _workergradients(task: tuple) -> tuple:
+    """workergradients calculates the summed weight and bias gradients, and summed loss, of the samples at the given indexes."""
+    weights, biases, indexes = task
+    features, labels = _workerData
+    if numpy is not None:
+        weightgradients, biasgradients, loss = _workerEngine._batchgradients(numpy.frombuffer(weights), numpy.frombuffer(biases),
+                                                                              features[:, indexes], labels[:, indexes])
+        return array("d", weightgradients * len(indexes)), array("d", biasgradients * len(indexes)), loss.tolist()
+
+    _workerEngine.setedgeweights(weights, biases)
+    weightgradients, biasgradients = [0.0] * len(weights), [0.0] * len(biases)
+    loss = [0.0] * len(_workerEngine._outputs)
+    for index in indexes:
+        _workerEngine.setlabels(labels[index])
+        _workerEngine.feedforward(features[index])
+        _workerEngine.accumulategradients(weightgradients, biasgradients)
+        loss = [total + value for total, value in zip(loss, _workerEngine.getloss().values())]
+    return array("d", weightgradients), array("d", biasgradients), loss
+
+
+def _workertrain(task: tuple) -> tuple:
+    """workertrain trains the engine on the samples at the given indexes (in batches with NumPy, sample by sample otherwise), returning the
+    resulting weights, biases and summed loss."""
+    weights, biases, indexes, learningrate, batchsize = task
+    features, labels = _workerData
+    _workerEngine.setlearningrate(learningrate)
+    if numpy is not None:
+        weights, biases = numpy.array(weights), numpy.array(biases)
+        loss = _workerEngine._trainbatches(features[:, indexes], labels[:, indexes], batchsize, weights, biases)
+        return array("d", weights), array("d", biases), loss.tolist()
+
+    _workerEngine.setedgeweights(weights, biases)
+    loss = [0.0] * len(_workerEngine._outputs)
+    for index in indexes:
+        _workerEngine.setlabels(labels[index])
+        _workerEngine.feedforward(features[index])
+        _workerEngine.backpropagate()
+        loss = [total + value for total, value in zip(loss, _workerEngine.getloss().values())]
+    return array("d", _workerEngine._weights), array("d", _workerEngine._biases), loss
+
+
+def _weightedaverage(arrays: list, counts: list[int]) -> list[float]:
+    """weightedaverage averages arrays element by element, weighting each array by its count."""
+    total = sum(counts)
+    if numpy is not None:
+        return (numpy.array(arrays).T @ numpy.array(counts, dtype=float) / total).tolist()
+    return [sum(value * count for value, count in zip(values, counts)) / total for values in zip(*arrays)]
+
+
+def _initialiseevaluationworker(engine: CompiledNetwork) -> None:
+    """initialiseevaluationworker stores the engine in a newly started evaluation worker process."""
+    global _workerEngine
+    _workerEngine = engine
+
+
+def _evaluationworker(chunk: tuple) -> tuple:
+    """evaluationworker evaluates a chunk of (features, labels), returning the predicted value and loss columns of each output."""
+    return _workerEngine.evaluatechunk(*chunk)
+
+
+def _trainingsamples(featurelist, labellist, firstcycle: int, cycles: int, sampler: Sampler = None) -> "Generator[tuple]":
+    """trainingsamples yields the (cycle, data index, features, labels) of each training cycle of Network.train, the data index of each
+    cycle given by the sampler (by default each sample in turn, as cycles can be longer than the feature list if the user wants data to be
+    used multiple times)."""
+    if sampler is None:
+        sampler = Sampler(len(featurelist))
+    for cycle, dataindex in zip(range(firstcycle, cycles), sampler.indexes(firstcycle, cycles)):
+        yield cycle, dataindex, featurelist[dataindex], labellist[dataindex]
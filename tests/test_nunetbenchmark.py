@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from NuNetBenchmark import *
+
+
+class TestTiming(unittest.TestCase):
+
+    def test_summarise_reports_percentiles(self):
+        summary = summarise([float(value) for value in range(1, 101)])
+        self.assertEqual((summary["mean"], summary["p50"], summary["p90"], summary["p99"], summary["max"]), (50.5, 51.0, 91.0, 100.0, 100.0))
+        self.assertEqual(summary["persecond"], 1 / 50.5)
+
+    def test_timing_measures_every_engine(self):
+        results = benchmarktiming(2, 1, 3, 1, samples=10)
+        self.assertEqual(results["design"]["synapses"], 9)
+        engines = ("object", "compiled") if numpy is None else ("object", "compiled", "batched")
+        self.assertEqual(tuple(results["engines"]), engines)
+        for stage in ("train", "test"):
+            measurement = results["engines"]["compiled"][stage]
+            self.assertAlmostEqual(measurement["persecond"], 10 / measurement["seconds"])
+
+    def test_compare_reports_only_slowdowns(self):
+        baseline = {"engines": {"object": {"train": {"persecond": 100.0}, "test": {"persecond": 100.0}, "peakbytes": 10}}}
+        current = {"engines": {"object": {"train": {"persecond": 80.0}, "test": {"persecond": 95.0}, "peakbytes": 20},
+                               "batched": {"train": {"persecond": 1.0}}}}
+        regressions = compareresults(baseline, current, 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("object train"))
+
+
+class TestMemory(unittest.TestCase):
+
+    def test_rebuilt_synapse_holds_the_same_values(self):
+        network = loadnetworkclass(generatesource("Memory", 2, 1, 3, 1), "Memory")()
+        synapse = network.getsynapses()[0]
+        rebuilt = rebuild(type(synapse), slotattributes(synapse))
+        self.assertEqual((rebuilt.getidentity(), rebuilt.getweightvalue(), rebuilt.getbiasvalue()),
+                         (synapse.getidentity(), synapse.getweightvalue(), synapse.getbiasvalue()))
+
+    def test_memory_reports_the_slot_saving(self):
+        results = benchmarkmemory(2, 1, 3, 1)
+        self.assertEqual((results["neurons"], results["synapses"]), (6, 9))
+        self.assertGreater(results["slotsaving"], 0)
+        self.assertEqual(results["slotsaving"], results["unslottedbytes"] - results["slottedbytes"])
+
+
+class TestConstruction(unittest.TestCase):
+
+    def test_synapse_forms_build_the_same_network(self):
+        networks = []
+        with tempfile.TemporaryDirectory() as directory:
+            for form in ("objects", "columns", "datafile"):
+                source = generatesource("Construction", 3, 2, 4, 2, 0.3, columns=form == "columns",
+                                        datafile=os.path.join(directory, "Construction.json") if form == "datafile" else None)
+                networkclass = loadnetworkclass(source, "Construction")
+                network = networkclass()
+                network.initialise(5)
+                networks.append(network)
+            DesignFile.clearcache()
+
+        for network in networks[1:]:
+            self.assertEqual([(synapse.getstartposition(), synapse.getendposition(), synapse.getbiasenabled())
+                              for synapse in network.getsynapses()],
+                             [(synapse.getstartposition(), synapse.getendposition(), synapse.getbiasenabled())
+                              for synapse in networks[0].getsynapses()])
+            self.assertEqual(list(network.getweights()), list(networks[0].getweights()))
+            self.assertEqual(network.predict({"x0": 0.5, "x1": -0.2, "x2": 0.1}), networks[0].predict({"x0": 0.5, "x1": -0.2, "x2": 0.1}))
+
+
+if __name__ == "__main__":
+    unittest.main()
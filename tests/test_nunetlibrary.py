@@ -0,0 +1,975 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from array import array
+from random import Random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import NuNetLibrary
+from NuNetLibrary import *
+
+ACTIVATIONS = ["TANH", "SIGMOID", "LEAKY ReLU", "ReLU", "SOFTPLUS", "eLU", "LINEAR", "NONE"]
+
+
+def builddesign(widths=(3, 5, 4), outputs=2, skip=0.3, loss="MSE", seed=0):
+    """builddesign creates the layers and synapses of a small design with random activations and skip synapses, its synapses listed in a
+    shuffled order."""
+    random = Random(seed)
+    layers = [[Input("x" + str(index), (0, index), "NONE") for index in range(widths[0])]]
+    for layer, width in enumerate(widths[1:], 1):
+        layers.append([Neuron((layer, index), random.choice(ACTIVATIONS), 1) for index in range(width)])
+    layers.append([Output("y" + str(index), (len(widths), index), loss, 1) for index in range(outputs)])
+
+    synapses = list()
+    for layer in range(1, len(layers)):
+        for end in layers[layer]:
+            for earlier in range(layer):
+                for start in layers[earlier]:
+                    if earlier == layer - 1 or (random.random() < skip and not isinstance(end, Output)):
+                        synapses.append(Synapse(start.getposition(), end.getposition(), {"interval": 0.01, "min": -1, "max": 1},
+                                                random.random() < 0.5))
+    random.shuffle(synapses)
+    return layers, synapses
+
+
+def buildnetwork(widths=(3, 5, 4), outputs=2, skip=0.3, loss="MSE", learningrate=0.01, seed=0, weightseed=5, **arguments):
+    """buildnetwork creates a network of builddesign's design."""
+    return Network(*builddesign(widths, outputs, skip, loss, seed), learningrate, seed=weightseed, **arguments)
+
+
+class SmallNetwork(Network):
+    """SmallNetwork is a network class of builddesign's default design, as generated by the designer."""
+
+    def __init__(self, optimiser=None):
+        Network.__init__(self, *builddesign(), 0.01, optimiser=optimiser)
+
+
+def builddata(samples, inputs=3, outputs=2, seed=1):
+    """builddata creates lists of feature and label dictionaries for buildnetwork's designs."""
+    random = Random(seed)
+    featurelist = [{"x" + str(index): random.uniform(-1, 1) for index in range(inputs)} for _ in range(samples)]
+    labellist = [{"y" + str(index): sum(features.values()) * (index + 1) * 0.3 for index in range(outputs)} for features in featurelist]
+    return featurelist, labellist
+
+
+def requiresnumpy(test):
+    return unittest.skipIf(NuNetLibrary.numpy is None, "requires NumPy")(test)
+
+
+class TemporaryDirectoryTest(unittest.TestCase):
+    """TemporaryDirectoryTest gives each test a temporary directory for the files it writes."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self._directory.name, name)
+
+
+class TestInitialisation(unittest.TestCase):
+
+    def test_synapses_do_not_draw_from_global_random(self):
+        import random
+        random.seed(3)
+        expected = random.random()
+        random.seed(3)
+        synapse = Synapse((0, 0), (1, 0), {"interval": 0.01, "min": -1, "max": 1}, True)
+        self.assertEqual(random.random(), expected)
+        self.assertEqual((synapse.getweightvalue(), synapse.getbiasvalue()), (0.0, 0.0))
+
+    def test_same_seed_gives_same_weights(self):
+        first, second = buildnetwork(weightseed=7), buildnetwork(weightseed=7)
+        self.assertEqual(list(first.getweights()), list(second.getweights()))
+        self.assertEqual([synapse.getbiasvalue() for synapse in first.getsynapses()],
+                         [synapse.getbiasvalue() for synapse in second.getsynapses()])
+        second.initialise(8)
+        self.assertNotEqual(list(first.getweights()), list(second.getweights()))
+        second.initialise(7)
+        self.assertEqual(list(first.getweights()), list(second.getweights()))
+
+    def test_compiled_initialisation_matches(self):
+        plain, compiled = buildnetwork(), buildnetwork()
+        compiled.compile()
+        plain.initialise(9)
+        compiled.initialise(9)
+        self.assertEqual(list(plain.getweights()), list(compiled.getweights()))
+
+    def test_weights_lie_on_the_initialisation_grid(self):
+        network = buildnetwork()
+        for synapse, weight in zip(network.getsynapses(), network.getweights()):
+            steps = (weight - synapse.getmin()) / synapse.getinterval()
+            self.assertAlmostEqual(steps, round(steps), places=6)
+            self.assertTrue(0 <= round(steps) <= synapse.getsteps())
+
+
+class TestWeightArrays(unittest.TestCase):
+
+    def test_lookups_find_every_object(self):
+        network = buildnetwork()
+        for synapse in network.getsynapses():
+            self.assertIs(network.getsynapse(synapse.getidentity()), synapse)
+            self.assertIs(network.getsynapseat(list(synapse.getstartposition()), synapse.getendposition()), synapse)
+        for neuron in (neuron for layer in network._neurons for neuron in layer):
+            self.assertIs(network.getneuron(neuron.getidentity()), neuron)
+            self.assertIs(network.getneuronat(neuron.getposition()), neuron)
+        self.assertIsNone(network.getsynapse(-1))
+        self.assertIsNone(network.getneuronat((99, 0)))
+
+    def test_setweights_checks_lengths_and_keeps_biases(self):
+        network = buildnetwork()
+        biases = [synapse.getbiasvalue() for synapse in network.getsynapses()]
+        with self.assertRaises(ValueError):
+            network.setweights([0.0])
+        network.setweights([0.5] * len(biases))
+        self.assertEqual(set(network.getweights()), {0.5})
+        self.assertEqual([synapse.getbiasvalue() for synapse in network.getsynapses()], biases)
+
+    def test_compiled_engine_keeps_synapse_order(self):
+        network = buildnetwork()
+        weights = list(network.getweights())
+        engine = network.compile()
+        self.assertEqual(list(network.getweights()), weights)
+        synapses = network.getsynapses()
+        self.assertEqual(list(engine.getedgeweights()),
+                         [weights[synapses.index(synapse)] for synapse in engine.getedgesynapses()])
+
+        network.setweights([float(index) for index in range(len(weights))])
+        self.assertEqual(list(network.getweights()), [float(index) for index in range(len(weights))])
+        network.decompile()
+        self.assertEqual([synapse.getweightvalue() for synapse in synapses], [float(index) for index in range(len(weights))])
+
+
+class TestPrediction(unittest.TestCase):
+
+    def test_empty_columns_yield_nothing(self):
+        network = buildnetwork()
+        self.assertEqual(list(network.predictmany({})), [])
+        self.assertEqual(network.evaluate({}, {})["rows"], 0)
+        self.assertEqual(list(network.compile().predictmany([{}])), [])
+
+
+class TestEvaluation(TemporaryDirectoryTest):
+
+    def test_metrics_match_test(self):
+        featurelist, labellist = builddata(50)
+        network = buildnetwork()
+        expected = network.test(featurelist, labellist)[1]
+        for processes in (1, 2):
+            metrics = network.evaluate(iter(featurelist), iter(labellist), processes, chunksize=8, quantiles=[0.0, 1.0], histogrambins=4,
+                                       histogramrange=(0.0, 10.0), detailfile=self.path("detail" + str(processes)))
+            self.assertEqual(metrics["rows"], 50)
+            for name, loss in expected.items():
+                self.assertAlmostEqual(metrics["meanloss"][name], loss, places=12)
+                histogram = metrics["histograms"][name]
+                self.assertEqual(sum(histogram["counts"]) + histogram["below"] + histogram["above"], 50)
+                self.assertLessEqual(metrics["quantiles"][name][0], metrics["quantiles"][name][1])
+            detail = FileRecord.read(self.path("detail" + str(processes)))
+            self.assertEqual(len(detail["cycle"]), 50)
+
+    def test_evaluation_leaves_engine_labels(self):
+        featurelist, labellist = builddata(10)
+        network = buildnetwork()
+        engine = network.compile()
+        engine.setlabels({"y0": 5.0, "y1": -5.0})
+        labels = list(engine._labels)
+        with mock.patch.object(NuNetLibrary, "numpy", None):
+            network.evaluate(featurelist, labellist)
+        self.assertEqual(engine._labels, labels)
+
+    def test_missing_labels_have_zero_loss(self):
+        featurelist, labellist = builddata(10)
+        labellist = [{"y0": labels["y0"]} for labels in labellist]
+        for numpy in (NuNetLibrary.numpy, None):
+            with mock.patch.object(NuNetLibrary, "numpy", numpy):
+                metrics = buildnetwork().evaluate(featurelist, labellist)
+            self.assertEqual(metrics["meanloss"]["y1"], 0.0)
+            self.assertGreater(metrics["meanloss"]["y0"], 0.0)
+
+
+class TestParallelTraining(unittest.TestCase):
+
+    @requiresnumpy
+    def test_synchronous_mode_matches_batched_training(self):
+        featurelist, labellist = builddata(64)
+        parallel, batched = buildnetwork(), buildnetwork()
+        parallel.trainparallel(featurelist, labellist, 2, 2, batchsize=8)
+        batched.trainbatched(featurelist, labellist, 2, 16)
+        for parallelweight, batchedweight in zip(parallel.getweights(), batched.getweights()):
+            self.assertAlmostEqual(parallelweight, batchedweight, places=9)
+
+    def test_local_mode_is_reproducible(self):
+        featurelist, labellist = builddata(40)
+        records, weights = [], []
+        for _ in range(2):
+            network = buildnetwork()
+            records.append(network.trainparallel(featurelist, labellist, 2, 2, batchsize=4, mode="local", syncinterval=2, seed=3))
+            weights.append(list(network.getweights()))
+        self.assertEqual(records[0], records[1])
+        self.assertEqual(weights[0], weights[1])
+
+    def test_empty_dataset_is_rejected(self):
+        for mode in ("synchronous", "local"):
+            with self.assertRaises(ValueError):
+                buildnetwork().trainparallel([], [], 1, 2, mode=mode)
+
+    def test_fewer_samples_than_processes(self):
+        featurelist, labellist = builddata(2)
+        network = buildnetwork()
+        record = network.trainparallel(featurelist, labellist, 2, 4, mode="local", syncinterval=None)
+        self.assertEqual([entry["epoch"] for entry in record], [0, 1])
+
+
+class TestSweep(TemporaryDirectoryTest):
+
+    def test_grid_covers_every_combination(self):
+        configurations = Sweep.gridconfigurations([0.1, 0.01], [0, 1, 2], [10])
+        self.assertEqual(len(configurations), 6)
+        self.assertEqual(len({Sweep._key(configuration) for configuration in configurations}), 6)
+
+    def test_random_configurations_are_reproducible(self):
+        first = Sweep.randomconfigurations(5, (0.001, 0.1), [0, 1], [10, 20], seed=4)
+        self.assertEqual(first, Sweep.randomconfigurations(5, (0.001, 0.1), [0, 1], [10, 20], seed=4))
+        for configuration in first:
+            self.assertTrue(0.001 <= configuration["learningrate"] <= 0.1)
+
+    def test_run_matches_training_directly(self):
+        featurelist, labellist = builddata(20)
+        configuration = {"learningrate": 0.02, "seed": 4, "cycles": 15}
+        result = list(Sweep(SmallNetwork, [configuration], featurelist, labellist).run(1))[0]
+
+        network = SmallNetwork()
+        network.initialise(4)
+        network.setlearningrate(0.02)
+        network.train(featurelist, labellist, 15, record=False, display=False)
+        self.assertEqual(result["averagelabelloss"], network.test(featurelist, labellist)[1])
+
+    def test_resumes_from_result_file(self):
+        featurelist, labellist = builddata(20)
+        configurations = Sweep.gridconfigurations([0.01, 0.02], [0, 1], [10])
+        first = Sweep(SmallNetwork, configurations[:3], featurelist, labellist, resultfile=self.path("results.jsonl"))
+        self.assertEqual(len(list(first.run(2))), 3)
+
+        resumed = Sweep(SmallNetwork, configurations, featurelist, labellist, resultfile=self.path("results.jsonl"))
+        self.assertEqual([Sweep._key(result) for result in resumed.run(2)], [Sweep._key(configurations[3])])
+        ranked = resumed.ranked()
+        self.assertEqual(len(ranked), 4)
+        self.assertEqual([result["loss"] for result in ranked], sorted(result["loss"] for result in ranked))
+
+
+class TestPrefetching(unittest.TestCase):
+
+    @requiresnumpy
+    def test_prefetched_batches_match(self):
+        featurelist, labellist = builddata(300)
+        plain = buildnetwork()
+        plain.compile()
+        prefetched = buildnetwork()
+        prefetched.compile()
+        self.assertEqual(plain.trainbatched(featurelist, labellist, 2, 7), prefetched.trainbatched(featurelist, labellist, 2, 7, prefetch=True))
+        self.assertEqual(list(plain.getweights()), list(prefetched.getweights()))
+
+    @requiresnumpy
+    def test_error_during_prefetched_epoch_stops_gathering(self):
+        featurelist, labellist = builddata(300)
+        network = buildnetwork()
+        engine = network.compile()
+        trainbatch = engine._trainbatch
+        calls = [0]
+
+        # Slowing each batch down so the gathering thread is waiting for a free buffer when the batch raises.
+        def failingbatch(*arguments):
+            calls[0] += 1
+            time.sleep(0.05)
+            if calls[0] == 3:
+                raise RuntimeError("batch failed")
+            return trainbatch(*arguments)
+
+        engine._trainbatch = failingbatch
+        errors = list()
+
+        def train():
+            try:
+                network.trainbatched(featurelist, labellist, 2, 8, prefetch=True)
+            except RuntimeError as error:
+                errors.append(str(error))
+
+        thread = threading.Thread(target=train, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), "trainbatched did not return after a batch raised")
+        self.assertEqual(len(errors), 1)
+
+    def test_prefetched_training_matches(self):
+        featurelist, labellist = builddata(100)
+        plain = buildnetwork()
+        plain.train(featurelist, labellist, 300, record=False, display=False)
+        for prefetch in ("thread", "process"):
+            prefetched = buildnetwork()
+            prefetched.train(featurelist, labellist, 300, record=False, display=False, prefetch=prefetch)
+            self.assertEqual(list(plain.getweights()), list(prefetched.getweights()))
+
+    def test_items_arrive_in_order(self):
+        for process in (False, True):
+            self.assertEqual(list(Prefetcher(range, (23,), 2, 5, process)), list(range(23)))
+
+    def test_closing_early_stops_producer(self):
+        produced = []
+
+        def producer():
+            for item in range(1000):
+                produced.append(item)
+                yield item
+
+        prefetcher = Prefetcher(producer, depth=2)
+        for item in prefetcher:
+            if item == 3:
+                break
+        prefetcher.close()
+        self.assertLess(len(produced), 1000)
+
+    def test_producer_error_is_raised(self):
+        def producer():
+            yield 1
+            raise KeyError("producer failed")
+
+        with self.assertRaises(KeyError):
+            list(Prefetcher(producer))
+
+
+class TestOptimisers(unittest.TestCase):
+
+    gradients = [[0.5, -1.0, 2.0], [0.25, 0.0, -0.5], [1.0, 1.0, 1.0]]
+
+    @staticmethod
+    def expected(name, gradients, learningrate=0.1):
+        """expected steps a single parameter by each gradient in turn, following the update rules of the optimisers."""
+        parameter, first, second = 0.0, 0.0, 0.0
+        for step, gradient in enumerate(gradients, 1):
+            if name == "sgd":
+                parameter -= learningrate * gradient
+            elif name == "momentum":
+                first = 0.9 * first + gradient
+                parameter -= learningrate * first
+            elif name == "nesterov":
+                first = 0.9 * first + gradient
+                parameter -= learningrate * (gradient + 0.9 * first)
+            elif name == "rmsprop":
+                second = 0.9 * second + 0.1 * gradient * gradient
+                parameter -= learningrate * gradient / (second ** 0.5 + 1e-8)
+            else:
+                first = 0.9 * first + 0.1 * gradient
+                second = 0.999 * second + 0.001 * gradient * gradient
+                parameter -= learningrate * (first / (1 - 0.9 ** step)) / ((second / (1 - 0.999 ** step)) ** 0.5 + 1e-8)
+        return parameter
+
+    def test_updates_follow_their_rules(self):
+        optimisers = {"sgd": Optimiser, "momentum": MomentumOptimiser, "nesterov": NesterovOptimiser, "rmsprop": RMSPropOptimiser,
+                      "adam": AdamOptimiser}
+        for numpy in (NuNetLibrary.numpy, None):
+            with mock.patch.object(NuNetLibrary, "numpy", numpy):
+                for name, optimiserclass in optimisers.items():
+                    optimiser = optimiserclass()
+                    weights, biases = [0.0] * 3, [0.0] * 3
+                    for gradients in self.gradients:
+                        optimiser.step(weights, biases, gradients, [-gradient for gradient in gradients], 0.1)
+                    self.assertEqual(optimiser.getsteps(), 3)
+                    for index in range(3):
+                        expected = self.expected(name, [gradients[index] for gradients in self.gradients])
+                        self.assertAlmostEqual(weights[index], expected, places=12)
+                        self.assertAlmostEqual(biases[index], -expected, places=12)
+
+    def test_order_keeps_state_in_synapse_order(self):
+        order = [2, 0, 1]
+        for numpy in (NuNetLibrary.numpy, None):
+            with mock.patch.object(NuNetLibrary, "numpy", numpy):
+                ordered, permuted = AdamOptimiser(), AdamOptimiser()
+                weights, permutedweights = [0.0] * 3, [0.0] * 3
+                for gradients in self.gradients:
+                    ordered.step(weights, [0.0] * 3, gradients, [0.0] * 3, 0.1)
+                    permuted.step(permutedweights, [0.0] * 3, [gradients[index] for index in order], [0.0] * 3, 0.1, order)
+                self.assertEqual(permutedweights, [weights[index] for index in order])
+                self.assertEqual(permuted.getstate(), ordered.getstate())
+
+    def test_plain_optimiser_matches_sgd(self):
+        featurelist, labellist = builddata(20)
+        for compiled in (False, True):
+            plain, optimised = buildnetwork(), buildnetwork(optimiser=Optimiser())
+            if compiled:
+                optimised.compile()
+            plain.train(featurelist, labellist, 30, record=False, display=False)
+            optimised.train(featurelist, labellist, 30, record=False, display=False)
+            self.assertEqual(list(optimised.getweights()), list(plain.getweights()))
+
+    def test_prediction_leaves_optimiser_state(self):
+        featurelist, labellist = builddata(20)
+        optimiser = AdamOptimiser()
+        network = buildnetwork(optimiser=optimiser)
+        network.train(featurelist, labellist, 20, record=False, display=False)
+        state = optimiser.getstate()
+        list(network.predictmany(featurelist))
+        network.evaluate(featurelist, labellist)
+        self.assertEqual(optimiser.getsteps(), 20)
+        self.assertEqual(optimiser.getstate(), state)
+
+    @requiresnumpy
+    def test_state_carries_between_engines(self):
+        featurelist, labellist = builddata(40)
+        results = []
+        for compiled in (False, True):
+            network = buildnetwork(optimiser=MomentumOptimiser())
+            network.trainbatched(featurelist, labellist, 2, 8)
+            if compiled:
+                network.compile()
+            network.train(featurelist, labellist, 40, record=False, display=False)
+            network.decompile()
+            results.append(list(network.getweights()))
+        self.assertEqual(results[0], results[1])
+
+    def test_local_parallel_training_rejects_optimiser(self):
+        featurelist, labellist = builddata(20)
+        network = buildnetwork(optimiser=MomentumOptimiser())
+        with self.assertRaises(ValueError):
+            network.trainparallel(featurelist, labellist, 1, 2, mode="local")
+
+
+class TestOptimiserCheckpoints(TemporaryDirectoryTest):
+
+    def test_compiled_checkpoint_resumes_uncompiled(self):
+        featurelist, labellist = builddata(30)
+        network = buildnetwork(optimiser=AdamOptimiser())
+        network.compile()
+        network.train(featurelist, labellist, 30, record=False, display=False)
+        network.savecheckpoint(self.path("checkpoint"))
+        network.train(featurelist, labellist, 30, record=False, display=False)
+        network.decompile()
+
+        resumed = buildnetwork(optimiser=AdamOptimiser())
+        resumed.loadcheckpoint(self.path("checkpoint"))
+        resumed.train(featurelist, labellist, 30, record=False, display=False)
+        self.assertEqual(list(resumed.getweights()), list(network.getweights()))
+
+
+class TestCompiledEngine(unittest.TestCase):
+
+    def test_training_matches_object_engine(self):
+        featurelist, labellist = builddata(30)
+        plain, compiled = buildnetwork(), buildnetwork()
+        compiled.compile()
+        plainrecord = plain.train(featurelist, labellist, 60, display=False)
+        compiledrecord = compiled.train(featurelist, labellist, 60, display=False)
+        self.assertEqual([cycle["loss"] for cycle in plainrecord], [cycle["loss"] for cycle in compiledrecord])
+        self.assertEqual(list(plain.getweights()), list(compiled.getweights()))
+        self.assertEqual(plain.test(featurelist, labellist)[1], compiled.test(featurelist, labellist)[1])
+        self.assertEqual(plain.predict(featurelist[0]), compiled.predict(featurelist[0]))
+
+    def test_decompile_writes_weights_back(self):
+        featurelist, labellist = builddata(10)
+        network = buildnetwork()
+        network.compile()
+        network.train(featurelist, labellist, 20, record=False, display=False)
+        weights = list(network.getweights())
+        network.decompile()
+        self.assertIsNone(network.getengine())
+        self.assertEqual([synapse.getweightvalue() for synapse in network.getsynapses()], weights)
+
+    def test_recompiling_keeps_trained_weights(self):
+        featurelist, labellist = builddata(10)
+        network = buildnetwork()
+        engine = network.compile()
+        network.train(featurelist, labellist, 20, record=False, display=False)
+        weights = list(network.getweights())
+        self.assertIs(network.compile(), engine)
+        self.assertEqual(list(network.getweights()), weights)
+
+
+class TestBatchedTraining(unittest.TestCase):
+
+    @requiresnumpy
+    def test_single_sample_batches_match_train(self):
+        featurelist, labellist = builddata(20)
+        plain, batched = buildnetwork(), buildnetwork()
+        plain.train(featurelist, labellist, 20, record=False, display=False)
+        record = batched.trainbatched(featurelist, labellist, 1, 1)
+        self.assertEqual(len(record), 1)
+        for plainweight, batchedweight in zip(plain.getweights(), batched.getweights()):
+            self.assertAlmostEqual(plainweight, batchedweight, places=9)
+
+    @requiresnumpy
+    def test_batches_lower_loss(self):
+        featurelist, labellist = builddata(200)
+        record = buildnetwork(learningrate=0.05).trainbatched(featurelist, labellist, 20, 8)
+        self.assertLess(sum(record[-1]["loss"].values()), sum(record[0]["loss"].values()))
+
+
+class TestBatchKernels(unittest.TestCase):
+
+    values = [-2.0, -0.5, 0.0, 0.3, 1.7]
+    labels = [0.2, -1.0, 0.5, 0.35, 1.5]
+
+    def assertMatches(self, expected, results, derivatives):
+        for (result, derivative), (kernelresult, kernelderivative) in zip(expected, zip(results, derivatives)):
+            self.assertAlmostEqual(result, kernelresult, places=12)
+            self.assertAlmostEqual(derivative, kernelderivative, places=12)
+
+    def buffers(self):
+        buffers = [(array("d", bytes(8 * len(self.values))), array("d", bytes(8 * len(self.values))), list)]
+        if NuNetLibrary.numpy is not None:
+            buffers.append((NuNetLibrary.numpy.empty(len(self.values)), NuNetLibrary.numpy.empty(len(self.values)), NuNetLibrary.numpy.array))
+        return buffers
+
+    def test_activation_kernels_match_scalar_functions(self):
+        for name in ACTIVATIONS + ["BINARY STEP"]:
+            function = Neuron((0, 0), name)._activationFunction
+            expected = [tuple(function(value, 0.3)) for value in self.values]
+            for results, derivatives, convert in self.buffers():
+                BatchActivationFunctions.getfunction(name)(convert(self.values), 0.3, results, derivatives)
+                self.assertMatches(expected, results, derivatives)
+
+    def test_loss_kernels_match_scalar_functions(self):
+        for name in ["LOG-COSH", "HUBER LOSS", "HINGE LOSS", "L1-LOSS", "MSE"]:
+            function = Output("y", (0, 0), name)._activationFunction
+            expected = [tuple(function(value, label, 0.4)) for value, label in zip(self.values, self.labels)]
+            for results, derivatives, convert in self.buffers():
+                BatchLossFunctions.getfunction(name)(convert(self.values), convert(self.labels), 0.4, results, derivatives)
+                self.assertMatches(expected, results, derivatives)
+
+
+class TestPredictMany(unittest.TestCase):
+
+    def test_streamed_predictions_match_predict(self):
+        featurelist, labellist = builddata(50)
+        network = buildnetwork()
+        network.train(featurelist, labellist, 20, record=False, display=False)
+        expected = [network.predict(features) for features in featurelist]
+        columns = {name: [features[name] for features in featurelist] for name in featurelist[0]}
+        for numpy in (NuNetLibrary.numpy, None):
+            with mock.patch.object(NuNetLibrary, "numpy", numpy):
+                for predictions in (list(network.predictmany(iter(featurelist), 7)), list(network.predictmany(columns, 16))):
+                    self.assertEqual(len(predictions), len(expected))
+                    for prediction, expectedprediction in zip(predictions, expected):
+                        for name, value in expectedprediction.items():
+                            self.assertAlmostEqual(prediction[name], value, places=12)
+
+
+class TestPassesWithoutReset(unittest.TestCase):
+
+    def test_training_matches_resetting_every_pass(self):
+        featurelist, labellist = builddata(20)
+        plain, resetting = buildnetwork(), buildnetwork()
+        feedforward = resetting._feedforward
+
+        def resetfirst(features):
+            resetting._resetvalues()
+            feedforward(features)
+
+        resetting._feedforward = resetfirst
+        plainrecord = plain.train(featurelist, labellist, 40, display=False)
+        resettingrecord = resetting.train(featurelist, labellist, 40, display=False)
+        self.assertEqual([cycle["loss"] for cycle in plainrecord], [cycle["loss"] for cycle in resettingrecord])
+        self.assertEqual(list(plain.getweights()), list(resetting.getweights()))
+
+    def test_repeated_predictions_do_not_accumulate(self):
+        featurelist, _ = builddata(5)
+        for compiled in (False, True):
+            network = buildnetwork()
+            if compiled:
+                network.compile()
+            first = network.predict(featurelist[0])
+            for features in featurelist:
+                network.predict(features)
+            self.assertEqual(network.predict(featurelist[0]), first)
+
+    def test_unknown_feature_leaves_no_partial_inputs(self):
+        featurelist, labellist = builddata(1)
+        badfeatures = dict(featurelist[0], missing=1.0)
+        for compiled in (False, True):
+            network, fresh = buildnetwork(), buildnetwork()
+            if compiled:
+                network.compile()
+                fresh.compile()
+            for passmethod in (network.predict, network._feedforward):
+                with self.assertRaises(KeyError):
+                    passmethod(badfeatures)
+            self.assertEqual(network.predict(featurelist[0]), fresh.predict(featurelist[0]))
+            network.train(featurelist, labellist, 1, display=False)
+            fresh.train(featurelist, labellist, 1, display=False)
+            self.assertEqual(list(network.getweights()), list(fresh.getweights()))
+
+
+class TestSlots(unittest.TestCase):
+
+    def test_objects_have_no_instance_dictionary(self):
+        network = buildnetwork()
+        for objects in (network.getsynapses(), [neuron for layer in network._neurons for neuron in layer]):
+            for designobject in objects:
+                self.assertFalse(hasattr(designobject, "__dict__"))
+
+    def test_synapse_keeps_initialisation_settings(self):
+        synapse = Synapse([0, 1], [1, 2], {"interval": 0.25, "min": -0.5, "max": 0.5}, False)
+        self.assertEqual((synapse.getstartposition(), synapse.getendposition()), ((0, 1), (1, 2)))
+        self.assertEqual((synapse.getinterval(), synapse.getmin(), synapse.getmax(), synapse.getsteps()), (0.25, -0.5, 0.5, 4))
+
+
+class TestInference(unittest.TestCase):
+
+    def test_inference_matches_training_pass(self):
+        featurelist, labellist = builddata(10)
+        for compiled in (False, True):
+            network = buildnetwork()
+            if compiled:
+                network.compile()
+            for features, labels in zip(featurelist, labellist):
+                prediction = network.predict(features)
+                network._setlabels(labels)
+                network._feedforward(features)
+                self.assertEqual(prediction, network._getpredicted())
+
+    def test_inference_functions_match_activations(self):
+        for name in ACTIVATIONS + ["BINARY STEP"]:
+            neuron = Neuron((0, 0), name, 1)
+            for value in (-1.5, 0.0, 0.7):
+                self.assertEqual(neuron._inferenceFunction(value, 1), neuron._activationFunction(value, 1)[0])
+
+
+class TestWeightFiles(TemporaryDirectoryTest):
+
+    def test_weights_round_trip_between_engines(self):
+        featurelist, labellist = builddata(20)
+        network = buildnetwork()
+        network.train(featurelist, labellist, 30, record=False, display=False)
+        network.saveweights(self.path("weights"))
+        loaded = buildnetwork(weightseed=99)
+        loaded.compile()
+        loaded.loadweights(self.path("weights"))
+        self.assertEqual(loaded.test(featurelist, labellist)[1], network.test(featurelist, labellist)[1])
+        loaded.saveweights(self.path("compiled"))
+        with open(self.path("weights"), "rb") as first, open(self.path("compiled"), "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_synapses_are_matched_by_position(self):
+        network = buildnetwork()
+        network.saveweights(self.path("weights"))
+        layers, synapses = builddesign()
+        Random(1).shuffle(synapses)
+        reordered = Network(layers, synapses, 0.01, seed=99)
+        reordered.loadweights(self.path("weights"))
+        weights = {(synapse.getstartposition(), synapse.getendposition()): synapse.getweightvalue() for synapse in network.getsynapses()}
+        for synapse in reordered.getsynapses():
+            self.assertEqual(synapse.getweightvalue(), weights[(synapse.getstartposition(), synapse.getendposition())])
+
+    def test_unmatched_or_invalid_files_are_rejected(self):
+        layers, synapses = builddesign()
+        Network(layers, synapses[1:], 0.01).saveweights(self.path("partial"))
+        with self.assertRaises(ValueError):
+            buildnetwork().loadweights(self.path("partial"))
+        with open(self.path("invalid"), "wb") as file:
+            file.write(bytes(64))
+        with self.assertRaises(ValueError):
+            buildnetwork().loadweights(self.path("invalid"))
+
+
+class TestCheckpoints(TemporaryDirectoryTest):
+
+    def test_resumed_training_matches_uninterrupted(self):
+        featurelist, labellist = builddata(20)
+        for compiled in (False, True):
+            uninterrupted, interrupted, resumed = buildnetwork(), buildnetwork(), buildnetwork(weightseed=77)
+            for network in (uninterrupted, interrupted, resumed):
+                if compiled:
+                    network.compile()
+            record = uninterrupted.train(featurelist, labellist, 60, display=False)
+            interrupted.train(featurelist, labellist, 25, record=False, display=False, checkpoint=self.path("checkpoint"),
+                              checkpointcycles=10)
+            resumedrecord = resumed.train(featurelist, labellist, 60, display=False, resumefrom=self.path("checkpoint"))
+            self.assertEqual(record[25:], resumedrecord)
+            self.assertEqual(list(resumed.getweights()), list(uninterrupted.getweights()))
+
+    def test_checkpoint_holds_training_state(self):
+        network = buildnetwork(learningrate=0.03)
+        network.savecheckpoint(self.path("checkpoint"), 12)
+        loaded = buildnetwork(weightseed=77)
+        self.assertEqual(loaded.loadcheckpoint(self.path("checkpoint")), 12)
+        self.assertEqual(loaded.getlearningrate(), 0.03)
+        self.assertEqual(list(loaded.getweights()), list(network.getweights()))
+        loaded.loadweights(self.path("checkpoint"))
+
+
+class TestTrainingRecords(TemporaryDirectoryTest):
+
+    def test_ring_record_keeps_last_cycles(self):
+        featurelist, labellist = builddata(20)
+        record = buildnetwork().train(featurelist, labellist, 50, display=False)
+        ring = buildnetwork().train(featurelist, labellist, 50, record=RingRecord(10), display=False)
+        self.assertEqual(ring.getrecord(), record[-10:])
+        self.assertEqual(ring.getcycles(), 50)
+        for name, meanloss in ring.getmeanloss().items():
+            self.assertAlmostEqual(meanloss, sum(cycle["loss"][name] for cycle in record) / 50, places=12)
+
+    def test_file_record_streams_every_cycle(self):
+        featurelist, labellist = builddata(20)
+        record = buildnetwork().train(featurelist, labellist, 50, display=False)
+        buildnetwork().train(featurelist, labellist, 50, record=FileRecord(self.path("record"), blocksize=16), display=False)
+        columns = FileRecord.read(self.path("record"))
+        self.assertEqual(list(columns["cycle"]), list(range(50)))
+        self.assertEqual(list(columns["loss:y0"]), [cycle["loss"]["y0"] for cycle in record])
+
+    def test_ema_follows_decay(self):
+        record = TrainingRecord(0.5)
+        for cycle, loss in enumerate((4.0, 2.0, 1.0)):
+            record.add(cycle, cycle, {}, {}, {"y": 0.0}, {"y": loss})
+        self.assertEqual(record.getmeanloss(), {"y": 7 / 3})
+        self.assertEqual(record.getemaloss(), {"y": 2.0})
+
+        rows = TrainingRecord(0.5)
+        rows.addrows(0, {"y": [0.0] * 3}, {"y": [4.0, 2.0, 1.0]})
+        self.assertEqual((rows.getcycles(), rows.getmeanloss(), rows.getemaloss()), (3, record.getmeanloss(), record.getemaloss()))
+
+    def test_mean_counts_only_labelled_cycles(self):
+        record = TrainingRecord()
+        record.add(0, 0, {}, {}, {}, {"y0": 4.0, "y1": 1.0})
+        record.add(1, 1, {}, {}, {}, {"y0": 2.0})
+        self.assertEqual(record.getmeanloss(), {"y0": 3.0, "y1": 1.0})
+
+        rows = TrainingRecord()
+        rows.addrows(0, {}, {"y0": [4.0, 2.0], "y1": [1.0]})
+        self.assertEqual(rows.getmeanloss(), {"y0": 3.0, "y1": 1.0})
+
+
+class TestTrainingMonitor(TemporaryDirectoryTest):
+
+    def test_samples_match_between_engines(self):
+        featurelist, labellist = builddata(20)
+        summaries = []
+        for compiled in (False, True):
+            network = buildnetwork()
+            if compiled:
+                network.compile()
+            monitor = TrainingMonitor([JSONLinesSink(self.path("monitor" + str(compiled)))], cycles=10)
+            network.train(featurelist, labellist, 30, record=False, display=monitor)
+            with open(self.path("monitor" + str(compiled))) as file:
+                summaries.append([json.loads(line) for line in file])
+            self.assertEqual(monitor.getoverhead()["samples"], len(summaries[-1]))
+        self.assertEqual(len(summaries[0]), 3)
+        for plain, compiled in zip(*summaries):
+            self.assertEqual(plain["cycle"], compiled["cycle"])
+            for plainlayer, compiledlayer in zip(plain["layers"], compiled["layers"]):
+                for key, value in plainlayer.items():
+                    self.assertAlmostEqual(value, compiledlayer[key], places=9)
+
+    def test_weight_norms_cover_synapses_into_each_layer(self):
+        network = buildnetwork()
+        summary = TrainingMonitor([]).sample(network, 0)
+        for layer in summary["layers"]:
+            weights = [synapse.getweightvalue() for synapse in network.getsynapses() if synapse.getendposition()[0] == layer["layer"]]
+            self.assertAlmostEqual(layer["weightnorm"], sum(weight * weight for weight in weights) ** 0.5, places=12)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_phases_are_counted_and_results_unchanged(self):
+        featurelist, labellist = builddata(10)
+        plain, profiled = buildnetwork(), buildnetwork()
+        stats = profiled.profile(detail=True)
+        plain.train(featurelist, labellist, 20, record=False, display=False)
+        profiled.train(featurelist, labellist, 20, record=False, display=False)
+        self.assertEqual(list(plain.getweights()), list(profiled.getweights()))
+        phases = stats.getphases()
+        self.assertEqual(sorted(phases), ["backpropagate", "feedforward", "recordcycle", "setlabels"])
+        self.assertEqual((phases["feedforward"]["calls"], phases["backpropagate"]["calls"]), (20, 20))
+        self.assertEqual(sorted(stats.getlayers()["feedforward"]), list(range(len(profiled._neurons))))
+        self.assertEqual(sum(timing["calls"] for timing in stats.getactivations()["feedforward"].values()),
+                         20 * sum(len(layer) for layer in profiled._neurons))
+
+    def test_detail_steps_the_optimiser(self):
+        featurelist, labellist = builddata(10)
+        plain, profiled = buildnetwork(optimiser=AdamOptimiser()), buildnetwork(optimiser=AdamOptimiser())
+        profiled.profile(detail=True)
+        before = list(profiled.getweights())
+        plain.train(featurelist, labellist, 5, record=False, display=False)
+        profiled.train(featurelist, labellist, 5, record=False, display=False)
+        self.assertNotEqual(list(profiled.getweights()), before)
+        self.assertEqual(list(plain.getweights()), list(profiled.getweights()))
+
+    def test_disabling_removes_timing(self):
+        network = buildnetwork()
+        stats = network.profile()
+        self.assertIsNone(network.profile(False))
+        network.train(*builddata(2), 2, record=False, display=False)
+        self.assertEqual(stats.getphases()["feedforward"]["calls"], 0)
+        self.assertNotIn("_feedforward", network.__dict__)
+
+
+class TestSynapseColumns(unittest.TestCase):
+
+    def test_columns_match_synapse_objects(self):
+        layers, synapses = builddesign()
+        columns = {"startpositions": [synapse.getstartposition() for synapse in synapses],
+                   "endpositions": [synapse.getendposition() for synapse in synapses],
+                   "intervals": 0.01, "minimums": [-1] * len(synapses), "maximums": 1,
+                   "biasenabled": [synapse.getbiasenabled() for synapse in synapses]}
+        fromcolumns = Network(builddesign()[0], columns, 0.01, seed=5)
+        fromobjects = Network(layers, synapses, 0.01, seed=5)
+        self.assertEqual(list(fromcolumns.getweights()), list(fromobjects.getweights()))
+        created = fromcolumns.getsynapses()
+        self.assertEqual([synapse.getidentity() for synapse in created], list(range(created[0].getidentity(),
+                                                                                    created[0].getidentity() + len(created))))
+        self.assertEqual((created[0].getinterval(), created[0].getmin(), created[0].getmax()), (0.01, -1, 1))
+
+
+class TestDesignFiles(TemporaryDirectoryTest):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(DesignFile.clearcache)
+        layers = [[["Input", "x0", [0, 0], "NONE", None]], [["Neuron", None, [1, 0], "TANH", 1]], [["Output", "y0", [2, 0], "MSE", None]]]
+        DesignFile.save(self.path("design.json"), layers, {"startpositions": [[0, 0], [1, 0]], "endpositions": [[1, 0], [2, 0]],
+                                                           "intervals": 0.01, "minimums": -1, "maximums": 1, "biasenabled": [True, False]})
+
+    def test_design_is_read_relative_to_module(self):
+        first = Network(*DesignFile.load("design.json", self.path("network.py")), 0.01, seed=2)
+        second = Network(*DesignFile.load(self.path("design.json")), 0.01, seed=2)
+        self.assertIsNot(first.getneuronat((1, 0)), second.getneuronat((1, 0)))
+        self.assertEqual(first.predict({"x0": 0.3}), second.predict({"x0": 0.3}))
+        self.assertEqual(first.getneuronat((1, 0)).getactivationtype(), "TANH")
+
+    def test_designs_are_cached_until_cleared(self):
+        DesignFile.load(self.path("design.json"))
+        os.remove(self.path("design.json"))
+        self.assertEqual(len(DesignFile.load(self.path("design.json"))[0]), 3)
+        DesignFile.clearcache()
+        with self.assertRaises(FileNotFoundError):
+            DesignFile.load(self.path("design.json"))
+
+
+class TestKernelSelection(unittest.TestCase):
+
+    def test_fully_connected_layers_are_dense(self):
+        network = buildnetwork()
+        kernels = network.compile().getkernels()
+        widths = [len(layer) for layer in network._neurons]
+        self.assertEqual(sum(kernel["synapses"] for kernel in kernels), len(network.getsynapses()))
+        for kernel in kernels:
+            full = kernel["synapses"] == widths[kernel["startlayer"]] * widths[kernel["endlayer"]]
+            self.assertEqual(kernel["kernel"], "dense" if full else "sparse")
+        self.assertIn("dense", [kernel["kernel"] for kernel in kernels])
+        self.assertIn("sparse", [kernel["kernel"] for kernel in kernels])
+
+    @requiresnumpy
+    def test_partial_connections_match_predict(self):
+        featurelist, _ = builddata(20)
+        layers, synapses = builddesign(skip=0.0)
+        network = Network(layers, synapses[3:], 0.01, seed=5)
+        self.assertIn("sparse", [kernel["kernel"] for kernel in network.compile().getkernels()])
+        for prediction, features in zip(network.predictmany(featurelist), featurelist):
+            for name, value in network.predict(features).items():
+                self.assertAlmostEqual(prediction[name], value, places=12)
+
+
+class TestDatasets(TemporaryDirectoryTest):
+
+    def setUp(self):
+        super().setUp()
+        self.featurelist, self.labellist = builddata(30)
+        for labels in self.labellist[::4]:
+            del labels["y1"]
+        with open(self.path("data.csv"), "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["a", "b", "c", "t0", "t1"])
+            for features, labels in zip(self.featurelist, self.labellist):
+                writer.writerow([features["x0"], features["x1"], features["x2"], labels["y0"], labels.get("y1", "")])
+        with open(self.path("data.jsonl"), "w") as file:
+            for features, labels in zip(self.featurelist, self.labellist):
+                row = {"a": features["x0"], "b": features["x1"], "c": features["x2"], "t0": labels["y0"]}
+                if "y1" in labels:
+                    row["t1"] = labels["y1"]
+                file.write(json.dumps(row) + "\n")
+
+    def datasets(self):
+        features, labels = {"x0": "a", "x1": "b", "x2": "c"}, {"y0": "t0", "y1": "t1"}
+        datasets = [Dataset.fromcsv(self.path("data.csv"), features, labels, chunksize=7),
+                    Dataset.fromcsv(self.path("data.csv"), features, labels, cachepath=self.path("cache.bin"), chunksize=7),
+                    Dataset.fromjsonlines(self.path("data.jsonl"), features, labels, chunksize=7)]
+        datasets[0].save(self.path("saved.bin"))
+        datasets.append(Dataset.open(self.path("saved.bin"), features, labels))
+        datasets.append(Dataset.open(self.path("saved.bin"), features, labels, memorymap=False))
+        return datasets
+
+    def test_rows_match_source(self):
+        for dataset in self.datasets():
+            self.assertEqual(len(dataset), 30)
+            self.assertEqual(list(dataset.getfeatures()), self.featurelist)
+            self.assertEqual(list(dataset.getlabels()), self.labellist)
+
+    def test_training_matches_dictionaries(self):
+        expected = buildnetwork()
+        expected.train(self.featurelist, self.labellist, 40, record=False, display=False)
+        for dataset in self.datasets():
+            network = buildnetwork()
+            network.train(dataset.getfeatures(), dataset.getlabels(), 40, record=False, display=False)
+            self.assertEqual(list(network.getweights()), list(expected.getweights()))
+
+    @requiresnumpy
+    def test_batched_training_reads_columns(self):
+        expected = buildnetwork().trainbatched(self.featurelist, self.labellist, 2, 8)
+        for dataset in self.datasets():
+            self.assertEqual(buildnetwork().trainbatched(dataset.getfeatures(), dataset.getlabels(), 2, 8), expected)
+
+
+class TestSamplers(TemporaryDirectoryTest):
+
+    def test_base_sampler_uses_samples_in_turn(self):
+        self.assertEqual(list(Sampler(4).indexes(2, 11)), [2, 3, 0, 1, 2, 3, 0, 1, 2])
+
+    def test_orders_depend_only_on_seed_and_epoch(self):
+        for numpy in (NuNetLibrary.numpy, None):
+            with mock.patch.object(NuNetLibrary, "numpy", numpy):
+                for build in (lambda: ShuffleSampler(20, 3), lambda: StratifiedSampler([index % 3 for index in range(20)], 3),
+                              lambda: WeightedSampler([1.0] * 19 + [5.0], 3)):
+                    first, second = build(), build()
+                    epochs = [list(first.getepoch(epoch)) for epoch in range(3)]
+                    self.assertEqual([list(second.getepoch(epoch)) for epoch in (2, 0, 1)], [epochs[2], epochs[0], epochs[1]])
+                    self.assertNotEqual(epochs[0], epochs[1])
+                    self.assertEqual(list(first.indexes(15, 45)), epochs[0][15:] + epochs[1] + epochs[2][:5])
+
+    def test_shuffled_epochs_use_every_sample(self):
+        sampler = ShuffleSampler(25, 1)
+        for epoch in range(3):
+            self.assertEqual(sorted(sampler.getepoch(epoch)), list(range(25)))
+
+    def test_strata_are_spread_through_the_epoch(self):
+        strata = ["rare" if index < 10 else "common" for index in range(100)]
+        order = list(StratifiedSampler(strata, 2).getepoch(0))
+        self.assertEqual(sorted(order), list(range(100)))
+        for first in range(0, 100, 20):
+            self.assertEqual(sum(1 for index in order[first:first + 20] if strata[index] == "rare"), 2)
+
+    def test_weighted_draws_follow_weights(self):
+        sampler = WeightedSampler([0.0, 1.0, 3.0], 5, epochsize=4000)
+        order = list(sampler.getepoch(0))
+        self.assertNotIn(0, order)
+        self.assertAlmostEqual(order.count(2) / len(order), 0.75, delta=0.03)
+        with self.assertRaises(ValueError):
+            WeightedSampler([0.0, 0.0])
+
+    def test_shuffled_training_resumes_in_order(self):
+        featurelist, labellist = builddata(10)
+        whole, interrupted, resumed = buildnetwork(), buildnetwork(), buildnetwork()
+        record = whole.train(featurelist, labellist, 30, display=False, sampler=ShuffleSampler(10, 4))
+        interrupted.train(featurelist, labellist, 12, record=False, display=False, checkpoint=self.path("checkpoint"),
+                          sampler=ShuffleSampler(10, 4))
+        resumedrecord = resumed.train(featurelist, labellist, 30, display=False, resumefrom=self.path("checkpoint"),
+                                      sampler=ShuffleSampler(10, 4))
+        self.assertEqual(resumedrecord, record[12:])
+        self.assertEqual(list(resumed.getweights()), list(whole.getweights()))
+
+
+if __name__ == "__main__":
+    unittest.main()